@@ -2,14 +2,23 @@
 py app entrypoint for yolo+byetrack pipeline
 json-only api, frontend is decoupled (netlify)
 """
+import json
+import os
+import time
 import torch
 from pathlib import Path
-from typing import Any
-from fastapi import FastAPI
+from typing import Any, Optional
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
-from pipeline.controller import PipelineController
+from pipeline.journal import EventJournal
+from pipeline.multi_controller import MultiCameraController
 from pipeline.stats import SectionSummary, SuggestedActions
+from pipeline.dashboard import BOOT_ID, DashboardCache
+from pipeline.live import LiveUpdateHub
+from pipeline.streaming import MjpegBroadcaster
+from pipeline.video_source import DEFAULT_VIDEO
 
 # ---- PyTorch 2.6 compatibility: force weights_only=False in torch.load ----
 _real_torch_load = torch.load
@@ -23,11 +32,32 @@ def torch_load_allow_code(*args, **kwargs):
 torch.load = torch_load_allow_code
 # ---------------------------------------------------------------------------
 
-VIDEO_FILE_NAME = "PeopleWalking2.MP4"
-VIDEO_SOURCE_PATH = Path(__file__).with_name(VIDEO_FILE_NAME)
-VIDEO_SOURCE: Any = str(VIDEO_SOURCE_PATH)
+VIDEO_SOURCE: Any = str(DEFAULT_VIDEO)
 # VIDEO_SOURCE: Any = 0  # webcam if needed
 
+# multi-camera: CAMERA_SOURCES='[{"id": "lobby", "source": "rtsp://..."}, {"id": "hall", "source": 0}]'
+CAMERA_SOURCES: list[dict[str, Any]] = json.loads(os.environ.get("CAMERA_SOURCES", "null")) or [
+    {"id": "main", "source": VIDEO_SOURCE},
+]
+
+# detector runtime: "torch" (ultralytics), "onnx" or "onnx-int8" (onnxruntime on CPU, exported once to models/)
+DETECTOR_BACKEND = os.environ.get("DETECTOR_BACKEND", "torch")
+
+# MOTION_GATE=1 skips detection on static frames (reusing the last boxes) for cameras that do not set "motion_gate"
+MOTION_GATE = os.environ.get("MOTION_GATE", "0") == "1"
+
+# "thread" shares one model across cameras; "process" runs decode/detect/track/annotate as separate processes
+PIPELINE_MODE = os.environ.get("PIPELINE_MODE", "thread")
+
+# entries/exits/alerts journal (SQLite, WAL); set JOURNAL_PATH="" to keep counters in memory only
+JOURNAL_PATH = os.environ.get("JOURNAL_PATH", str(Path(__file__).with_name("data") / "events.db"))
+
+# /stream.mjpeg: frame rate cap and downscale factor shared by every viewer of a camera
+MJPEG_MAX_FPS = float(os.environ.get("MJPEG_MAX_FPS", "5"))
+MJPEG_SCALE = float(os.environ.get("MJPEG_SCALE", "1.0"))
+# /events: minimum seconds between two pushes to the same client
+LIVE_MIN_INTERVAL_SEC = float(os.environ.get("LIVE_MIN_INTERVAL_SEC", "0.25"))
+
 app = FastAPI(title="AI Building Awareness API (YOLO)")
 
 
@@ -49,10 +79,40 @@ class Snapshot(BaseModel):
     image: Any
 
 
-controller = PipelineController(VIDEO_SOURCE)
+journal = EventJournal(JOURNAL_PATH) if JOURNAL_PATH else None
+controller = MultiCameraController(
+    CAMERA_SOURCES, mode=PIPELINE_MODE, journal=journal, backend=DETECTOR_BACKEND, motion_gate=MOTION_GATE
+)
 controller.start()
 
 
+@app.on_event("shutdown")
+def close_journal():
+    if journal is not None:
+        journal.close()
+
+
+def get_camera(camera_id: str):
+    camera = controller.camera(camera_id)
+    if camera is None:
+        raise HTTPException(status_code=404, detail=f"unknown camera: {camera_id}")
+    return camera
+
+
+dashboard = DashboardCache(controller.get_state_version, controller.get_live_payload)
+live_hub = LiveUpdateHub(controller.get_state_version, dashboard.get_payload)
+mjpeg_streams: dict[str, MjpegBroadcaster] = {}
+
+
+def get_mjpeg_stream(camera_id: str) -> MjpegBroadcaster:
+    stream = mjpeg_streams.get(camera_id)
+    if stream is None:
+        stream = mjpeg_streams[camera_id] = MjpegBroadcaster(
+            lambda: controller.get_snapshot_jpeg(camera_id, MJPEG_SCALE), max_fps=MJPEG_MAX_FPS
+        )
+    return stream
+
+
 @app.get("/health")
 def health():
     return {"ok": True}
@@ -60,7 +120,7 @@ def health():
 
 @app.get("/processing-status")
 def processing_status():
-    return {"is_processing": controller.is_running()}
+    return controller.get_processing_status()
 
 
 @app.get("/building-status", response_model=BuildingStatus)
@@ -79,6 +139,50 @@ def get_snapshot():
     return Snapshot(**controller.get_snapshot())
 
 
+def if_none_match(request: Request, etag: str) -> bool:
+    return etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]
+
+
+@app.get("/dashboard")
+def get_dashboard(request: Request):
+    version, body = dashboard.get_json()
+    etag = DashboardCache.etag(version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/snapshot.jpg")
+def get_snapshot_jpeg(request: Request, camera: Optional[str] = None):
+    camera_id = get_camera(camera).camera_id if camera else controller.camera_ids()[0]
+    version, jpeg = controller.get_snapshot_jpeg(camera_id)
+    if jpeg is None:
+        raise HTTPException(status_code=503, detail="snapshot not available yet")
+    # snapshot versions restart with the process too; BOOT_ID keeps pre-restart tags from matching
+    etag = f'"{camera_id}-{BOOT_ID}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=jpeg, media_type="image/jpeg", headers=headers)
+
+
+@app.get("/stream.mjpeg")
+def get_mjpeg_stream_response(camera: Optional[str] = None):
+    camera_id = get_camera(camera).camera_id if camera else controller.camera_ids()[0]
+    stream = get_mjpeg_stream(camera_id)
+    return StreamingResponse(stream.stream(), media_type=stream.media_type)
+
+
+@app.get("/events")
+def live_events():
+    return StreamingResponse(
+        live_hub.subscribe(LIVE_MIN_INTERVAL_SEC),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/sections", response_model=SectionSummary)
 def get_sections():
     return controller.get_sections()
@@ -88,3 +192,80 @@ def get_sections():
 def get_suggested_actions():
     return controller.get_suggested_actions()
 
+
+@app.get("/history")
+def get_history(
+    section: str = "total",
+    start: Optional[float] = Query(None, alias="from"),
+    end: Optional[float] = Query(None, alias="to"),
+    resolution: str = "1m",
+    camera: Optional[str] = None,
+):
+    # section is a section name or "total"; resolution is one of 1s, 1m, 15m
+    end = time.time() if end is None else end
+    start = end - 3600 if start is None else start
+    if camera is not None:
+        get_camera(camera)
+    try:
+        return controller.get_history(section, start, end, resolution, camera_id=camera)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"unknown section: {section}")
+
+
+@app.get("/reports")
+def get_reports(
+    start: Optional[float] = Query(None, alias="from"),
+    end: Optional[float] = Query(None, alias="to"),
+    granularity: str = "hour",
+    camera: Optional[str] = None,
+):
+    # entry/exit/alert totals per hour or day, read from the journal's rollup tables
+    end = time.time() if end is None else end
+    start = end - 86400 if start is None else start
+    if camera is not None:
+        get_camera(camera)
+    try:
+        report = controller.get_report(start, end, granularity, camera_id=camera)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if report is None:
+        raise HTTPException(status_code=503, detail="event journal is disabled")
+    return report
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    # Prometheus text exposition: per-stage latency histograms, frame age and pipeline counters
+    return PlainTextResponse(controller.get_metrics_text(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/cameras")
+def list_cameras():
+    return {"cameras": controller.camera_ids()}
+
+
+@app.get("/cameras/{camera_id}/building-status", response_model=BuildingStatus)
+def get_camera_building_status(camera_id: str):
+    return BuildingStatus(**get_camera(camera_id).get_building_status())
+
+
+@app.get("/cameras/{camera_id}/alerts", response_model=list[AlertModel])
+def get_camera_alerts(camera_id: str):
+    return [AlertModel(**a) for a in get_camera(camera_id).get_alerts()]
+
+
+@app.get("/cameras/{camera_id}/snapshot", response_model=Snapshot)
+def get_camera_snapshot(camera_id: str):
+    return Snapshot(**get_camera(camera_id).get_snapshot())
+
+
+@app.get("/cameras/{camera_id}/sections", response_model=SectionSummary)
+def get_camera_sections(camera_id: str):
+    return get_camera(camera_id).get_sections()
+
+
+@app.get("/cameras/{camera_id}/suggested-actions", response_model=SuggestedActions)
+def get_camera_suggested_actions(camera_id: str):
+    return get_camera(camera_id).get_suggested_actions()
@@ -0,0 +1,233 @@
+"""
+crowd pipeline benchmark: replays pipeline/assets/videos/PeopleWalking2.mp4 through the pipeline components
+components: each stage (decode, detect, track, movement, alerts, publish, annotate, encode) is timed per frame
+in a single-threaded loop, reported as p50/p95/p99 in ms
+e2e: a real PipelineController thread (prefetch on, motion gate off, detect every frame) timed as processed FPS
+the default "replay" detector serves recorded boxes (or a seeded synthetic walk) so everything except
+inference is measured deterministically; --detector torch|onnx|onnx-int8 runs a real model on CPU
+
+usage (from crowd-awareness/backend):
+    python -m benchmarks.bench_pipeline --output results.json
+    python -m benchmarks.bench_pipeline --baseline benchmarks/baseline.json   # exit 1 on regression
+    python -m benchmarks.bench_pipeline --record-boxes benchmarks/boxes.npz   # needs ultralytics
+"""
+import argparse
+import json
+import platform
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from pipeline.alerts import AlertEngine
+from pipeline.backends import BACKENDS, create_detector
+from pipeline.annotate import FrameAnnotator
+from pipeline.controller import PipelineController
+from pipeline.movement import MovementAnalyzer
+from pipeline.state_store import StateStore
+from pipeline.tracker import PersonTracker
+from pipeline.zones import ZoneManager
+
+from .replay import ReplayDetector, record_boxes, synthetic_boxes
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_VIDEO = BACKEND_DIR / "pipeline" / "assets" / "videos" / "PeopleWalking2.mp4"
+DEFAULT_BOXES = Path(__file__).with_name("boxes.npz")
+STAGES = ("decode", "detect", "track", "movement", "alerts", "publish", "annotate", "encode")
+PERCENTILES = (50, 95, 99)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def summarize(samples_sec: List[float]) -> Dict[str, float]:
+    ms = np.asarray(samples_sec, dtype=np.float64) * 1000.0
+    if ms.size == 0:
+        return {"n": 0}
+    out = {f"p{p}": round(float(np.percentile(ms, p)), 3) for p in PERCENTILES}
+    out["mean"] = round(float(ms.mean()), 3)
+    out["n"] = int(ms.size)
+    return out
+
+
+def make_detector(kind: str, video: Path, boxes: Optional[Path], frames: int) -> Tuple[Any, str]:
+    """(detector, label); kind is "replay" or a pipeline.backends name. Replay falls back to synthetic boxes when no recording exists."""
+    if kind != "replay":
+        return create_detector(kind), kind
+    if boxes is not None and boxes.exists():
+        return ReplayDetector.load(boxes), "replay"
+    cap = cv2.VideoCapture(str(video))
+    w, h = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+    return synthetic_boxes(frames, w, h), "synthetic"
+
+
+def bench_components(video: Path, detector, frames: int, warmup: int = 10) -> Dict[str, Any]:
+    """Time every stage of `frames` frames in one thread; the clip loops if it is shorter."""
+    cap = cv2.VideoCapture(str(video))
+    if not cap.isOpened():
+        raise RuntimeError(f"cannot open {video}")
+    ok, frame = cap.read()
+    if not ok:
+        raise RuntimeError(f"cannot read {video}")
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    h, w, _ = frame.shape
+
+    state = StateStore()
+    zones_manager = ZoneManager()
+    zones = zones_manager.init_zones(w, h)
+    state.init_sections(zones.keys())
+    tracker = PersonTracker()
+    movement = MovementAnalyzer(state, zones_manager)
+    movement.reset_for_new_zones(zones_manager)
+    alerts = AlertEngine(state, crowd_threshold=40, spike_threshold=5)
+    annotator = FrameAnnotator()
+    encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), 80]
+
+    samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    total_start = 0.0
+    for i in range(frames + warmup):
+        if i == warmup:
+            total_start = time.perf_counter()
+        t0 = time.perf_counter()
+        ok, frame = cap.read()
+        if not ok:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = cap.read()
+        t1 = time.perf_counter()
+        detections = detector.detect_people(frame)
+        t2 = time.perf_counter()
+        tracked = tracker.track(detections)
+        t3 = time.perf_counter()
+        # a fixed clock keeps alert cooldowns and section windows identical between runs
+        now = 1_000_000.0 + i / 24.0
+        movement.update_section_stats(tracked, now)
+        t4 = time.perf_counter()
+        current_total = len(tracked)
+        prev_total = state.last_total
+        state.update_counts(current_total)
+        alerts.build_alerts(current_total, prev_total, now)
+        t5 = time.perf_counter()
+        state.publish()
+        t6 = time.perf_counter()
+        annotator.trigger_line(tracked, h, w)
+        annotated = annotator.render(frame, tracked, zones)
+        t7 = time.perf_counter()
+        cv2.imencode(".jpg", annotated, encode_params)
+        t8 = time.perf_counter()
+        if i >= warmup:
+            marks = (t0, t1, t2, t3, t4, t5, t6, t7, t8)
+            for stage, start, end in zip(STAGES, marks, marks[1:]):
+                samples[stage].append(end - start)
+    elapsed = time.perf_counter() - total_start
+    cap.release()
+    return {
+        "frames": frames,
+        "fps": round(frames / elapsed, 2),
+        "stages": {stage: summarize(values) for stage, values in samples.items()},
+    }
+
+
+def bench_end_to_end(video: Path, detector, frames: int, timeout_sec: float = 300.0) -> Dict[str, Any]:
+    """Run the real controller thread until it has processed `frames` frames."""
+    if isinstance(detector, ReplayDetector):
+        detector.reset()
+    controller = PipelineController(str(video), prefetch=True, detector=detector, max_skip=1, motion_gate=False)
+    controller.start()
+    processed = controller.metrics.counters
+    deadline = time.time() + timeout_sec
+    while processed["frames_processed"] == 0 and time.time() < deadline:
+        time.sleep(0.005)
+    start_frames, start = processed["frames_processed"], time.perf_counter()
+    while processed["frames_processed"] - start_frames < frames and time.time() < deadline:
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    done = processed["frames_processed"] - start_frames
+    controller.stop()
+    return {"frames": done, "fps": round(done / elapsed, 2) if elapsed > 0 else 0.0}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.25,
+            floor_ms: float = 0.5) -> List[str]:
+    """Regressions vs a stored run: p95 slower or FPS lower by more than `tolerance` (and `floor_ms` for p95)."""
+    problems: List[str] = []
+    for section in ("components", "e2e"):
+        new, old = results.get(section), baseline.get(section)
+        if not new or not old:
+            continue
+        if new["fps"] < old["fps"] * (1.0 - tolerance):
+            problems.append(f"{section} fps {new['fps']} < baseline {old['fps']}")
+    new_stages = results.get("components", {}).get("stages", {})
+    old_stages = baseline.get("components", {}).get("stages", {})
+    for stage, old in old_stages.items():
+        new = new_stages.get(stage)
+        if not new or "p95" not in new or "p95" not in old:
+            continue
+        if new["p95"] > old["p95"] * (1.0 + tolerance) and new["p95"] - old["p95"] > floor_ms:
+            problems.append(f"{stage} p95 {new['p95']}ms > baseline {old['p95']}ms")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", type=Path, default=DEFAULT_VIDEO)
+    parser.add_argument("--detector", choices=("replay",) + BACKENDS, default="replay")
+    parser.add_argument("--boxes", type=Path, default=DEFAULT_BOXES, help="recorded boxes for the replay detector")
+    parser.add_argument("--record-boxes", type=Path, help="run YOLO over the clip, save boxes here and exit")
+    parser.add_argument("--frames", type=int, default=240)
+    parser.add_argument("--suite", choices=("components", "e2e", "all"), default="all")
+    parser.add_argument("--threads", type=int, default=1, help="OpenCV worker threads (pin for reproducibility)")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    cv2.setNumThreads(args.threads)
+    if args.record_boxes:
+        from pipeline.detector import YoloPersonDetector
+        n = record_boxes(args.video, args.record_boxes, YoloPersonDetector("yolov8n.pt"))
+        print(f"recorded {n} frames of boxes to {args.record_boxes}")
+        return 0
+
+    detector, detector_label = make_detector(args.detector, args.video, args.boxes, args.frames)
+    results: Dict[str, Any] = {
+        "meta": {
+            "video": args.video.name,
+            "detector": detector_label,
+            "frames": args.frames,
+            "opencv_threads": args.threads,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "ts": time.time(),
+        },
+    }
+    if args.suite in ("components", "all"):
+        results["components"] = bench_components(args.video, detector, args.frames)
+    if args.suite in ("e2e", "all"):
+        results["e2e"] = bench_end_to_end(args.video, detector, args.frames)
+    results["peak_rss_mb"] = round(peak_rss_mb(), 1)
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+
+    if args.baseline:
+        problems = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for p in problems:
+            print(f"REGRESSION: {p}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+detector backend accuracy and throughput vs the PyTorch reference on the bundled video
+each candidate's boxes are greedily matched to the reference boxes of the same frame at IoU >= 0.5;
+reports recall/precision against the reference, mean IoU and confidence drift of matches,
+per-frame count error, and single-frame detection FPS with speedup over the reference
+
+usage (from crowd-awareness/backend; needs ultralytics and onnxruntime):
+    python -m benchmarks.detector_accuracy --candidates onnx onnx-int8 --frames 120 --output accuracy.json
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import supervision as sv
+
+from pipeline.backends import BACKENDS, create_detector
+
+DEFAULT_VIDEO = Path(__file__).resolve().parents[1] / "pipeline" / "assets" / "videos" / "PeopleWalking2.mp4"
+
+
+def match(reference: sv.Detections, candidate: sv.Detections, min_iou: float = 0.5) -> List[Tuple[int, int, float]]:
+    """Greedy one-to-one (reference index, candidate index, IoU) pairs, best IoU first."""
+    if len(reference) == 0 or len(candidate) == 0:
+        return []
+    iou = sv.box_iou_batch(reference.xyxy, candidate.xyxy)
+    pairs: List[Tuple[int, int, float]] = []
+    used_ref, used_cand = set(), set()
+    for flat in np.argsort(-iou, axis=None):
+        i, j = np.unravel_index(flat, iou.shape)
+        if iou[i, j] < min_iou:
+            break
+        if i in used_ref or j in used_cand:
+            continue
+        used_ref.add(i)
+        used_cand.add(j)
+        pairs.append((int(i), int(j), float(iou[i, j])))
+    return pairs
+
+
+def accuracy_delta(reference: List[sv.Detections], candidate: List[sv.Detections]) -> Dict[str, float]:
+    ref_total = sum(len(d) for d in reference)
+    cand_total = sum(len(d) for d in candidate)
+    matched, ious, conf_drift, count_error = 0, [], [], []
+    for ref, cand in zip(reference, candidate):
+        pairs = match(ref, cand)
+        matched += len(pairs)
+        ious.extend(p[2] for p in pairs)
+        conf_drift.extend(abs(float(ref.confidence[i]) - float(cand.confidence[j])) for i, j, _ in pairs)
+        count_error.append(abs(len(ref) - len(cand)))
+    return {
+        "reference_boxes": ref_total,
+        "candidate_boxes": cand_total,
+        "recall": round(matched / ref_total, 4) if ref_total else 1.0,
+        "precision": round(matched / cand_total, 4) if cand_total else 1.0,
+        "mean_iou": round(float(np.mean(ious)), 4) if ious else 0.0,
+        "mean_conf_drift": round(float(np.mean(conf_drift)), 4) if conf_drift else 0.0,
+        "mean_count_error": round(float(np.mean(count_error)), 3) if count_error else 0.0,
+    }
+
+
+def run(detector, frames: List[np.ndarray], warmup: int = 3) -> Tuple[List[sv.Detections], float]:
+    """Detections for every frame plus detection-only FPS (after a short warm-up)."""
+    for frame in frames[:warmup]:
+        detector.detect_people(frame)
+    out: List[sv.Detections] = []
+    start = time.perf_counter()
+    for frame in frames:
+        out.append(detector.detect_people(frame))
+    return out, len(frames) / (time.perf_counter() - start)
+
+
+def load_frames(video: Path, count: int) -> List[np.ndarray]:
+    cap = cv2.VideoCapture(str(video))
+    frames: List[np.ndarray] = []
+    try:
+        while len(frames) < count:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(frame)
+    finally:
+        cap.release()
+    return frames
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", type=Path, default=DEFAULT_VIDEO)
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--reference", choices=BACKENDS, default="torch")
+    parser.add_argument("--candidates", nargs="+", choices=BACKENDS, default=["onnx", "onnx-int8"])
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.video, args.frames)
+    reference, ref_fps = run(create_detector(args.reference), frames)
+    results: Dict[str, Any] = {
+        "video": args.video.name,
+        "frames": len(frames),
+        "reference": {"backend": args.reference, "fps": round(ref_fps, 2)},
+        "candidates": {},
+    }
+    for backend in args.candidates:
+        detections, fps = run(create_detector(backend), frames)
+        results["candidates"][backend] = {
+            "fps": round(fps, 2),
+            "speedup": round(fps / ref_fps, 2),
+            **accuracy_delta(reference, detections),
+        }
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
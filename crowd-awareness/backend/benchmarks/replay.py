@@ -0,0 +1,91 @@
+"""
+deterministic detector stand-ins for benchmarking the non-inference stages
+ReplayDetector serves boxes recorded from a real run (npz written by record_boxes);
+synthetic_boxes builds a seeded set of people walking across the frame when no recording exists
+"""
+from pathlib import Path
+from typing import Any, List, Sequence, Union
+
+import numpy as np
+import supervision as sv
+
+
+class ReplayDetector:
+    """Returns the boxes recorded for frame i on the i-th call, looping when the recording runs out."""
+
+    def __init__(self, boxes: Sequence[np.ndarray], confidences: Sequence[np.ndarray]) -> None:
+        if not boxes:
+            raise ValueError("replay needs at least one frame of boxes")
+        self.boxes = list(boxes)
+        self.confidences = list(confidences)
+        self.index = 0
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "ReplayDetector":
+        data = np.load(path)
+        offsets = data["offsets"]
+        boxes = [data["xyxy"][offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+        confidences = [data["confidence"][offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+        return cls(boxes, confidences)
+
+    def reset(self) -> None:
+        self.index = 0
+
+    def detect_people(self, frame: Any = None, imgsz: Any = None) -> sv.Detections:
+        i = self.index % len(self.boxes)
+        self.index += 1
+        xyxy = self.boxes[i]
+        return sv.Detections(
+            xyxy=xyxy.astype(np.float32),
+            confidence=self.confidences[i].astype(np.float32),
+            class_id=np.zeros(len(xyxy), dtype=int),
+        )
+
+    def detect_people_batch(self, frames: Sequence, imgsz: Any = None) -> List[sv.Detections]:
+        return [self.detect_people(f) for f in frames]
+
+
+def save_boxes(path: Union[str, Path], detections: Sequence[sv.Detections]) -> None:
+    """Store per-frame boxes as flat arrays plus frame offsets (one npz, no pickling)."""
+    counts = [len(d) for d in detections]
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    xyxy = np.concatenate([d.xyxy for d in detections]) if detections else np.empty((0, 4))
+    conf = [d.confidence if d.confidence is not None else np.ones(len(d)) for d in detections]
+    confidence = np.concatenate(conf) if conf else np.empty(0)
+    np.savez_compressed(path, offsets=offsets, xyxy=xyxy.astype(np.float32), confidence=confidence.astype(np.float32))
+
+
+def record_boxes(video_path: Union[str, Path], out_path: Union[str, Path], detector, max_frames: int = 0) -> int:
+    """Run a real detector over the clip once and save its boxes for later replay."""
+    import cv2
+
+    cap = cv2.VideoCapture(str(video_path))
+    detections: List[sv.Detections] = []
+    try:
+        while not max_frames or len(detections) < max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            detections.append(detector.detect_people(frame))
+    finally:
+        cap.release()
+    save_boxes(out_path, detections)
+    return len(detections)
+
+
+def synthetic_boxes(n_frames: int, width: int, height: int, people: int = 25, seed: int = 0) -> ReplayDetector:
+    """Seeded pedestrians moving in straight lines and bouncing off the frame edges."""
+    rng = np.random.default_rng(seed)
+    size = np.stack([rng.uniform(40, 80, people), rng.uniform(100, 200, people)], axis=1)
+    pos = rng.uniform([0, 0], [width, height], (people, 2))
+    vel = rng.uniform(-6, 6, (people, 2))
+    bounds = np.array([width, height], dtype=np.float64) - size
+    boxes, confidences = [], []
+    for _ in range(n_frames):
+        pos += vel
+        over = (pos < 0) | (pos > bounds)
+        vel[over] *= -1
+        pos = np.clip(pos, 0, bounds)
+        boxes.append(np.concatenate([pos, pos + size], axis=1).astype(np.float32))
+        confidences.append(rng.uniform(0.5, 0.95, people).astype(np.float32))
+    return ReplayDetector(boxes, confidences)
@@ -1,30 +1,82 @@
 """
 frame annotator: draws boxes, zones, line, and encodes base64 snapshot
+zone outlines/labels and the counting line never change after init_zones, so they are drawn once into
+cached OverlayLayers and composited per frame; only boxes and the line's in/out counts are drawn each time
+layer order matches the original annotators: boxes, line, line counts, zones on top
+rendering writes into a reused output buffer instead of allocating a frame copy per call
+crossing counts come from a LineCounter that the pipeline triggers itself; the annotator never counts
 """
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Optional, Tuple
 import cv2
 import base64
+import numpy as np
 import supervision as sv
 
+from .counting import LineCounter
+
+
+class OverlayLayer:
+    """
+    A static drawing stored sparsely as (byte index, colour) plus an alpha for anti-aliased edges.
+    the painter is run on a black and on a white canvas; out = a * colour + (1 - a) * background gives
+    black = a * colour and white - black = (1 - a) * 255, which recovers both per channel
+    indices address single channel bytes, which numpy scatters far faster than (n, 3) pixel rows
+    """
+
+    def __init__(self, shape: Tuple[int, ...], painter: Callable[[np.ndarray], Any]) -> None:
+        black = np.zeros(shape, dtype=np.uint8)
+        white = np.full(shape, 255, dtype=np.uint8)
+        painter(black)
+        painter(white)
+        black = black.reshape(-1)
+        # inverse == 255 - alpha * 255; bytes the painter never touched are 255
+        inverse = (white.reshape(-1).astype(np.int16) - black).clip(0, 255)
+        opaque = inverse == 0
+        blended = (inverse > 0) & (inverse < 255)
+        self.opaque_index = np.flatnonzero(opaque)
+        self.opaque_color = black[opaque]
+        self.blend_index = np.flatnonzero(blended)
+        self.blend_color = black[blended].astype(np.uint16)
+        self.blend_inverse = inverse[blended].astype(np.uint16)
+
+    def composite(self, scene: np.ndarray) -> None:
+        """Blend onto a contiguous frame in place; cost scales with drawn pixels, not frame size."""
+        flat = scene.reshape(-1)
+        flat[self.opaque_index] = self.opaque_color
+        if len(self.blend_index):
+            under = flat[self.blend_index].astype(np.uint16)
+            flat[self.blend_index] = self.blend_color + (under * self.blend_inverse + 127) // 255
+
 
 class FrameAnnotator:
-    def __init__(self) -> None:
+    def __init__(self, counter: Optional[LineCounter] = None) -> None:
+        """counter: the pipeline's LineCounter whose line and counts are drawn; a private one by default."""
         self.box_annotator = sv.BoxAnnotator()
-        self.line_zone = None
+        self.counter = counter if counter is not None else LineCounter()
         self.line_annotator = None
         self.zone_annotators = None
+        self.zones: Optional[Dict[str, sv.PolygonZone]] = None
+        # (frame shape, zones identity) the layers below were drawn for
+        self.layers_key: Optional[Tuple[Any, ...]] = None
+        self.line_layer: Optional[OverlayLayer] = None
+        self.zone_layer: Optional[OverlayLayer] = None
+        self.out: Optional[np.ndarray] = None
+
+    @property
+    def line_zone(self) -> Optional[sv.LineZone]:
+        return self.counter.line_zone
 
     def ensure_line(self, h: int, w: int) -> None:
-        if self.line_zone is None:
-            start = sv.Point(0, int(h * 0.5))
-            end = sv.Point(w, int(h * 0.5))
-            self.line_zone = sv.LineZone(start=start, end=end)
+        self.counter.ensure(h, w)
+        if self.line_annotator is None:
+            # counts are drawn per frame in _draw_line_counts; the annotator only paints the static line
             self.line_annotator = sv.LineZoneAnnotator(
-                thickness=2, text_scale=0.6, text_thickness=1
+                thickness=2, text_scale=0.6, text_thickness=1, display_in_count=False, display_out_count=False
             )
 
     def ensure_zones(self, zones: Dict[str, sv.PolygonZone]) -> None:
-        if self.zone_annotators is None:
+        if self.zone_annotators is None or zones is not self.zones:
+            self.zones = zones
             self.zone_annotators = {
                 name: sv.PolygonZoneAnnotator(
                     zone=zone,
@@ -36,26 +88,74 @@ class FrameAnnotator:
                 for name, zone in zones.items()
             }
 
-    def annotate(self, frame, tracked, zones: Dict[str, sv.PolygonZone]):
-        h, w, _ = frame.shape
-        self.ensure_line(h, w)
+    def ensure_layers(self, shape: Tuple[int, ...], zones: Dict[str, sv.PolygonZone]) -> None:
+        key = (shape, id(zones))
+        if key == self.layers_key:
+            return
         self.ensure_zones(zones)
 
-        if self.line_zone is not None:
-            self.line_zone.trigger(tracked)
+        def paint_line(canvas):
+            self.line_annotator.annotate(frame=canvas, line_counter=self.line_zone)
 
-        annotated = frame.copy()
-        annotated = self.box_annotator.annotate(scene=annotated, detections=tracked)
+        def paint_zones(canvas):
+            for name, annotator in self.zone_annotators.items():
+                annotator.annotate(scene=canvas, label=name)
 
-        if self.line_annotator is not None and self.line_zone is not None:
-            annotated = self.line_annotator.annotate(frame=annotated, line_counter=self.line_zone)
+        self.line_layer = OverlayLayer(shape, paint_line)
+        self.zone_layer = OverlayLayer(shape, paint_zones)
+        self.layers_key = key
 
-        if self.zone_annotators is not None:
-            for name, annotator in self.zone_annotators.items():
-                annotated = annotator.annotate(scene=annotated, label=name)
+    def _draw_line_counts(self, scene) -> None:
+        # same placement and style as LineZoneAnnotator's own in/out labels
+        annotator = self.line_annotator
+        start, end = self.line_zone.vector.start, self.line_zone.vector.end
+        cx, cy = (start.x + end.x) / 2, (start.y + end.y) / 2
+        for text, sign in ((f"in: {self.line_zone.in_count}", -1), (f"out: {self.line_zone.out_count}", 1)):
+            size = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, annotator.text_scale, annotator.text_thickness)
+            text_height = size[0][1]
+            sv.draw_text(
+                scene=scene,
+                text=text,
+                text_anchor=sv.Point(cx, cy + sign * int(annotator.text_offset * text_height)),
+                text_color=annotator.text_color,
+                text_scale=annotator.text_scale,
+                text_thickness=annotator.text_thickness,
+                text_padding=annotator.text_padding,
+                background_color=annotator.color,
+            )
+
+    def trigger_line(self, tracked, h: int, w: int) -> None:
+        """Shortcut for counter.trigger, for callers (benchmarks, annotate()) that count and draw in one place."""
+        self.counter.trigger(tracked, h, w)
+
+    def render(self, frame, tracked, zones: Dict[str, sv.PolygonZone], copy: bool = True):
+        """
+        copy=True renders into the annotator's reused output buffer, which the next render overwrites;
+        callers that keep the image across renders must copy it (or pass copy=False with their own frame)
+        """
+        h, w, _ = frame.shape
+        self.ensure_line(h, w)
+        self.ensure_layers(frame.shape, zones)
+
+        if copy:
+            if self.out is None or self.out.shape != frame.shape:
+                self.out = np.empty_like(frame)
+            np.copyto(self.out, frame)
+            annotated = self.out
+        else:
+            annotated = np.ascontiguousarray(frame)
+        annotated = self.box_annotator.annotate(scene=annotated, detections=tracked)
+        self.line_layer.composite(annotated)
+        self._draw_line_counts(annotated)
+        self.zone_layer.composite(annotated)
+        return annotated
+
+    def annotate(self, frame, tracked, zones: Dict[str, sv.PolygonZone]):
+        h, w, _ = frame.shape
+        self.trigger_line(tracked, h, w)
+        annotated = self.render(frame, tracked, zones)
 
         ok, buffer = cv2.imencode(".jpg", annotated)
         if not ok:
             return None
         return base64.b64encode(buffer).decode("utf-8")
-
@@ -0,0 +1,21 @@
+"""
+detector backend registry: every backend exposes detect_people(frame, imgsz=None),
+detect_people_batch(frames, imgsz=None), max_batch_size and max_wait_ms
+  torch      ultralytics YOLO on PyTorch (the original detector)
+  onnx       onnxruntime CPU session on the exported model
+  onnx-int8  onnxruntime on the static INT8-quantized export
+imports are deferred so a server only loads the runtime it uses
+"""
+from typing import Any
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def create_detector(backend: str = "torch", model_name: str = "yolov8n.pt", **kwargs: Any):
+    if backend == "torch":
+        from .detector import YoloPersonDetector
+        return YoloPersonDetector(model_name, **kwargs)
+    if backend in ("onnx", "onnx-int8"):
+        from .onnx_detector import OnnxPersonDetector
+        return OnnxPersonDetector(model_name, int8=backend == "onnx-int8", **kwargs)
+    raise ValueError(f"unknown detector backend: {backend} (expected one of {', '.join(BACKENDS)})")
@@ -0,0 +1,194 @@
+"""
+inference batcher: collects frames from several callers (one per camera) and runs them
+through detector.detect_people_batch together, bounded by max batch size and max wait time
+sources are served round-robin so a fast camera cannot starve the others
+when callers ask for different imgsz, the batch runs at the largest one requested
+a batch only waits for sources that submitted within source_idle_sec; a stopped camera's client
+forgets its source, and one that died silently stops being waited for once it goes idle
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import supervision as sv
+
+SOURCE_IDLE_SEC = 2.0
+
+
+class InferenceBatcher:
+    def __init__(
+        self,
+        detector,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        source_idle_sec: float = SOURCE_IDLE_SEC,
+    ) -> None:
+        self.detector = detector
+        if max_batch_size is None:
+            max_batch_size = getattr(detector, "max_batch_size", 8)
+        if max_wait_ms is None:
+            max_wait_ms = getattr(detector, "max_wait_ms", 15.0)
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_sec = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self.cond = threading.Condition()
+        self.pending: "OrderedDict[Hashable, Deque[Tuple[Any, Optional[int], Future]]]" = OrderedDict()
+        self.pending_count = 0
+        # bumped per batch; picks which ready source goes first
+        self.turn = 0
+        # source id -> monotonic time of its last submit
+        self.known_sources: Dict[Hashable, float] = {}
+        self.source_idle_sec = source_idle_sec
+        self.thread: Optional[threading.Thread] = None
+        self.stopped = False
+
+        self.batches_run = 0
+        self.frames_run = 0
+
+    def start(self) -> None:
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(2.0)
+            self.thread = None
+
+    def submit(self, source_id: Hashable, frame, imgsz: Optional[int] = None) -> "Future[sv.Detections]":
+        return self.submit_many(source_id, [frame], imgsz)[0]
+
+    def submit_many(self, source_id: Hashable, frames: Sequence, imgsz: Optional[int] = None) -> "List[Future[sv.Detections]]":
+        """Queue several frames (e.g. the tiles of one frame) atomically so they can share a batch."""
+        futures: "List[Future[sv.Detections]]" = [Future() for _ in frames]
+        with self.cond:
+            if self.stopped:
+                raise RuntimeError("inference batcher is stopped")
+            self.known_sources[source_id] = time.monotonic()
+            queue = self.pending.setdefault(source_id, deque())
+            for frame, future in zip(frames, futures):
+                queue.append((frame, imgsz, future))
+            self.pending_count += len(futures)
+            self.cond.notify_all()
+        return futures
+
+    def forget(self, source_id: Hashable) -> None:
+        """Stop waiting for a source that will not submit again (its camera stopped)."""
+        with self.cond:
+            self.known_sources.pop(source_id, None)
+            self.cond.notify_all()
+
+    def _expire_sources(self, now: float) -> None:
+        # caller holds self.cond
+        cutoff = now - self.source_idle_sec
+        for source_id, last in list(self.known_sources.items()):
+            if last < cutoff and source_id not in self.pending:
+                del self.known_sources[source_id]
+
+    def detect(self, source_id: Hashable, frame, imgsz: Optional[int] = None) -> sv.Detections:
+        """Blocking helper: submit one frame and wait for its detections."""
+        self.start()
+        return self.submit(source_id, frame, imgsz).result()
+
+    def client(self, source_id: Hashable) -> "BatchedDetectorClient":
+        return BatchedDetectorClient(self, source_id)
+
+    def _take_batch(self) -> List[Tuple[Any, Optional[int], Future]]:
+        # caller holds self.cond; one frame per source per round, the leading source rotating every batch
+        batch: List[Tuple[Any, Optional[int], Future]] = []
+        order = [source_id for source_id in self.known_sources if source_id in self.pending]
+        order += [source_id for source_id in self.pending if source_id not in self.known_sources]
+        if not order:
+            return batch
+        start = self.turn % len(order)
+        order = order[start:] + order[:start]
+        self.turn += 1
+        while len(batch) < self.max_batch_size and any(source_id in self.pending for source_id in order):
+            for source_id in order:
+                if len(batch) >= self.max_batch_size:
+                    break
+                queue = self.pending.get(source_id)
+                if not queue:
+                    continue
+                batch.append(queue.popleft())
+                self.pending_count -= 1
+                if not queue:
+                    del self.pending[source_id]
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            with self.cond:
+                while not self.pending_count and not self.stopped:
+                    self.cond.wait()
+                if self.stopped:
+                    for queue in self.pending.values():
+                        for _, _, future in queue:
+                            future.cancel()
+                    self.pending.clear()
+                    return
+                # wait for more frames unless the batch is full or every active source already queued one
+                self._expire_sources(time.monotonic())
+                deadline = time.monotonic() + self.max_wait_sec
+                while (
+                    self.pending_count < self.max_batch_size
+                    and len(self.pending) < len(self.known_sources)
+                    and not self.stopped
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+                batch = self._take_batch()
+
+            frames = [frame for frame, _, _ in batch]
+            sizes = [size for _, size, _ in batch if size]
+            try:
+                if sizes:
+                    results = self.detector.detect_people_batch(frames, imgsz=max(sizes))
+                else:
+                    results = self.detector.detect_people_batch(frames)
+            except Exception as exc:
+                for _, _, future in batch:
+                    future.set_exception(exc)
+                continue
+            for (_, _, future), detections in zip(batch, results):
+                future.set_result(detections)
+            self.batches_run += 1
+            self.frames_run += len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        avg = self.frames_run / self.batches_run if self.batches_run else 0.0
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait_sec * 1000.0, 1),
+            "batches_run": self.batches_run,
+            "frames_run": self.frames_run,
+            "avg_batch_size": round(avg, 2),
+            "queued": self.pending_count,
+            "sources": len(self.known_sources),
+        }
+
+
+class BatchedDetectorClient:
+    """Per-camera handle exposing detect_people(frame) on top of a shared InferenceBatcher."""
+
+    def __init__(self, batcher: InferenceBatcher, source_id: Hashable) -> None:
+        self.batcher = batcher
+        self.source_id = source_id
+
+    def detect_people(self, frame, imgsz: Optional[int] = None) -> sv.Detections:
+        return self.batcher.detect(self.source_id, frame, imgsz)
+
+    def detect_people_batch(self, frames: Sequence, imgsz: Optional[int] = None) -> List[sv.Detections]:
+        self.batcher.start()
+        return [future.result() for future in self.batcher.submit_many(self.source_id, frames, imgsz)]
+
+    def close(self) -> None:
+        self.batcher.forget(self.source_id)
@@ -2,41 +2,100 @@
 pipeline controller orchestrates detection, tracking, zoning, movement, alerts, and snapshots
 logic remains the same as original monolithic flow; only structured into classes
 """
+import threading
 import time
 import traceback
-from typing import Any
+from typing import Any, Dict, Optional, Union
 
+import supervision as sv
+
+from .journal import EventJournal
 from .state_store import StateStore
 from .video_source import VideoSource
-from .detector import YoloPersonDetector
 from .tracker import PersonTracker
 from .zones import ZoneManager
 from .movement import MovementAnalyzer
 from .stats import SectionStatistics
 from .alerts import AlertEngine
 from .annotate import FrameAnnotator
+from .counting import LineCounter
+from .scheduler import AdaptiveScheduler
+from .snapshot import SnapshotCache
+from .metrics import PipelineMetrics
+from .motion import MotionGate
+from .tiling import RoiDetector
+from .track_table import TRACK_TTL_SEC
 
 
 class PipelineController:
-    def __init__(self, source: Any) -> None:
-        self.state = StateStore()
-        self.video = VideoSource(source)
-        self.detector = YoloPersonDetector("yolov8n.pt")
+    def __init__(
+        self,
+        source: Any,
+        prefetch: bool = True,
+        detector=None,
+        camera_id: str = "main",
+        target_fps: float = 10.0,
+        max_skip: int = 5,
+        adapt_imgsz: bool = False,
+        journal: Optional[EventJournal] = None,
+        motion_gate: Union[bool, Dict[str, Any]] = False,
+        roi: Union[bool, Dict[str, Any]] = False,
+        decoder: str = "opencv",
+        decode_width: Optional[int] = None,
+        headless: bool = False,
+        track_ttl_sec: float = TRACK_TTL_SEC,
+    ) -> None:
+        """
+        motion_gate: True for MotionGate defaults or a dict of MotionGate kwargs; False (default) detects every frame
+        roi: True to detect only inside the zones' bounding box, or a dict of RoiDetector kwargs ({"tiled": true} etc.)
+        decoder / decode_width: see VideoSource; "ffmpeg" with decode_width scales high-resolution feeds while decoding
+        headless: counting-only camera; frames reach the snapshot cache (and the annotator) only while a viewer asks
+        track_ttl_sec: per-track movement state is forgotten after this long unseen
+        """
+        self.camera_id = camera_id
+        self.state = StateStore(track_ttl_sec)
+        if journal is not None:
+            self.state.attach_journal(journal, camera_id)
+        self.video = VideoSource(source, prefetch=prefetch, decoder=decoder, decode_width=decode_width)
+        # detector can be shared across cameras (see MultiCameraController); anything with detect_people(frame)
+        if detector is None:
+            from .detector import YoloPersonDetector  # deferred: pulls in torch/ultralytics
+            detector = YoloPersonDetector("yolov8n.pt")
         self.tracker = PersonTracker()
         self.zones = ZoneManager()
-        self.movement = MovementAnalyzer(self.state, {})
+        if roi:
+            detector = RoiDetector(detector, self.zones, **(roi if isinstance(roi, dict) else {}))
+        self.detector = detector
+        self.movement = MovementAnalyzer(self.state, self.zones)
         self.stats = SectionStatistics(self.state)
         self.alerts = AlertEngine(self.state, crowd_threshold=40, spike_threshold=5)
-        self.annotator = FrameAnnotator()
+        self.counter = LineCounter()
+        self.annotator = FrameAnnotator(self.counter)
+        self.metrics = PipelineMetrics()
+        self.dropped_before_restart = 0
+        self.headless = headless
+        self.snapshots = SnapshotCache(self.annotator, metrics=self.metrics, demand_only=headless)
+        self.scheduler = AdaptiveScheduler(target_fps=target_fps, max_skip=max_skip, adapt_imgsz=adapt_imgsz)
+        self.motion: Optional[MotionGate] = None
+        if motion_gate:
+            self.motion = MotionGate(**motion_gate) if isinstance(motion_gate, dict) else MotionGate()
+        self.last_detections = sv.Detections.empty()
+        self._summary_cache = None
         self.thread_started = False
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
 
     def start(self) -> None:
         if self.thread_started:
             return
         self.thread_started = True
-        import threading
-        t = threading.Thread(target=self.run, daemon=True)
-        t.start()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
 
     def run(self) -> None:
         self.state.mark_running(True)
@@ -52,61 +111,162 @@ class PipelineController:
 
             h, w, _ = test_frame.shape
             zones = self.zones.init_zones(w, h)
-            self.state.set_sections({
-                name: {"current_count": 0, "peak": 0, "enter_events": []} for name in zones.keys()
-            })
-            self.movement.reset_for_new_zones(zones)
+            self.state.init_sections(zones.keys())
+            self.movement.reset_for_new_zones(self.zones)
+            if self.motion is not None:
+                self.motion.set_zones(self.zones.label_map)
 
-            while True:
+            metrics = self.metrics
+            while not self.stop_event.is_set():
+                metrics.start()
                 ok, frame = self.video.read()
                 if not ok or frame is None:
+                    self.dropped_before_restart += self.video.stats().get("frames_dropped", 0)
+                    metrics.inc("video_restarts")
                     self.video.restart()
                     continue
+                metrics.lap("decode")
 
-                detections = self.detector.detect_people(frame)
-                tracked = self.tracker.track(detections)
-
+                frame_start = time.perf_counter()
                 now = time.time()
-                self.movement.update_section_stats(tracked, now)
+                tracked, detect_sec = self._track_frame(frame, now, h, w)
 
                 current_total = len(tracked)
                 prev_total = self.state.last_total
                 self.state.update_counts(current_total)
 
                 self.alerts.build_alerts(current_total, prev_total, now)
+                metrics.lap("alerts")
 
-                b64 = self.annotator.annotate(frame, tracked, zones)
-                if b64:
-                    self.state.set_last_image(b64)
+                # drawing and encoding are deferred to the first snapshot request for this version;
+                # headless cameras skip even the frame copy while nobody is watching
+                if self.snapshots.wanted():
+                    self.snapshots.publish(frame, tracked, zones)
+                self.state.publish()
+                metrics.lap("publish")
+
+                metrics.frame_age.observe(time.time() - self.video.last_frame_ts)
+                metrics.inc("frames_processed")
+                self.scheduler.record(
+                    time.perf_counter() - frame_start, detect_sec, now - self.video.last_frame_ts
+                )
         except Exception:
+            self.metrics.inc("exceptions")
             traceback.print_exc()
         finally:
             self.state.mark_running(False)
             self.video.release()
+            # a shared batcher must stop waiting for this camera's frames
+            close = getattr(self.detector, "close", None)
+            if close is not None:
+                close()
+
+    def _track_frame(self, frame, now: float, h: int, w: int):
+        """Detect (or reuse/extrapolate) and track one frame; returns (tracked, detect_sec or None)."""
+        metrics = self.metrics
+        detect_sec = None
+        if self.scheduler.should_detect():
+            static = False
+            if self.motion is not None:
+                static = not self.motion.should_detect(frame)
+                metrics.lap("motion")
+            if static:
+                # nothing moved since the last detection: the same people are still where they were
+                detections = self.last_detections
+                metrics.inc("detections_reused")
+            else:
+                if self.scheduler.adapt_imgsz:
+                    detections = self.detector.detect_people(frame, imgsz=self.scheduler.imgsz)
+                else:
+                    detections = self.detector.detect_people(frame)
+                detect_sec = metrics.lap("detect")
+                self.last_detections = detections
+            tracked = self.tracker.track(detections)
+            metrics.lap("track")
+            # zone transitions and line crossings are only evaluated on real detections, so an
+            # extrapolated box can never produce an entry/exit/crossing the next detection would contradict
+            self.movement.update_section_stats(tracked, now)
+            metrics.lap("movement")
+            self.counter.trigger(tracked, h, w)
+            metrics.lap("count")
+        else:
+            tracked = self.tracker.predict()
+            metrics.lap("track")
+        return tracked, detect_sec
 
     def get_building_status(self):
+        snap = self.state.snapshot()
         return {
-            "total_entries": self.state.total_entries,
-            "total_exits": self.state.total_exits,
-            "current_inside": self.state.current_inside,
+            "total_entries": snap.total_entries,
+            "total_exits": snap.total_exits,
+            "current_inside": snap.current_inside,
+            # per-frame heartbeat: the snapshot (and its version) only moves when the content changes,
+            # so a healthy static scene would otherwise look stalled
             "last_update_ts": self.state.last_update_ts,
         }
 
     def get_alerts(self):
-        return self.state.alerts
+        return list(self.state.snapshot().alerts)
 
     def get_snapshot(self):
-        return {"image": self.state.last_image}
+        return {"image": self.snapshots.get_base64()}
+
+    def get_snapshot_jpeg(self, scale: float = 1.0):
+        return self.snapshots.get_jpeg(scale)
+
+    def _summary(self):
+        # section summary and actions are rebuilt at most once per state version
+        snap = self.state.snapshot()
+        cached = self._summary_cache
+        if cached is None or cached[0] != snap.version:
+            summary = self.stats.build_section_summary(time.time(), snap)
+            cached = self._summary_cache = (snap.version, summary, self.stats.build_suggested_actions(summary))
+        return cached
 
     def get_sections(self):
-        now = time.time()
-        summary = self.stats.build_section_summary(now)
-        return summary
+        return self._summary()[1]
 
     def get_suggested_actions(self):
-        now = time.time()
-        summary = self.stats.build_section_summary(now)
-        return self.stats.build_suggested_actions(summary)
+        return self._summary()[2]
+
+    def get_history(self, series: str, start: float, end: float, resolution: str = "1m"):
+        history = self.state.section_history
+        if history is None:
+            return {"series": series, "resolution": resolution, "ts": []}
+        return history.query(series, start, end, resolution)
+
+    def get_state_version(self) -> int:
+        return self.state.snapshot().version
+
+    def get_live_payload(self):
+        """Everything the dashboard shows (building status, alerts, sections, actions) as JSON-ready data."""
+        return {
+            "building_status": self.get_building_status(),
+            "alerts": self.get_alerts(),
+            "sections": self.get_sections().model_dump(),
+            "suggested_actions": self.get_suggested_actions().model_dump(),
+        }
+
+    def get_metrics(self) -> PipelineMetrics:
+        # the prefetcher restarts its own counters with the capture, so carry earlier drops forward
+        dropped = self.dropped_before_restart + self.video.stats().get("frames_dropped", 0)
+        self.metrics.counters["frames_dropped"] = dropped
+        self.metrics.counters["tracks_evicted"] = self.state.tracks.evicted
+        return self.metrics
+
+    def get_video_stats(self):
+        return self.video.stats()
+
+    def get_processing_status(self):
+        return {
+            "is_processing": self.is_running(),
+            "video": self.get_video_stats(),
+            "scheduler": self.scheduler.stats(),
+            "motion": self.motion.stats() if self.motion is not None else {"enabled": False},
+            "line": self.counter.counts(),
+            "tracks": self.state.tracks.stats(),
+            "headless": self.headless,
+        }
 
     def is_running(self) -> bool:
         return self.state.pipeline_running
@@ -0,0 +1,49 @@
+"""
+line counting stage: owns the counting line and triggers it with the tracked detections of every frame,
+whether or not anything is drawn; zone entries/exits are counted by MovementAnalyzer in the same loop
+FrameAnnotator only reads the counts, so a headless pipeline keeps counting with the annotator idle
+only boxes backed by a detection are counted: tracks extrapolated on skipped frames (marked by
+PersonTracker.predict) are ignored, in thread and process mode alike, so no phantom crossing reaches the journal
+"""
+from typing import Dict, Optional
+
+import supervision as sv
+
+from .tracker import PREDICTED
+
+
+class LineCounter:
+    def __init__(self, position: float = 0.5) -> None:
+        """position: height of the horizontal counting line as a fraction of the frame."""
+        self.position = position
+        self.line_zone: Optional[sv.LineZone] = None
+
+    def ensure(self, h: int, w: int) -> sv.LineZone:
+        if self.line_zone is None:
+            y = int(h * self.position)
+            self.line_zone = sv.LineZone(start=sv.Point(0, y), end=sv.Point(w, y))
+        return self.line_zone
+
+    def trigger(self, tracked: sv.Detections, h: int, w: int) -> None:
+        """Update crossing counts from the tracker's output on detection frames; predicted tracks are skipped."""
+        predicted = tracked.data.get(PREDICTED)
+        if predicted is not None:
+            tracked = tracked[~predicted]
+        self.ensure(h, w).trigger(tracked)
+
+    def set_counts(self, in_count: int, out_count: int) -> None:
+        """Mirror counts kept elsewhere (the process-mode track stage) for drawing."""
+        if self.line_zone is not None:
+            self.line_zone.in_count = in_count
+            self.line_zone.out_count = out_count
+
+    @property
+    def in_count(self) -> int:
+        return self.line_zone.in_count if self.line_zone is not None else 0
+
+    @property
+    def out_count(self) -> int:
+        return self.line_zone.out_count if self.line_zone is not None else 0
+
+    def counts(self) -> Dict[str, int]:
+        return {"in": self.in_count, "out": self.out_count}
@@ -0,0 +1,48 @@
+"""
+consolidated dashboard payload: building status, alerts, sections and suggested actions
+built at most once per pipeline state version and kept as pre-serialized JSON bytes,
+so pollers and push subscribers between two state changes cost a version check
+versions restart at 0 with the process, so ETags also carry BOOT_ID: a client holding a tag
+from before a restart can never match a different payload that reached the same version
+"""
+import json
+import threading
+import uuid
+from typing import Any, Callable, Dict, Tuple
+
+BOOT_ID = uuid.uuid4().hex[:12]
+
+
+class DashboardCache:
+    def __init__(self, get_version: Callable[[], int], build: Callable[[], Dict[str, Any]]) -> None:
+        self.get_version = get_version
+        self.build = build
+        self.lock = threading.Lock()
+        # (version, payload dict, json bytes), replaced as one tuple
+        self.cached: Tuple[int, Dict[str, Any], bytes] = (-1, {}, b"{}")
+
+    def _current(self) -> Tuple[int, Dict[str, Any], bytes]:
+        version = self.get_version()
+        cached = self.cached
+        if cached[0] == version:
+            return cached
+        with self.lock:
+            cached = self.cached
+            if cached[0] == version:
+                return cached
+            # version is read before building, so a payload is never labelled newer than it is
+            payload = self.build()
+            body = json.dumps({"version": version, **payload}, ensure_ascii=False).encode("utf-8")
+            self.cached = (version, payload, body)
+            return self.cached
+
+    def get_payload(self) -> Dict[str, Any]:
+        return self._current()[1]
+
+    def get_json(self) -> Tuple[int, bytes]:
+        version, _, body = self._current()
+        return version, body
+
+    @staticmethod
+    def etag(version: int) -> str:
+        return f'"dashboard-{BOOT_ID}-{version}"'
@@ -1,20 +1,46 @@
 """
 person detector wrapper around ultralytics yolo
 loads the model once and exposes detect_people(frame) returning supervision.Detections filtered to class person
+detect_people_batch(frames) runs several frames (possibly from different cameras) through the model in one call
 """
+from typing import List, Optional, Sequence
+
 import supervision as sv
 from ultralytics import YOLO
 
 
 class YoloPersonDetector:
-    def __init__(self, model_name: str = "yolov8n.pt") -> None:
+    def __init__(
+        self,
+        model_name: str = "yolov8n.pt",
+        imgsz: int = 640,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 15.0,
+    ) -> None:
         self.model = YOLO(model_name)
+        self.imgsz = imgsz
+        # batching limits; max_wait_ms is honoured by InferenceBatcher when collecting frames
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max_wait_ms
 
-    def detect_people(self, frame) -> sv.Detections:
-        results = self.model(frame, imgsz=640, verbose=False)[0]
+    @staticmethod
+    def _people_only(results) -> sv.Detections:
         detections = sv.Detections.from_ultralytics(results)
         if detections.class_id is not None:
             mask = detections.class_id == 0
             detections = detections[mask]
         return detections
 
+    def detect_people(self, frame, imgsz: Optional[int] = None) -> sv.Detections:
+        results = self.model(frame, imgsz=imgsz or self.imgsz, verbose=False)[0]
+        return self._people_only(results)
+
+    def detect_people_batch(self, frames: Sequence, imgsz: Optional[int] = None) -> List[sv.Detections]:
+        """Detect people in several frames; returns one Detections per frame, in order."""
+        out: List[sv.Detections] = []
+        frames = list(frames)
+        for start in range(0, len(frames), self.max_batch_size):
+            chunk = frames[start:start + self.max_batch_size]
+            results = self.model(chunk, imgsz=imgsz or self.imgsz, verbose=False)
+            out.extend(self._people_only(r) for r in results)
+        return out
@@ -0,0 +1,129 @@
+"""
+per-section dwell times over a sliding window as a fixed-size streaming sketch
+every finished visit (a track leaving a zone, or being evicted while in it) adds one duration in O(1):
+a count in a log-spaced histogram bin plus a running sum, both kept per time slot
+the window is a ring of slots; rotating one out subtracts its counts from the totals, so the rolling
+mean is exact and p50/p90 come from the fixed bins (about 5% relative error) whatever the visitor rate
+memory is n_slots x n_bins counters per section, independent of how many people pass
+"""
+import math
+from typing import Dict, List, Optional
+
+from .section_window import SECTION_WAIT_WINDOW_SEC
+
+DWELL_MIN_SEC = 1.0
+DWELL_MAX_SEC = 4 * 3600.0
+DWELL_BINS = 96
+DWELL_SLOTS = 10
+
+
+class DwellSketch:
+    __slots__ = (
+        "window_sec", "slot_sec", "n_slots", "min_sec", "log_min", "log_step", "n_bins",
+        "slot_counts", "slot_total", "slot_sum", "counts", "total", "total_sum", "epoch", "_summary",
+    )
+
+    def __init__(
+        self,
+        window_sec: float = SECTION_WAIT_WINDOW_SEC,
+        n_slots: int = DWELL_SLOTS,
+        min_sec: float = DWELL_MIN_SEC,
+        max_sec: float = DWELL_MAX_SEC,
+        n_bins: int = DWELL_BINS,
+    ) -> None:
+        self.window_sec = window_sec
+        self.n_slots = n_slots
+        self.slot_sec = window_sec / n_slots
+        # bin 0 holds [0, min_sec), bins 1..n_bins-2 are log-spaced up to max_sec, the last one is overflow
+        self.n_bins = n_bins
+        self.min_sec = min_sec
+        self.log_min = math.log(min_sec)
+        self.log_step = (math.log(max_sec) - self.log_min) / (n_bins - 2)
+        self.slot_counts: List[List[int]] = [[0] * n_bins for _ in range(n_slots)]
+        self.slot_total: List[int] = [0] * n_slots
+        self.slot_sum: List[float] = [0.0] * n_slots
+        self.counts: List[int] = [0] * n_bins
+        self.total = 0
+        self.total_sum = 0.0
+        self.epoch = -1
+        self._summary: Optional[Dict[str, float]] = None
+
+    def _bin(self, seconds: float) -> int:
+        if seconds < self.min_sec:
+            return 0
+        return min(self.n_bins - 1, 1 + int((math.log(seconds) - self.log_min) / self.log_step))
+
+    def _bin_value(self, index: int) -> float:
+        """Representative duration of a bin: the geometric centre of its bounds."""
+        if index == 0:
+            return self.min_sec / 2
+        if index >= self.n_bins - 1:
+            return math.exp(self.log_min + (self.n_bins - 2) * self.log_step)
+        return math.exp(self.log_min + (index - 0.5) * self.log_step)
+
+    def expire(self, now: float) -> None:
+        """Rotate out slots that fell out of the window ending at now."""
+        epoch = int(now // self.slot_sec)
+        if epoch <= self.epoch:
+            return
+        first = max(self.epoch + 1, epoch - self.n_slots + 1)
+        for e in range(first, epoch + 1):
+            i = e % self.n_slots
+            if self.slot_total[i]:
+                self._drop_slot(i)
+        self.epoch = epoch
+
+    def _drop_slot(self, i: int) -> None:
+        counts = self.counts
+        slot = self.slot_counts[i]
+        for b, c in enumerate(slot):
+            if c:
+                counts[b] -= c
+                slot[b] = 0
+        self.total -= self.slot_total[i]
+        self.total_sum -= self.slot_sum[i]
+        self.slot_total[i] = 0
+        self.slot_sum[i] = 0.0
+        if not self.total:
+            self.total_sum = 0.0
+        self._summary = None
+
+    def add(self, seconds: float, now: float) -> None:
+        """Record one finished visit of the given duration, seen at time now."""
+        self.expire(now)
+        seconds = max(0.0, seconds)
+        i = self.epoch % self.n_slots
+        b = self._bin(seconds)
+        self.slot_counts[i][b] += 1
+        self.slot_total[i] += 1
+        self.slot_sum[i] += seconds
+        self.counts[b] += 1
+        self.total += 1
+        self.total_sum += seconds
+        self._summary = None
+
+    def quantile(self, q: float) -> float:
+        if not self.total:
+            return 0.0
+        rank = q * (self.total - 1)
+        seen = 0
+        for b, c in enumerate(self.counts):
+            seen += c
+            if seen > rank:
+                return self._bin_value(b)
+        return self._bin_value(self.n_bins - 1)
+
+    def summary(self) -> Dict[str, float]:
+        """{"visits", "mean_sec", "p50_sec", "p90_sec"} for the window; cached until the next add or rotation."""
+        if self._summary is None:
+            visits = self.total
+            self._summary = {
+                "visits": visits,
+                "mean_sec": max(0.0, self.total_sum) / visits if visits else 0.0,
+                "p50_sec": self.quantile(0.5),
+                "p90_sec": self.quantile(0.9),
+            }
+        return self._summary
+
+    def __len__(self) -> int:
+        return self.total
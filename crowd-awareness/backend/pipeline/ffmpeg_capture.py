@@ -0,0 +1,185 @@
+"""
+ffmpeg pipe capture: decodes and downscales in one ffmpeg subprocess, so 1080p/4K streams never exist
+as full-size BGR frames in python; raw bgr24 frames are read from the pipe straight into caller buffers
+exposes the small part of the cv2.VideoCapture interface the pipeline uses (isOpened, read(image), grab,
+get, release) so VideoSource, the prefetcher and the staged decode process can swap it in unchanged
+the ffmpeg binary is taken from FFMPEG_BINARY (default "ffmpeg" on PATH); stream size comes from ffprobe
+when available, otherwise from a one-frame OpenCV probe
+"""
+import json
+import os
+import shutil
+import subprocess
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+FFMPEG_BINARY = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+FFPROBE_BINARY = os.environ.get("FFPROBE_BINARY", "ffprobe")
+
+
+def ffmpeg_available(binary: Optional[str] = None) -> bool:
+    return shutil.which(binary or FFMPEG_BINARY) is not None
+
+
+def scaled_size(width: int, height: int, decode_width: Optional[int]) -> Tuple[int, int]:
+    """Output size for decode_width, keeping the aspect ratio with an even height; never upscales."""
+    if not decode_width or decode_width >= width:
+        return width, height
+    out_h = max(2, int(round(height * decode_width / width / 2)) * 2)
+    return int(decode_width), out_h
+
+
+def _parse_rate(text: str) -> float:
+    num, _, den = str(text).partition("/")
+    try:
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def probe_stream(source: str, timeout: float = 10.0) -> Optional[Dict[str, Any]]:
+    """{"width", "height", "fps", "frames"} of the first video stream, or None if it cannot be opened."""
+    if shutil.which(FFPROBE_BINARY):
+        cmd = [
+            FFPROBE_BINARY, "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "stream=width,height,avg_frame_rate,r_frame_rate,nb_frames", "-of", "json",
+        ]
+        if source.startswith("rtsp://"):
+            cmd += ["-rtsp_transport", "tcp"]
+        try:
+            out = subprocess.run(cmd + [source], capture_output=True, timeout=timeout, check=True).stdout
+            stream = json.loads(out)["streams"][0]
+            return {
+                "width": int(stream["width"]),
+                "height": int(stream["height"]),
+                "fps": _parse_rate(stream.get("avg_frame_rate")) or _parse_rate(stream.get("r_frame_rate")),
+                "frames": int(stream.get("nb_frames") or 0),
+            }
+        except (subprocess.SubprocessError, OSError, ValueError, KeyError, IndexError):
+            return None
+    cap = cv2.VideoCapture(source)
+    try:
+        if not cap.isOpened():
+            return None
+        width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if not width or not height:
+            ok, frame = cap.read()
+            if not ok:
+                return None
+            height, width = frame.shape[:2]
+        return {
+            "width": width,
+            "height": height,
+            "fps": float(cap.get(cv2.CAP_PROP_FPS) or 0.0),
+            "frames": int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0),
+        }
+    finally:
+        cap.release()
+
+
+def build_command(source: str, size: Tuple[int, int], live: bool, binary: Optional[str] = None) -> List[str]:
+    cmd = [binary or FFMPEG_BINARY, "-nostdin", "-hide_banner", "-loglevel", "error"]
+    if source.startswith("rtsp://"):
+        cmd += ["-rtsp_transport", "tcp"]
+    if live:
+        # hand frames over as soon as they are decoded instead of filling ffmpeg's own buffers
+        cmd += ["-fflags", "nobuffer", "-flags", "low_delay"]
+    cmd += ["-i", source, "-an", "-sn", "-dn"]
+    w, h = size
+    cmd += ["-vf", f"scale={w}:{h}:flags=area", "-pix_fmt", "bgr24", "-f", "rawvideo", "pipe:1"]
+    return cmd
+
+
+class FfmpegCapture:
+    def __init__(self, source: str, decode_width: Optional[int] = None, live: bool = False) -> None:
+        """Starts ffmpeg immediately; check isOpened() and fall back to cv2.VideoCapture when it is False."""
+        self.source = str(source)
+        self.process: Optional[subprocess.Popen] = None
+        self.info: Dict[str, Any] = {}
+        self.size = (0, 0)
+        self.frame_bytes = 0
+        self.frames_read = 0
+        self.scratch: Optional[np.ndarray] = None
+        if not ffmpeg_available():
+            return
+        info = probe_stream(self.source)
+        if info is None:
+            return
+        self.info = info
+        self.size = scaled_size(info["width"], info["height"], decode_width)
+        self.frame_bytes = self.size[0] * self.size[1] * 3
+        try:
+            self.process = subprocess.Popen(
+                build_command(self.source, self.size, live),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=0,
+            )
+        except OSError:
+            self.process = None
+
+    def isOpened(self) -> bool:
+        return self.process is not None and self.process.stdout is not None and not self.process.stdout.closed
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """Fill image (reused when it has the output shape, like cv2's read(image)) with the next frame."""
+        if not self.isOpened():
+            return False, None
+        w, h = self.size
+        if image is None or image.shape != (h, w, 3) or image.dtype != np.uint8 or not image.flags.c_contiguous:
+            image = np.empty((h, w, 3), dtype=np.uint8)
+        view = memoryview(image).cast("B")
+        got = 0
+        stdout = self.process.stdout
+        while got < self.frame_bytes:
+            n = stdout.readinto(view[got:])
+            if not n:
+                # end of file, stream drop or ffmpeg exit: mirror cv2 and let VideoSource restart us
+                return False, None
+            got += n
+        self.frames_read += 1
+        return True, image
+
+    def grab(self) -> bool:
+        ok, self.scratch = self.read(self.scratch)
+        return ok
+
+    def get(self, prop: int) -> float:
+        fps = float(self.info.get("fps") or 0.0)
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.size[0])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.size[1])
+        if prop == cv2.CAP_PROP_FPS:
+            return fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.info.get("frames") or 0)
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.frames_read)
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            # timestamp of the frame just read, as OpenCV reports it
+            return (self.frames_read - 1) * 1000.0 / fps if fps and self.frames_read else 0.0
+        return 0.0
+
+    def interrupt(self) -> None:
+        """End ffmpeg without touching the pipe, so a read blocked in another thread sees end of file."""
+        process = self.process
+        if process is not None and process.poll() is None:
+            process.terminate()
+
+    def release(self) -> None:
+        process, self.process = self.process, None
+        if process is None:
+            return
+        if process.stdout is not None:
+            process.stdout.close()
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
@@ -0,0 +1,128 @@
+"""
+occupancy history: fixed-memory numpy ring buffers holding per-section counts and total inside
+per-second samples (mean of the frames in that second) roll up automatically into 1-minute and
+15-minute min/max/mean rows; range queries are answered by slicing the rings
+memory is allocated once up front, so it stays flat however long the process runs
+"""
+import threading
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+RESOLUTIONS = {"1s": 1, "1m": 60, "15m": 900}
+TOTAL_SERIES = "total"
+
+
+class _Ring:
+    """Ring of `capacity` buckets of `width` floats per series, keyed by absolute bucket number."""
+
+    def __init__(self, capacity: int, n_series: int, width: int) -> None:
+        self.capacity = capacity
+        self.values = np.full((capacity, n_series, width), np.nan, dtype=np.float32)
+        self.bucket = np.full(capacity, -1, dtype=np.int64)
+        self.latest = -1
+
+    def write(self, bucket: int, row: np.ndarray) -> None:
+        slot = bucket % self.capacity
+        self.values[slot] = row
+        self.bucket[slot] = bucket
+        self.latest = max(self.latest, bucket)
+
+    def rows(self, first: int, last: int):
+        """Buckets in [first, last] still held by the ring, plus their rows."""
+        first = max(first, self.latest - self.capacity + 1, 0)
+        last = min(last, self.latest)
+        if last < first:
+            return np.empty(0, dtype=np.int64), self.values[:0]
+        wanted = np.arange(first, last + 1, dtype=np.int64)
+        slots = wanted % self.capacity
+        valid = self.bucket[slots] == wanted
+        return wanted[valid], self.values[slots[valid]]
+
+
+class OccupancyHistory:
+    def __init__(
+        self,
+        series_names: Sequence[str],
+        seconds_capacity: int = 6 * 3600,
+        minutes_capacity: int = 7 * 24 * 60,
+        quarters_capacity: int = 365 * 96,
+    ) -> None:
+        self.series_names: List[str] = list(series_names)
+        self.series_index = {name: i for i, name in enumerate(self.series_names)}
+        n = len(self.series_names)
+        self.seconds = _Ring(seconds_capacity, n, 1)
+        self.minutes = _Ring(minutes_capacity, n, 3)
+        self.quarters = _Ring(quarters_capacity, n, 3)
+        self.lock = threading.Lock()
+
+        self.current_second = -1
+        self.acc_sum = np.zeros(n, dtype=np.float64)
+        self.acc_count = 0
+
+    def nbytes(self) -> int:
+        return sum(r.values.nbytes + r.bucket.nbytes for r in (self.seconds, self.minutes, self.quarters))
+
+    def record(self, now: float, counts: Sequence[float]) -> None:
+        """Add one frame's counts (ordered like series_names)."""
+        second = int(now)
+        with self.lock:
+            if second != self.current_second:
+                if self.acc_count:
+                    self._flush(second)
+                self.current_second = second
+                self.acc_sum[:] = 0.0
+                self.acc_count = 0
+            self.acc_sum += counts
+            self.acc_count += 1
+
+    def _flush(self, next_second: int) -> None:
+        prev = self.current_second
+        mean = (self.acc_sum / self.acc_count).astype(np.float32)
+        self.seconds.write(prev, mean[:, None])
+        if next_second // 60 != prev // 60:
+            self._rollup(self.seconds, self.minutes, prev // 60, 60, from_raw=True)
+            if next_second // 900 != prev // 900:
+                self._rollup(self.minutes, self.quarters, prev // 900, 15, from_raw=False)
+
+    @staticmethod
+    def _rollup(src: _Ring, dst: _Ring, bucket: int, factor: int, from_raw: bool) -> None:
+        _, rows = src.rows(bucket * factor, bucket * factor + factor - 1)
+        if len(rows) == 0:
+            return
+        if from_raw:
+            lo = hi = avg = rows[:, :, 0]
+        else:
+            lo, hi, avg = rows[:, :, 0], rows[:, :, 1], rows[:, :, 2]
+        with np.errstate(all="ignore"):
+            out = np.stack([np.nanmin(lo, axis=0), np.nanmax(hi, axis=0), np.nanmean(avg, axis=0)], axis=-1)
+        dst.write(bucket, out)
+
+    def query(self, series: str, start: float, end: float, resolution: str = "1m") -> Dict[str, Any]:
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"unknown resolution: {resolution}")
+        if series not in self.series_index:
+            raise KeyError(series)
+        step = RESOLUTIONS[resolution]
+        ring = {"1s": self.seconds, "1m": self.minutes, "15m": self.quarters}[resolution]
+        col = self.series_index[series]
+        with self.lock:
+            buckets, rows = ring.rows(int(start) // step, int(end) // step)
+            rows = rows[:, col, :].copy()
+        result: Dict[str, Any] = {
+            "series": series,
+            "resolution": resolution,
+            "ts": (buckets * step).tolist(),
+        }
+        if resolution == "1s":
+            result["values"] = np.round(rows[:, 0], 2).tolist()
+        else:
+            result["min"] = np.round(rows[:, 0], 2).tolist()
+            result["max"] = np.round(rows[:, 1], 2).tolist()
+            result["mean"] = np.round(rows[:, 2], 2).tolist()
+        return result
+
+
+def make_history(section_names: Sequence[str], **kwargs: Any) -> OccupancyHistory:
+    """History with one series per section plus the building total."""
+    return OccupancyHistory(list(section_names) + [TOTAL_SERIES], **kwargs)
@@ -0,0 +1,253 @@
+"""
+durable event journal: entry/exit crossings and alerts appended to a local SQLite database (WAL mode)
+the pipeline only enqueues events; a background writer commits them in batches, so frames never wait on disk
+every batch also bumps per-camera counters and hourly/daily rollup rows in the same transaction,
+which makes startup reloads a single-row read and month-long reports a scan of ~30 daily rows
+the pending queue is bounded: when the writer falls behind (locked or full disk) the oldest events are
+dropped and counted; a failing batch is rolled back, logged and retried with backoff before it is given up
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+GRANULARITIES = {"hour": 3600, "day": 86400}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    camera TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT
+);
+CREATE INDEX IF NOT EXISTS events_camera_kind_ts ON events (camera, kind, ts);
+CREATE TABLE IF NOT EXISTS counters (
+    camera TEXT PRIMARY KEY,
+    total_entries INTEGER NOT NULL DEFAULT 0,
+    total_exits INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS rollup_hour (
+    camera TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    entries INTEGER NOT NULL DEFAULT 0,
+    exits INTEGER NOT NULL DEFAULT 0,
+    alerts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (camera, bucket)
+);
+CREATE TABLE IF NOT EXISTS rollup_day (
+    camera TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    entries INTEGER NOT NULL DEFAULT 0,
+    exits INTEGER NOT NULL DEFAULT 0,
+    alerts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (camera, bucket)
+);
+"""
+
+# (ts, camera, kind, payload json or None)
+Event = Tuple[float, str, str, Optional[str]]
+
+logger = logging.getLogger(__name__)
+
+
+class EventJournal:
+    def __init__(
+        self,
+        path: Union[str, Path],
+        batch_size: int = 500,
+        flush_interval_sec: float = 1.0,
+        max_pending: int = 100_000,
+        max_retries: int = 4,
+        retry_delay_sec: float = 0.5,
+    ) -> None:
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval_sec = flush_interval_sec
+        self.max_pending = max(1, max_pending)
+        self.max_retries = max_retries
+        self.retry_delay_sec = retry_delay_sec
+        self.cond = threading.Condition()
+        self.pending: Deque[Event] = deque()
+        self.closing = False
+        # enqueued counts every event ever accepted; done counts those written, dropped or failed
+        self.enqueued = 0
+        self.done = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        # the writer owns this connection; readers open their own (WAL lets them run alongside it)
+        self.conn = self._connect(check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self.writer = threading.Thread(target=self._run, daemon=True)
+        self.writer.start()
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL only fsyncs at checkpoints: a power cut can lose the last batch, never corrupt the file
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ---- producer side (pipeline threads) ----
+
+    def _put(self, event: Event) -> None:
+        with self.cond:
+            if len(self.pending) >= self.max_pending:
+                self.pending.popleft()
+                self.dropped += 1
+                self.done += 1
+            self.pending.append(event)
+            self.enqueued += 1
+            self.cond.notify_all()
+
+    def record_crossing(self, camera: str, kind: str, ts: float) -> None:
+        """kind is "entry" or "exit"."""
+        self._put((ts, camera, kind, None))
+
+    def record_alert(self, camera: str, alert: Dict[str, Any]) -> None:
+        self._put((alert["ts"], camera, "alert", json.dumps(alert, ensure_ascii=False)))
+
+    # ---- writer ----
+
+    def _run(self) -> None:
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.pending or self.closing, self.flush_interval_sec)
+                if not self.pending:
+                    if self.closing:
+                        break
+                    continue
+                batch = [self.pending.popleft() for _ in range(min(self.batch_size, len(self.pending)))]
+            self._commit(batch)
+            with self.cond:
+                self.done += len(batch)
+                self.cond.notify_all()
+        self.conn.close()
+
+    def _commit(self, batch: List[Event]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._write(batch)
+                return
+            except Exception:
+                try:
+                    self.conn.rollback()
+                except sqlite3.Error:
+                    pass
+                logger.exception("journal batch of %d events failed (attempt %d)", len(batch), attempt + 1)
+            if attempt < self.max_retries and not self.closing:
+                time.sleep(self.retry_delay_sec * 2 ** attempt)
+            else:
+                break
+        self.failed += len(batch)
+        logger.error("journal gave up on %d events", len(batch))
+
+    def _write(self, batch: List[Event]) -> None:
+        counters: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        rollups: Dict[Tuple[str, str, int], List[int]] = defaultdict(lambda: [0, 0, 0])
+        column = {"entry": 0, "exit": 1, "alert": 2}
+        for ts, camera, kind, _ in batch:
+            col = column[kind]
+            if col < 2:
+                counters[camera][col] += 1
+            for table, step in GRANULARITIES.items():
+                rollups[(table, camera, int(ts) // step * step)][col] += 1
+
+        with self.conn:
+            self.conn.executemany("INSERT INTO events (ts, camera, kind, payload) VALUES (?, ?, ?, ?)", batch)
+            self.conn.executemany(
+                "INSERT INTO counters (camera, total_entries, total_exits) VALUES (?, ?, ?) "
+                "ON CONFLICT(camera) DO UPDATE SET "
+                "total_entries = total_entries + excluded.total_entries, "
+                "total_exits = total_exits + excluded.total_exits",
+                [(camera, n[0], n[1]) for camera, n in counters.items()],
+            )
+            for table in GRANULARITIES:
+                self.conn.executemany(
+                    f"INSERT INTO rollup_{table} (camera, bucket, entries, exits, alerts) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(camera, bucket) DO UPDATE SET "
+                    "entries = entries + excluded.entries, "
+                    "exits = exits + excluded.exits, "
+                    "alerts = alerts + excluded.alerts",
+                    [(camera, bucket, *n) for (t, camera, bucket), n in rollups.items() if t == table],
+                )
+        self.written += len(batch)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything enqueued so far is handled (shutdown and tests); see stats() for losses."""
+        with self.cond:
+            target = self.enqueued
+            return self.cond.wait_for(lambda: self.done >= target, timeout)
+
+    def close(self) -> None:
+        with self.cond:
+            self.closing = True
+            self.cond.notify_all()
+        self.writer.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self.pending),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "writer_alive": self.writer.is_alive(),
+        }
+
+    # ---- readers ----
+
+    def load_counters(self, camera: str) -> Tuple[int, int]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT total_entries, total_exits FROM counters WHERE camera = ?", (camera,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return (row[0], row[1]) if row else (0, 0)
+
+    def recent_alerts(self, camera: str, limit: int = 3) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT payload FROM events WHERE camera = ? AND kind = 'alert' ORDER BY ts DESC LIMIT ?",
+                (camera, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [json.loads(r[0]) for r in reversed(rows)]
+
+    def report(
+        self, start: float, end: float, granularity: str = "hour", camera: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Entry/exit/alert totals per bucket from the rollup tables, summed over cameras unless one is given."""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"unknown granularity: {granularity}")
+        step = GRANULARITIES[granularity]
+        where = "bucket >= ? AND bucket <= ?"
+        params: List[Any] = [int(start) // step * step, int(end)]
+        if camera is not None:
+            where += " AND camera = ?"
+            params.append(camera)
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT bucket, SUM(entries), SUM(exits), SUM(alerts) FROM rollup_{granularity} "
+                f"WHERE {where} GROUP BY bucket ORDER BY bucket",
+                params,
+            ).fetchall()
+        finally:
+            conn.close()
+        return {
+            "granularity": granularity,
+            "camera": camera,
+            "buckets": [{"ts": b, "entries": e, "exits": x, "alerts": a} for b, e, x, a in rows],
+        }
@@ -0,0 +1,82 @@
+"""
+push-based live updates: a single hub task watches the pipeline state version, builds the
+combined dashboard payload once per change and wakes every subscriber
+each subscriber sends only the top-level keys that changed since its own last message and is
+rate-limited on its own, so intermediate versions coalesce and a slow client never holds up
+the pipeline thread or the other clients
+an error while reading the state is logged and the watcher keeps polling, so subscribers stay attached
+"""
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from anyio import to_thread
+
+logger = logging.getLogger(__name__)
+
+
+class LiveUpdateHub:
+    def __init__(
+        self,
+        get_version: Callable[[], int],
+        get_payload: Callable[[], Dict[str, Any]],
+        poll_interval: float = 0.1,
+        heartbeat_sec: float = 15.0,
+    ) -> None:
+        self.get_version = get_version
+        self.get_payload = get_payload
+        self.poll_interval = poll_interval
+        self.heartbeat_sec = heartbeat_sec
+        self.version = -1
+        self.payload: Dict[str, Any] = {}
+        self.subscribers = 0
+        self.cond: Optional[asyncio.Condition] = None
+        self.task: Optional[asyncio.Task] = None
+        self.errors = 0
+
+    async def _watch(self) -> None:
+        try:
+            while self.subscribers > 0:
+                try:
+                    version = self.get_version()
+                    if version != self.version:
+                        payload = await to_thread.run_sync(self.get_payload)
+                        self.version, self.payload = version, payload
+                        async with self.cond:
+                            self.cond.notify_all()
+                except Exception:
+                    self.errors += 1
+                    logger.exception("live update payload failed")
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            self.task = None
+
+    async def subscribe(self, min_interval: float = 0.25) -> AsyncIterator[str]:
+        """Server-Sent Events stream of {"version": n, <changed keys>...} messages."""
+        if self.cond is None:
+            self.cond = asyncio.Condition()
+        self.subscribers += 1
+        if self.task is None:
+            self.task = asyncio.create_task(self._watch())
+        seen = -1
+        sent: Dict[str, Any] = {}
+        try:
+            while True:
+                try:
+                    async with self.cond:
+                        await asyncio.wait_for(
+                            self.cond.wait_for(lambda: self.version != seen), self.heartbeat_sec
+                        )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                seen, payload = self.version, self.payload
+                delta = {k: v for k, v in payload.items() if sent.get(k) != v}
+                if delta:
+                    sent.update(delta)
+                    yield f"event: update\ndata: {json.dumps({'version': seen, **delta}, ensure_ascii=False)}\n\n"
+                # per-client rate limit; versions published meanwhile collapse into the next message
+                await asyncio.sleep(min_interval)
+        finally:
+            self.subscribers -= 1
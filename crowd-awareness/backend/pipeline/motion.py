@@ -0,0 +1,102 @@
+"""
+motion gate: decides whether a frame is worth running the detector on
+the frame is shrunk to a small grayscale thumbnail and diffed against the thumbnail of the last frame that was
+actually detected, so slow drift still accumulates into motion; the changed-pixel fraction is scored per zone
+(using the ZoneManager label map at thumbnail size) and for the whole frame
+static frames reuse the previous detections; a forced refresh every refresh_sec keeps counts from going stale
+"""
+import time
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    def __init__(
+        self,
+        scale: float = 0.125,
+        pixel_threshold: int = 15,
+        zone_threshold: float = 0.01,
+        frame_threshold: float = 0.005,
+        refresh_sec: float = 2.0,
+    ) -> None:
+        """
+        scale: thumbnail size relative to the frame (0.125 turns 1280x720 into 160x90)
+        pixel_threshold: grey-level difference that marks a thumbnail pixel as changed
+        zone_threshold / frame_threshold: changed fraction of any one zone / of the whole frame that counts as motion
+        refresh_sec: detect at least this often even if nothing moved
+        """
+        self.scale = scale
+        self.pixel_threshold = pixel_threshold
+        self.zone_threshold = zone_threshold
+        self.frame_threshold = frame_threshold
+        self.refresh_sec = refresh_sec
+
+        self.reference: Optional[np.ndarray] = None
+        self.reference_ts = 0.0
+        self.labels: Optional[np.ndarray] = None
+        self.zone_pixels: Optional[np.ndarray] = None
+        self.last_score = 0.0
+        self.last_zone_score = 0.0
+
+        self.frames = 0
+        self.skipped = 0
+        self.forced = 0
+
+    def set_zones(self, label_map: Optional[np.ndarray]) -> None:
+        """Use a ZoneManager label map (frame-sized) for per-zone scores; None scores the whole frame only."""
+        self.labels = None
+        self.zone_pixels = None
+        self.reference = None
+        if label_map is None:
+            return
+        h, w = label_map.shape
+        size = (max(1, int(w * self.scale)), max(1, int(h * self.scale)))
+        self.labels = cv2.resize(label_map, size, interpolation=cv2.INTER_NEAREST)
+        self.zone_pixels = np.maximum(np.bincount(self.labels.ravel()), 1)
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        h, w = frame.shape[:2]
+        size = (max(1, int(w * self.scale)), max(1, int(h * self.scale)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+    def should_detect(self, frame: np.ndarray, now: Optional[float] = None) -> bool:
+        """True when the frame moved enough (or the refresh interval ran out); the frame then becomes the reference."""
+        now = time.monotonic() if now is None else now
+        self.frames += 1
+        thumb = self._thumbnail(frame)
+        if self.reference is None or self.reference.shape != thumb.shape:
+            return self._accept(thumb, now)
+
+        changed = cv2.absdiff(thumb, self.reference) > self.pixel_threshold
+        self.last_score = float(changed.mean())
+        self.last_zone_score = 0.0
+        if self.labels is not None and self.labels.shape == changed.shape:
+            per_zone = np.bincount(self.labels[changed], minlength=len(self.zone_pixels)) / self.zone_pixels
+            # label 0 is "no zone"; it still counts through the whole-frame score
+            self.last_zone_score = float(per_zone[1:].max()) if len(per_zone) > 1 else 0.0
+
+        if self.last_score >= self.frame_threshold or self.last_zone_score >= self.zone_threshold:
+            return self._accept(thumb, now)
+        if now - self.reference_ts >= self.refresh_sec:
+            self.forced += 1
+            return self._accept(thumb, now)
+        self.skipped += 1
+        return False
+
+    def _accept(self, thumb: np.ndarray, now: float) -> bool:
+        self.reference = thumb
+        self.reference_ts = now
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "forced_refresh": self.forced,
+            "skip_ratio": round(self.skipped / self.frames, 3) if self.frames else 0.0,
+            "last_score": round(self.last_score, 4),
+            "last_zone_score": round(self.last_zone_score, 4),
+        }
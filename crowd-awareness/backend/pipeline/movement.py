@@ -1,60 +1,73 @@
 """
 movement analyzer: entrance/exit logic and section counting
 preserves original behavior and thresholds
+centroids are mapped to zones through the ZoneManager label map in one vectorized lookup
+per-track state lives in the StateStore's TrackTable, which forgets tracks unseen for its TTL
+and reports every finished zone visit to the section's dwell sketch
 """
-from typing import Any, Dict, Optional
+from typing import Optional
+
+import numpy as np
 import supervision as sv
 
+from .zones import NO_ZONE, ZoneManager
+
 
 class MovementAnalyzer:
-    def __init__(self, state_store, zones: Dict[str, Any]) -> None:
+    def __init__(self, state_store, zone_manager: Optional[ZoneManager] = None) -> None:
         self.state = state_store
-        self.zones = zones
+        self.zone_manager = zone_manager if zone_manager is not None else ZoneManager()
 
-    def reset_for_new_zones(self, zones: Dict[str, Any]) -> None:
-        self.zones = zones
-        self.state.track_last_zone = {}
+    @property
+    def zones(self):
+        return self.zone_manager.zones
+
+    def reset_for_new_zones(self, zone_manager: ZoneManager) -> None:
+        self.zone_manager = zone_manager
+        self.state.tracks.clear()
 
     def update_section_stats(self, detections: sv.Detections, now: float) -> None:
         sections_state = self.state.sections
-        track_last_zone = self.state.track_last_zone
+        tracks = self.state.tracks
+        zone_names = self.zone_manager.zone_names
 
         for s in sections_state.values():
             s["current_count"] = 0
 
         if detections is None or detections.xyxy is None or detections.tracker_id is None:
+            tracks.evict(now)
             return
 
-        for i, box in enumerate(detections.xyxy):
-            x1, y1, x2, y2 = box
-            cx = int((x1 + x2) / 2)
-            cy = int((y1 + y2) / 2)
-            tid = int(detections.tracker_id[i])
-            point = (cx, cy)
+        xyxy = detections.xyxy
+        # int() truncation of the box centre, same as the original per-box code
+        cx = ((xyxy[:, 0] + xyxy[:, 2]) / 2).astype(np.int64)
+        cy = ((xyxy[:, 1] + xyxy[:, 3]) / 2).astype(np.int64)
+        labels = self.zone_manager.lookup(cx, cy)
+
+        counts = np.bincount(labels, minlength=len(zone_names) + 1)
+        for index, section_name in enumerate(zone_names):
+            s = sections_state.get(section_name)
+            if s is None:
+                continue
+            s["current_count"] = int(counts[index + 1])
+            if s["current_count"] > s.get("peak", 0):
+                s["peak"] = s["current_count"]
 
+        for tid, label, x, y in zip(detections.tracker_id.tolist(), labels.tolist(), cx.tolist(), cy.tolist()):
             current_zone: Optional[str] = None
-            for section_name, zone in self.zones.items():
-                polygon = zone.polygon.astype(np.int32)
-                if sv.geometry.point_in_polygon(point, polygon):
-                    current_zone = section_name
-                    s = sections_state[section_name]
-                    s["current_count"] += 1
-                    if s["current_count"] > s.get("peak", 0):
-                        s["peak"] = s["current_count"]
-                    if tid not in [t for _, t in s.get("enter_events", [])]:
-                        s["enter_events"].append((now, tid))
-
-            prev_zone = track_last_zone.get(tid)
+            if label != NO_ZONE:
+                current_zone = zone_names[label - 1]
+                sections_state[current_zone]["enter_events"].add(tid, now)
+
+            prev_zone = tracks.update(tid, current_zone, now, x, y)
             if prev_zone != current_zone:
                 if current_zone == "Entrance":
-                    self.state.increment_entry()
+                    self.state.increment_entry(now)
                 if current_zone == "Exit":
-                    self.state.increment_exit()
-
-            track_last_zone[tid] = current_zone
-
-        SECTION_WAIT_WINDOW_SEC = 5 * 60
-        for section_name, s in sections_state.items():
-            recent = [(ts, tid) for (ts, tid) in s["enter_events"] if now - ts <= SECTION_WAIT_WINDOW_SEC]
-            s["enter_events"] = recent
+                    self.state.increment_exit(now)
 
+        tracks.evict(now)
+        for s in sections_state.values():
+            s["enter_events"].expire(now)
+            if "dwell" in s:
+                s["dwell"].expire(now)
@@ -0,0 +1,211 @@
+"""
+multi-camera controller: one PipelineController per source, all sharing a single loaded detector
+inference is funneled through an InferenceBatcher so cameras are batched and served round-robin
+each camera keeps its own StateStore and zone set; getters aggregate them building-wide
+mode="process" runs every camera as a ProcessPipelineController instead (one model per camera)
+"""
+import functools
+from typing import Any, Dict, List, Optional
+
+from .backends import create_detector
+from .batching import InferenceBatcher
+from .controller import PipelineController
+from .journal import EventJournal
+from .metrics import render_prometheus
+from .staged import ProcessPipelineController, default_detector_factory
+from .stats import STABLE_ACTION, SectionStatus, SectionSummary, SuggestedActions
+from .track_table import TRACK_TTL_SEC
+
+
+class MultiCameraController:
+    def __init__(
+        self,
+        sources: List[Dict[str, Any]],
+        detector=None,
+        mode: str = "thread",
+        detector_factory=None,
+        journal: Optional[EventJournal] = None,
+        backend: str = "torch",
+        motion_gate: bool = False,
+    ) -> None:
+        """
+        sources: list of {"id": str, "source": path/index/url, plus optional "prefetch",
+                 "target_fps", "max_skip" and "adapt_imgsz" scheduler settings, "motion_gate"
+                 (true/false or a dict of MotionGate thresholds; defaults to motion_gate) and "roi"
+                 (true/false or a dict of RoiDetector settings such as {"tiled": true, "tile_size": 640}; off by default),
+                 "decoder" ("opencv" or "ffmpeg"), "decode_width" (downscale while decoding, aspect kept) and
+                 "headless" (count only; draw frames just while a snapshot or stream viewer is connected) and
+                 "track_ttl_sec" (forget per-track state after this long unseen)}
+        detector: shared detector exposing detect_people_batch; defaults to create_detector(backend)
+        detector_factory: process mode only, builds each camera's detector; defaults to create_detector(backend)
+        mode: "thread" (shared detector, one thread per camera) or "process" (staged processes per camera)
+        journal: optional EventJournal shared by every camera; counters and recent alerts are reloaded from it
+        backend: detector runtime for the defaults above, see pipeline.backends ("torch", "onnx", "onnx-int8")
+        motion_gate: gate detection on motion for cameras that do not set it; off by default, since a
+                     static frame reuses the previous detections
+        """
+        if not sources:
+            raise ValueError("at least one camera source is required")
+        if mode not in ("thread", "process"):
+            raise ValueError(f"unknown pipeline mode: {mode}")
+        self.mode = mode
+        self.detector = None
+        self.batcher: Optional[InferenceBatcher] = None
+        if mode == "thread":
+            if detector is None:
+                detector = create_detector(backend)
+            self.detector = detector
+            self.batcher = InferenceBatcher(detector)
+
+        if detector_factory is None:
+            detector_factory = functools.partial(default_detector_factory, backend)
+        self.journal = journal
+        self.cameras: Dict[str, Any] = {}
+        for i, cfg in enumerate(sources):
+            camera_id = str(cfg.get("id", f"cam{i + 1}"))
+            if camera_id in self.cameras:
+                raise ValueError(f"duplicate camera id: {camera_id}")
+            if self.batcher is not None:
+                self.cameras[camera_id] = PipelineController(
+                    cfg["source"],
+                    prefetch=cfg.get("prefetch", True),
+                    detector=self.batcher.client(camera_id),
+                    camera_id=camera_id,
+                    target_fps=cfg.get("target_fps", 10.0),
+                    max_skip=cfg.get("max_skip", 5),
+                    adapt_imgsz=cfg.get("adapt_imgsz", False),
+                    journal=journal,
+                    motion_gate=cfg.get("motion_gate", motion_gate),
+                    roi=cfg.get("roi", False),
+                    decoder=cfg.get("decoder", "opencv"),
+                    decode_width=cfg.get("decode_width"),
+                    headless=cfg.get("headless", False),
+                    track_ttl_sec=cfg.get("track_ttl_sec", TRACK_TTL_SEC),
+                )
+            else:
+                self.cameras[camera_id] = ProcessPipelineController(
+                    cfg["source"],
+                    camera_id=camera_id,
+                    detector_factory=detector_factory,
+                    journal=journal,
+                    motion_gate=cfg.get("motion_gate", motion_gate),
+                    roi=cfg.get("roi", False),
+                    decoder=cfg.get("decoder", "opencv"),
+                    decode_width=cfg.get("decode_width"),
+                    headless=cfg.get("headless", False),
+                    track_ttl_sec=cfg.get("track_ttl_sec", TRACK_TTL_SEC),
+                )
+
+    def start(self) -> None:
+        if self.batcher is not None:
+            self.batcher.start()
+        for camera in self.cameras.values():
+            camera.start()
+
+    def camera(self, camera_id: str):
+        return self.cameras.get(camera_id)
+
+    def camera_ids(self) -> List[str]:
+        return list(self.cameras.keys())
+
+    def _multi(self) -> bool:
+        return len(self.cameras) > 1
+
+    def _label(self, camera_id: str, text: str) -> str:
+        # single-camera deployments keep the original names untouched
+        return f"{camera_id} / {text}" if self._multi() else text
+
+    def get_building_status(self):
+        statuses = [c.get_building_status() for c in self.cameras.values()]
+        return {
+            "total_entries": sum(s["total_entries"] for s in statuses),
+            "total_exits": sum(s["total_exits"] for s in statuses),
+            "current_inside": sum(s["current_inside"] for s in statuses),
+            "last_update_ts": max(s["last_update_ts"] for s in statuses),
+        }
+
+    def get_alerts(self):
+        alerts: List[Dict[str, Any]] = []
+        for camera_id, camera in self.cameras.items():
+            for a in camera.get_alerts():
+                alerts.append({**a, "message": self._label(camera_id, a["message"])})
+        alerts.sort(key=lambda a: a["ts"])
+        return alerts
+
+    def _snapshot_camera(self, camera_id: Optional[str]):
+        return self.cameras.get(camera_id) if camera_id else next(iter(self.cameras.values()))
+
+    def get_snapshot(self, camera_id: Optional[str] = None):
+        camera = self._snapshot_camera(camera_id)
+        if camera is None:
+            return {"image": None}
+        return camera.get_snapshot()
+
+    def get_snapshot_jpeg(self, camera_id: Optional[str] = None, scale: float = 1.0):
+        camera = self._snapshot_camera(camera_id)
+        if camera is None:
+            return -1, None
+        return camera.get_snapshot_jpeg(scale)
+
+    def get_sections(self) -> SectionSummary:
+        sections: List[SectionStatus] = []
+        busiest = None
+        busiest_count = -1
+        for camera_id, camera in self.cameras.items():
+            for s in camera.get_sections().sections:
+                sections.append(s.model_copy(update={"name": self._label(camera_id, s.name)}))
+        for s in sections:
+            if s.current_count > busiest_count:
+                busiest_count = s.current_count
+                busiest = s.name
+        return SectionSummary(busiest_section=busiest, sections=sections)
+
+    def get_suggested_actions(self) -> SuggestedActions:
+        actions: List[str] = []
+        for camera_id, camera in self.cameras.items():
+            for a in camera.get_suggested_actions().actions:
+                if a != STABLE_ACTION:
+                    actions.append(self._label(camera_id, a))
+        return SuggestedActions(actions=actions or [STABLE_ACTION])
+
+    def get_history(self, series: str, start: float, end: float, resolution: str = "1m", camera_id=None):
+        camera = self._snapshot_camera(camera_id)
+        if camera is None:
+            return {"series": series, "resolution": resolution, "ts": []}
+        return camera.get_history(series, start, end, resolution)
+
+    def get_report(self, start: float, end: float, granularity: str = "hour", camera_id=None):
+        if self.journal is None:
+            return None
+        return self.journal.report(start, end, granularity, camera_id)
+
+    def get_metrics_text(self) -> str:
+        return render_prometheus({camera_id: c.get_metrics() for camera_id, c in self.cameras.items()})
+
+    def get_state_version(self) -> int:
+        # per-camera versions only grow, so their sum changes whenever any camera does
+        return sum(c.get_state_version() for c in self.cameras.values())
+
+    def get_live_payload(self):
+        return {
+            "building_status": self.get_building_status(),
+            "alerts": self.get_alerts(),
+            "sections": self.get_sections().model_dump(),
+            "suggested_actions": self.get_suggested_actions().model_dump(),
+        }
+
+    def get_processing_status(self):
+        cameras = {cid: c.get_processing_status() for cid, c in self.cameras.items()}
+        status = {
+            "is_processing": any(c["is_processing"] for c in cameras.values()),
+            "mode": self.mode,
+            "cameras": cameras,
+        }
+        if self.batcher is not None:
+            status["inference"] = self.batcher.stats()
+        if self.journal is not None:
+            status["journal"] = self.journal.stats()
+        return status
+
+    def is_running(self) -> bool:
+        return any(c.is_running() for c in self.cameras.values())
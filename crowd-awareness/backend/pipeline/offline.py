@@ -0,0 +1,358 @@
+"""
+offline analysis of recorded footage: no server, no annotation, no looping, as fast as the CPU allows
+the file is cut into frame segments handled by a process pool; each worker first replays `overlap` frames
+before its segment (uncounted) so tracker and zone state are warm at the boundary, then counts its own frames
+segments are stitched by matching track boxes on the shared boundary frame, giving one global id space;
+a segment that stopped early (unreadable frames) leaves a gap, and ids are never carried across a gap
+seeks are checked against the position the decoder reports, since some containers land on a nearby keyframe
+timestamps are the decoder's PTS (CAP_PROP_POS_MSEC), so results line up with the footage, not with wall clock
+
+usage (from crowd-awareness/backend):
+    python -m pipeline.offline recording.mp4 --out results/day1 --workers 4 --format parquet
+writes <out>.frames.<fmt> (per frame), <out>.seconds.<fmt> (per PTS second) and <out>.tracks.<fmt>
+"""
+import argparse
+import functools
+import json
+import multiprocessing as mp
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .backends import BACKENDS
+from .movement import MovementAnalyzer
+from .state_store import StateStore
+from .tracker import PersonTracker
+from .zones import ZoneManager
+
+FORMATS = ("npz", "parquet", "csv")
+
+
+@dataclass
+class SegmentResult:
+    start: int
+    zone_names: List[str]
+    frame: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    pts: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    inside: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    zone_counts: np.ndarray = field(default_factory=lambda: np.empty((0, 0), dtype=np.int32))
+    entries: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    exits: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    # one row per (frame, track): frame index, local track id, zone label
+    track_rows: np.ndarray = field(default_factory=lambda: np.empty((0, 3), dtype=np.int64))
+    # (ids, xyxy) on the frame before `start` (from warm-up) and on the last counted frame
+    boundary_in: Tuple[np.ndarray, np.ndarray] = (np.empty(0, dtype=np.int64), np.empty((0, 4)))
+    boundary_out: Tuple[np.ndarray, np.ndarray] = (np.empty(0, dtype=np.int64), np.empty((0, 4)))
+
+
+def probe(path: str) -> Tuple[int, float]:
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise RuntimeError(f"cannot open {path}")
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+    finally:
+        cap.release()
+
+
+def plan_segments(n_frames: int, segment_frames: int) -> List[Tuple[int, int]]:
+    segment_frames = max(1, segment_frames)
+    return [(s, min(n_frames, s + segment_frames)) for s in range(0, n_frames, segment_frames)]
+
+
+def _ids_and_boxes(tracked) -> Tuple[np.ndarray, np.ndarray]:
+    if tracked.tracker_id is None or len(tracked) == 0:
+        return np.empty(0, dtype=np.int64), np.empty((0, 4))
+    return tracked.tracker_id.astype(np.int64), tracked.xyxy.astype(np.float64)
+
+
+def _seek(cap, target: int, limit: int) -> int:
+    """Position cap at or before `limit`, as close to `target` as it lands; returns the actual frame index."""
+    if not target:
+        return 0
+    cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+    position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    if 0 <= position <= limit:
+        # an early landing only lengthens the warm-up
+        return position
+    # landed past the first counted frame: decode forward from the start instead of skipping frames
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    position = 0
+    while position < target and cap.grab():
+        position += 1
+    return position
+
+
+def analyze_segment(path: str, start: int, end: int, overlap: int, detector_factory: Callable[[], Any]) -> SegmentResult:
+    """Count frames [start, end); frames [start - overlap, start) only warm up tracker and zone state."""
+    detector = detector_factory()
+    cap = cv2.VideoCapture(path)
+    warm_from = _seek(cap, max(0, start - overlap), start)
+
+    state = StateStore()
+    tracker = PersonTracker()
+    zone_manager: Optional[ZoneManager] = None
+    movement: Optional[MovementAnalyzer] = None
+
+    frames: List[int] = []
+    pts: List[float] = []
+    inside: List[int] = []
+    zone_counts: List[List[int]] = []
+    entries: List[int] = []
+    exits: List[int] = []
+    track_rows: List[np.ndarray] = []
+    result = SegmentResult(start=start, zone_names=[])
+    tracked = None
+    try:
+        for index in range(warm_from, end):
+            ok, frame = cap.read()
+            if not ok or frame is None:
+                break
+            if zone_manager is None:
+                h, w = frame.shape[:2]
+                zone_manager = ZoneManager()
+                zones = zone_manager.init_zones(w, h)
+                state.init_sections(zones.keys())
+                movement = MovementAnalyzer(state, zone_manager)
+                movement.reset_for_new_zones(zone_manager)
+                result.zone_names = list(zone_manager.zone_names)
+
+            ts = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            entries_before, exits_before = state.total_entries, state.total_exits
+            tracked = tracker.track(detector.detect_people(frame))
+            movement.update_section_stats(tracked, ts)
+
+            if index < start:
+                if index == start - 1:
+                    result.boundary_in = _ids_and_boxes(tracked)
+                continue
+
+            frames.append(index)
+            pts.append(ts)
+            inside.append(len(tracked))
+            zone_counts.append([state.sections[name]["current_count"] for name in result.zone_names])
+            entries.append(state.total_entries - entries_before)
+            exits.append(state.total_exits - exits_before)
+            ids, boxes = _ids_and_boxes(tracked)
+            if len(ids):
+                cx = ((boxes[:, 0] + boxes[:, 2]) / 2).astype(np.int64)
+                cy = ((boxes[:, 1] + boxes[:, 3]) / 2).astype(np.int64)
+                labels = zone_manager.lookup(cx, cy).astype(np.int64)
+                track_rows.append(np.stack([np.full(len(ids), index), ids, labels], axis=1))
+    finally:
+        cap.release()
+
+    if frames:
+        result.boundary_out = _ids_and_boxes(tracked)
+        result.frame = np.asarray(frames, dtype=np.int64)
+        result.pts = np.asarray(pts, dtype=np.float64)
+        result.inside = np.asarray(inside, dtype=np.int32)
+        result.zone_counts = np.asarray(zone_counts, dtype=np.int32).reshape(len(frames), len(result.zone_names))
+        result.entries = np.asarray(entries, dtype=np.int32)
+        result.exits = np.asarray(exits, dtype=np.int32)
+        if track_rows:
+            result.track_rows = np.concatenate(track_rows)
+    return result
+
+
+def _iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def match_boundary(prev: Tuple[np.ndarray, np.ndarray], nxt: Tuple[np.ndarray, np.ndarray],
+                   min_iou: float = 0.5) -> Dict[int, int]:
+    """Greedy IoU matching of the same frame seen by two segments: next local id -> previous local id."""
+    prev_ids, prev_boxes = prev
+    next_ids, next_boxes = nxt
+    if not len(prev_ids) or not len(next_ids):
+        return {}
+    iou = _iou(next_boxes, prev_boxes)
+    mapping: Dict[int, int] = {}
+    for flat in np.argsort(-iou, axis=None):
+        i, j = np.unravel_index(flat, iou.shape)
+        if iou[i, j] < min_iou:
+            break
+        if int(next_ids[i]) in mapping or int(prev_ids[j]) in mapping.values():
+            continue
+        mapping[int(next_ids[i])] = int(prev_ids[j])
+    return mapping
+
+
+def stitch(segments: Sequence[SegmentResult]) -> Dict[str, Dict[str, np.ndarray]]:
+    """Concatenate segments in order and rewrite local track ids into one global id space."""
+    segments = [s for s in segments if len(s.frame)]
+    if not segments:
+        return {"frames": {}, "seconds": {}, "tracks": {}}
+    zone_names = segments[0].zone_names
+
+    next_global = 1
+    prev_map: Dict[int, int] = {}
+    prev_out: Tuple[np.ndarray, np.ndarray] = (np.empty(0, dtype=np.int64), np.empty((0, 4)))
+    prev_last = -1
+    track_parts: List[np.ndarray] = []
+    for seg in segments:
+        # boundary_in is frame start - 1; it only describes the same frame as prev_out if nothing is missing
+        carried = match_boundary(prev_out, seg.boundary_in) if prev_last == seg.start - 1 else {}
+        local_to_global: Dict[int, int] = {}
+        for local, prev_local in carried.items():
+            if prev_local in prev_map:
+                local_to_global[local] = prev_map[prev_local]
+        rows = seg.track_rows.copy()
+        for local in np.unique(rows[:, 1]).tolist():
+            if local not in local_to_global:
+                local_to_global[local] = next_global
+                next_global += 1
+        if len(rows):
+            lut_keys = np.fromiter(local_to_global.keys(), dtype=np.int64)
+            lut_vals = np.fromiter(local_to_global.values(), dtype=np.int64)
+            order = np.argsort(lut_keys)
+            rows[:, 1] = lut_vals[order][np.searchsorted(lut_keys[order], rows[:, 1])]
+        track_parts.append(rows)
+        prev_map = local_to_global
+        prev_out = seg.boundary_out
+        prev_last = int(seg.frame[-1])
+
+    frame = np.concatenate([s.frame for s in segments])
+    pts = np.concatenate([s.pts for s in segments])
+    inside = np.concatenate([s.inside for s in segments])
+    zone_counts = np.concatenate([s.zone_counts for s in segments])
+    entries = np.concatenate([s.entries for s in segments])
+    exits = np.concatenate([s.exits for s in segments])
+
+    frames_table: Dict[str, np.ndarray] = {
+        "frame": frame,
+        "pts": pts,
+        "inside": inside,
+        "entries": entries,
+        "exits": exits,
+        "total_entries": np.cumsum(entries),
+        "total_exits": np.cumsum(exits),
+    }
+    for i, name in enumerate(zone_names):
+        frames_table[f"zone:{name}"] = zone_counts[:, i]
+
+    second = np.floor(pts).astype(np.int64)
+    seconds, inverse, n = np.unique(second, return_inverse=True, return_counts=True)
+    seconds_table: Dict[str, np.ndarray] = {
+        "second": seconds,
+        "frames": n,
+        "entries": np.bincount(inverse, weights=entries).astype(np.int64),
+        "exits": np.bincount(inverse, weights=exits).astype(np.int64),
+        "inside_mean": np.round(np.bincount(inverse, weights=inside) / n, 3),
+        "inside_max": np.maximum.reduceat(inside, np.flatnonzero(np.r_[True, np.diff(second) != 0])),
+    }
+    for i, name in enumerate(zone_names):
+        seconds_table[f"zone:{name}:mean"] = np.round(np.bincount(inverse, weights=zone_counts[:, i]) / n, 3)
+
+    tracks = np.concatenate(track_parts) if track_parts else np.empty((0, 3), dtype=np.int64)
+    # label 0 (NO_ZONE) maps to an empty zone name
+    names = np.array([""] + zone_names, dtype=object)
+    tracks_table: Dict[str, np.ndarray] = {
+        "frame": tracks[:, 0],
+        "pts": pts[np.searchsorted(frame, tracks[:, 0])] if len(tracks) else np.empty(0),
+        "track_id": tracks[:, 1],
+        "zone": names[tracks[:, 2]].astype(str) if len(tracks) else np.empty(0, dtype=str),
+    }
+    return {"frames": frames_table, "seconds": seconds_table, "tracks": tracks_table}
+
+
+def write_table(path: Path, columns: Dict[str, np.ndarray], fmt: str) -> Path:
+    path = path.with_name(f"{path.name}.{fmt}")
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("parquet output needs pyarrow (pip install pyarrow); use --format npz or csv") from e
+        pq.write_table(pa.table({k: np.asarray(v) for k, v in columns.items()}), path)
+    elif fmt == "csv":
+        names = list(columns)
+        rows = zip(*(np.asarray(columns[k]).tolist() for k in names))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(",".join(names) + "\n")
+            for row in rows:
+                f.write(",".join(str(v) for v in row) + "\n")
+    else:
+        np.savez_compressed(path, **columns)
+    return path
+
+
+def analyze_file(
+    path: str,
+    detector_factory: Callable[[], Any],
+    workers: int = 0,
+    segment_sec: float = 300.0,
+    overlap_sec: float = 2.0,
+) -> Dict[str, Any]:
+    """Analyse a whole file; returns the stitched tables plus a small summary."""
+    n_frames, fps = probe(path)
+    fps = fps or 25.0
+    workers = workers or os.cpu_count() or 1
+    segment_frames = max(1, int(segment_sec * fps))
+    segments = plan_segments(n_frames, segment_frames)
+    overlap = int(overlap_sec * fps)
+
+    if workers == 1 or len(segments) == 1:
+        results = [analyze_segment(path, s, e, overlap, detector_factory) for s, e in segments]
+    else:
+        # spawn: workers load their own model instead of inheriting a forked torch runtime
+        with ProcessPoolExecutor(max_workers=min(workers, len(segments)), mp_context=mp.get_context("spawn")) as pool:
+            futures = [pool.submit(analyze_segment, path, s, e, overlap, detector_factory) for s, e in segments]
+            results = [f.result() for f in futures]
+
+    tables = stitch(results)
+    frames = tables["frames"]
+    summary = {
+        "source": path,
+        "frames": int(len(frames.get("frame", ()))),
+        "fps": fps,
+        "segments": len(segments),
+        "duration_sec": round(float(frames["pts"][-1]) if len(frames.get("pts", ())) else 0.0, 3),
+        "total_entries": int(frames["total_entries"][-1]) if len(frames.get("frame", ())) else 0,
+        "total_exits": int(frames["total_exits"][-1]) if len(frames.get("frame", ())) else 0,
+        "unique_tracks": int(len(np.unique(tables["tracks"]["track_id"]))) if tables["tracks"] else 0,
+    }
+    return {"summary": summary, **tables}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video")
+    parser.add_argument("--out", type=Path, required=True, help="output path prefix")
+    parser.add_argument("--format", choices=FORMATS, default="npz")
+    parser.add_argument("--workers", type=int, default=0, help="processes (default: one per CPU)")
+    parser.add_argument("--segment-sec", type=float, default=300.0)
+    parser.add_argument("--overlap-sec", type=float, default=2.0, help="tracker warm-up before each segment")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch")
+    args = parser.parse_args(argv)
+
+    from .staged import default_detector_factory
+
+    result = analyze_file(
+        args.video,
+        functools.partial(default_detector_factory, args.backend),
+        args.workers,
+        args.segment_sec,
+        args.overlap_sec,
+    )
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    for name in ("frames", "seconds", "tracks"):
+        if result[name]:
+            write_table(args.out.with_name(f"{args.out.name}.{name}"), result[name], args.format)
+    print(json.dumps(result["summary"], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""
+onnx runtime person detector for cpu-only servers
+exports yolov8n.pt to ONNX once (cached under backend/models) and runs it with onnxruntime's CPU provider;
+optionally builds an INT8 static-quantized copy calibrated on frames of the bundled video
+pre/post-processing mirrors ultralytics (rect letterbox, conf 0.25, per-class NMS at IoU 0.7, max_det 300)
+so detect_people returns the same sv.Detections layout as YoloPersonDetector, data["class_name"] included
+exported and quantized models are written to a private temp file and renamed into place, so camera
+processes starting together never load a half-written model
+"""
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+import supervision as sv
+
+MODELS_DIR = Path(__file__).resolve().parents[1] / "models"
+CALIBRATION_VIDEO = Path(__file__).resolve().parent / "assets" / "videos" / "PeopleWalking2.mp4"
+PERSON_CLASS = 0
+PERSON_NAME = "person"
+
+
+def _require_onnxruntime():
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise RuntimeError("the onnx backends need onnxruntime (pip install onnxruntime onnx)") from e
+    return onnxruntime
+
+
+def letterbox(frame: np.ndarray, imgsz: int = 640, stride: int = 32) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """Ultralytics-style rect letterbox: scale the long side to imgsz, pad the short one to a stride multiple."""
+    h, w = frame.shape[:2]
+    gain = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * gain)), int(round(h * gain))
+    dw = ((imgsz - new_w) % stride) / 2
+    dh = ((imgsz - new_h) % stride) / 2
+    if (new_w, new_h) != (w, h):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    frame = cv2.copyMakeBorder(frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    return frame, gain, (left, top)
+
+
+def to_tensor(image: np.ndarray) -> np.ndarray:
+    """BGR HWC uint8 -> RGB NCHW float32 in [0, 1]."""
+    blob = image[:, :, ::-1].transpose(2, 0, 1)
+    return np.ascontiguousarray(blob, dtype=np.float32)[None] / 255.0
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Greedy NMS (same suppression rule as torchvision.ops.nms); returns kept indices by descending score."""
+    order = np.argsort(-scores, kind="stable")
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep: List[int] = []
+    while order.size:
+        i = order[0]
+        keep.append(int(i))
+        rest = order[1:]
+        tl = np.maximum(boxes[i, :2], boxes[rest, :2])
+        br = np.minimum(boxes[i, 2:], boxes[rest, 2:])
+        inter = np.prod(np.clip(br - tl, 0, None), axis=1)
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def postprocess(
+    output: np.ndarray,
+    gain: float,
+    pad: Tuple[int, int],
+    frame_shape: Tuple[int, int],
+    conf: float = 0.25,
+    iou: float = 0.7,
+    max_det: int = 300,
+) -> sv.Detections:
+    """YOLOv8 head output (1, 4 + classes, anchors) -> person detections in frame coordinates."""
+    preds = output[0].T
+    scores = preds[:, 4:]
+    cls = scores.argmax(axis=1)
+    best = scores[np.arange(len(scores)), cls]
+    # ultralytics assigns each box its best class before NMS; only boxes whose best class is person survive
+    mask = (best > conf) & (cls == PERSON_CLASS)
+    if not mask.any():
+        return people(np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32))
+    xywh, best = preds[mask, :4], best[mask]
+    xyxy = np.empty_like(xywh)
+    xyxy[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+    xyxy[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+    keep = nms(xyxy, best, iou)[:max_det]
+    xyxy, best = xyxy[keep], best[keep]
+
+    xyxy[:, [0, 2]] -= pad[0]
+    xyxy[:, [1, 3]] -= pad[1]
+    xyxy /= gain
+    h, w = frame_shape
+    xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, w)
+    xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, h)
+    return people(xyxy, best)
+
+
+def people(xyxy: np.ndarray, confidence: np.ndarray) -> sv.Detections:
+    """Person detections laid out like sv.Detections.from_ultralytics, class_name included."""
+    n = len(confidence)
+    return sv.Detections(
+        xyxy=xyxy.astype(np.float32),
+        confidence=confidence.astype(np.float32),
+        class_id=np.full(n, PERSON_CLASS, dtype=int),
+        data={"class_name": np.full(n, PERSON_NAME)},
+    )
+
+
+@contextmanager
+def replacing(target: Path) -> Iterator[Path]:
+    """Yield a temp path next to target; it replaces target atomically only if the block completes."""
+    fd, name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.stem}-", suffix=".tmp.onnx")
+    os.close(fd)
+    tmp = Path(name)
+    try:
+        yield tmp
+        os.replace(tmp, target)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def export_onnx(model_name: str = "yolov8n.pt", models_dir: Path = MODELS_DIR) -> Path:
+    """Export once with dynamic input shapes; later calls reuse the cached file."""
+    target = models_dir / f"{Path(model_name).stem}.onnx"
+    if target.exists():
+        return target
+    from ultralytics import YOLO  # only needed for the one-off export
+
+    models_dir.mkdir(parents=True, exist_ok=True)
+    exported = Path(YOLO(model_name).export(format="onnx", dynamic=True, simplify=True))
+    # copy rather than move: another process may be exporting the same file and move it first
+    with replacing(target) as tmp:
+        shutil.copyfile(exported, tmp)
+    exported.unlink(missing_ok=True)
+    return target
+
+
+def calibration_frames(video: Path = CALIBRATION_VIDEO, count: int = 64, imgsz: int = 640) -> Iterator[np.ndarray]:
+    """Evenly spaced, letterboxed frames of the clip the pipeline actually watches."""
+    cap = cv2.VideoCapture(str(video))
+    try:
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or count
+        for index in np.linspace(0, total - 1, num=min(count, total)).astype(int):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+            ok, frame = cap.read()
+            if ok:
+                yield to_tensor(letterbox(frame, imgsz)[0])
+    finally:
+        cap.release()
+
+
+def quantize_int8(fp32_path: Path, video: Path = CALIBRATION_VIDEO, frames: int = 64, imgsz: int = 640) -> Path:
+    """Static INT8 (QDQ, per-channel weights) calibrated on sample frames; cached next to the fp32 model."""
+    target = fp32_path.with_name(f"{fp32_path.stem}-int8.onnx")
+    if target.exists():
+        return target
+    ort = _require_onnxruntime()
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        CalibrationMethod,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+
+    input_name = ort.InferenceSession(str(fp32_path), providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self) -> None:
+            self.frames = calibration_frames(video, frames, imgsz)
+
+        def get_next(self):
+            tensor = next(self.frames, None)
+            return None if tensor is None else {input_name: tensor}
+
+    with replacing(target) as tmp:
+        quantize_static(
+            str(fp32_path),
+            str(tmp),
+            FrameReader(),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method=CalibrationMethod.MinMax,
+        )
+    return target
+
+
+class OnnxPersonDetector:
+    def __init__(
+        self,
+        model_name: str = "yolov8n.pt",
+        imgsz: int = 640,
+        int8: bool = False,
+        threads: int = 0,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 15.0,
+        conf: float = 0.25,
+        iou: float = 0.7,
+    ) -> None:
+        """model_name may be a .pt (exported and cached) or an existing .onnx; threads=0 uses every core."""
+        ort = _require_onnxruntime()
+        path = Path(model_name)
+        if path.suffix != ".onnx":
+            path = export_onnx(model_name)
+        if int8:
+            path = quantize_int8(path, imgsz=imgsz)
+        self.model_path = path
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max_wait_ms
+
+    def detect_people(self, frame: np.ndarray, imgsz: Optional[int] = None) -> sv.Detections:
+        image, gain, pad = letterbox(frame, imgsz or self.imgsz)
+        output = self.session.run(None, {self.input_name: to_tensor(image)})[0]
+        return postprocess(output, gain, pad, frame.shape[:2], self.conf, self.iou)
+
+    def detect_people_batch(self, frames: Sequence[np.ndarray], imgsz: Optional[int] = None) -> List[sv.Detections]:
+        # frames from different cameras letterbox to different shapes; ORT on CPU gains little from
+        # stacking them, so each runs on its own and the session's intra-op threads do the parallel work
+        return [self.detect_people(frame, imgsz) for frame in frames]
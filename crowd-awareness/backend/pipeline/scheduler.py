@@ -0,0 +1,110 @@
+"""
+adaptive detection scheduler: runs full detection every k frames and lets the tracker
+extrapolate in between, re-tuning k (and optionally imgsz) from measured stage latency
+so the pipeline holds a target processing rate without falling behind the source
+"""
+import time
+from typing import Any, Dict, Optional, Sequence
+
+
+class AdaptiveScheduler:
+    def __init__(
+        self,
+        target_fps: float = 10.0,
+        max_skip: int = 5,
+        max_lag_sec: float = 1.0,
+        imgsz_steps: Sequence[int] = (640, 512, 416, 320),
+        adapt_imgsz: bool = False,
+        adjust_every_sec: float = 1.0,
+    ) -> None:
+        self.target_fps = target_fps
+        self.max_skip = max(1, int(max_skip))
+        self.max_lag_sec = max_lag_sec
+        self.imgsz_steps = list(imgsz_steps)
+        self.adapt_imgsz = adapt_imgsz
+        self.adjust_every_sec = adjust_every_sec
+
+        self.detect_every = 1
+        self.imgsz_index = 0
+        self.frames_since_detect = 0
+
+        # exponential moving averages of stage cost, seconds
+        self.detect_sec = 0.0
+        self.base_sec = 0.0
+        self.lag_sec = 0.0
+
+        self.window_start = time.perf_counter()
+        self.window_frames = 0
+        self.window_detections = 0
+        self.processing_fps = 0.0
+        self.detection_fps = 0.0
+
+    @property
+    def imgsz(self) -> int:
+        return self.imgsz_steps[self.imgsz_index]
+
+    def should_detect(self) -> bool:
+        if self.frames_since_detect + 1 >= self.detect_every:
+            self.frames_since_detect = 0
+            return True
+        self.frames_since_detect += 1
+        return False
+
+    @staticmethod
+    def _ema(prev: float, value: float, alpha: float = 0.2) -> float:
+        return value if prev == 0.0 else prev + alpha * (value - prev)
+
+    def record(self, frame_sec: float, detect_sec: Optional[float], lag_sec: float = 0.0) -> None:
+        """Feed one processed frame: total time, detector time (None when skipped) and frame age."""
+        if detect_sec is not None:
+            self.detect_sec = self._ema(self.detect_sec, detect_sec)
+            self.base_sec = self._ema(self.base_sec, max(0.0, frame_sec - detect_sec))
+            self.window_detections += 1
+        else:
+            self.base_sec = self._ema(self.base_sec, frame_sec)
+        self.lag_sec = self._ema(self.lag_sec, lag_sec)
+        self.window_frames += 1
+
+        now = time.perf_counter()
+        elapsed = now - self.window_start
+        if elapsed >= self.adjust_every_sec:
+            self.processing_fps = self.window_frames / elapsed
+            self.detection_fps = self.window_detections / elapsed
+            self.window_start = now
+            self.window_frames = 0
+            self.window_detections = 0
+            self._adjust()
+
+    def _adjust(self) -> None:
+        if self.target_fps <= 0 or self.detect_sec <= 0:
+            return
+        budget = 1.0 / self.target_fps
+        # smallest k whose amortised detector cost still fits the per-frame budget
+        k = self.max_skip
+        for candidate in range(1, self.max_skip + 1):
+            if self.base_sec + self.detect_sec / candidate <= budget:
+                k = candidate
+                break
+        if self.lag_sec > self.max_lag_sec:
+            k = min(self.max_skip, max(k, self.detect_every + 1))
+        self.detect_every = k
+
+        if not self.adapt_imgsz:
+            return
+        over_budget = self.base_sec + self.detect_sec / self.max_skip > budget
+        if k == self.max_skip and over_budget and self.imgsz_index < len(self.imgsz_steps) - 1:
+            self.imgsz_index += 1
+        elif k == 1 and self.base_sec + self.detect_sec < 0.5 * budget and self.imgsz_index > 0:
+            self.imgsz_index -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "target_fps": self.target_fps,
+            "detect_every": self.detect_every,
+            "imgsz": self.imgsz,
+            "processing_fps": round(self.processing_fps, 1),
+            "detection_fps": round(self.detection_fps, 1),
+            "avg_detect_ms": round(self.detect_sec * 1000.0, 1),
+            "avg_other_ms": round(self.base_sec * 1000.0, 1),
+            "lag_sec": round(self.lag_sec, 3),
+        }
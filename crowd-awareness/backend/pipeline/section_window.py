@@ -0,0 +1,51 @@
+"""
+per-section entry index over a sliding time window
+a deque ordered by entry time plus a track-id -> entry-time dict gives amortized O(1)
+insert, membership and expiry, replacing the list rebuilds done on every frame
+"""
+import sys
+from collections import deque
+from typing import Deque, Dict, Iterator, Tuple
+
+SECTION_WAIT_WINDOW_SEC = 5 * 60
+
+
+class SectionEntryWindow:
+    __slots__ = ("window_sec", "events", "entered_at")
+
+    def __init__(self, window_sec: float = SECTION_WAIT_WINDOW_SEC) -> None:
+        self.window_sec = window_sec
+        self.events: Deque[Tuple[float, int]] = deque()
+        self.entered_at: Dict[int, float] = {}
+
+    def add(self, tid: int, now: float) -> bool:
+        """Record an entry unless the track already entered within the window."""
+        if tid in self.entered_at:
+            return False
+        self.events.append((now, tid))
+        self.entered_at[tid] = now
+        return True
+
+    def expire(self, now: float) -> int:
+        """Drop entries older than the window; same cut-off as now - ts > window_sec."""
+        dropped = 0
+        events = self.events
+        while events and now - events[0][0] > self.window_sec:
+            _, tid = events.popleft()
+            del self.entered_at[tid]
+            dropped += 1
+        return dropped
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the index (containers plus entry tuples)."""
+        per_event = sys.getsizeof((0.0, 0))
+        return sys.getsizeof(self.events) + sys.getsizeof(self.entered_at) + per_event * len(self.events)
+
+    def __contains__(self, tid: object) -> bool:
+        return tid in self.entered_at
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self) -> Iterator[Tuple[float, int]]:
+        return iter(self.events)
@@ -0,0 +1,137 @@
+"""
+lazy snapshot cache: the pipeline only publishes the latest raw frame and tracked detections
+under a frame version; annotation + JPEG encoding happen when a snapshot is requested and the
+result is cached per version so concurrent readers share a single encode
+with demand_only=True (headless pipelines) frames are only published while someone asked for a snapshot
+within viewer_idle_sec; the first request after an idle spell waits briefly for a fresh frame
+"""
+import base64
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+import supervision as sv
+
+from .annotate import FrameAnnotator
+
+# a viewer counts as connected for this long after its last snapshot request
+VIEWER_IDLE_SEC = 10.0
+
+
+class SnapshotCache:
+    def __init__(
+        self,
+        annotator: FrameAnnotator,
+        jpeg_quality: int = 80,
+        metrics=None,
+        demand_only: bool = False,
+        viewer_idle_sec: float = VIEWER_IDLE_SEC,
+        wake_timeout: float = 1.0,
+    ) -> None:
+        self.annotator = annotator
+        # optional PipelineMetrics; render + encode time is recorded under the "encode" stage
+        self.metrics = metrics
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), int(jpeg_quality)]
+        # front/back frame buffers: the pipeline fills the back one, then swaps under the lock
+        self.buffers = [None, None]
+        self.front = 0
+        self.lock = threading.Lock()
+        self.published = threading.Condition(self.lock)
+        self.demand_only = demand_only
+        self.viewer_idle_sec = viewer_idle_sec
+        self.wake_timeout = wake_timeout
+        self.last_request = float("-inf")
+        self.encode_lock = threading.Lock()
+        self.version = 0
+        self.tracked: Optional[sv.Detections] = None
+        self.zones: Dict[str, sv.PolygonZone] = {}
+
+        # (version, payload) tuples so lock-free readers never pair a version with another frame's bytes
+        self.encoded: Dict[float, Tuple[int, Optional[bytes]]] = {}
+        self.annotated: Tuple[int, Optional[np.ndarray]] = (-1, None)
+        # reused render target; only touched under encode_lock
+        self.scene: Optional[np.ndarray] = None
+        self.encoded_b64: Tuple[int, Optional[str]] = (-1, None)
+
+    def publish(self, frame: np.ndarray, tracked: sv.Detections, zones: Dict[str, sv.PolygonZone]) -> int:
+        """Called by the pipeline thread once per frame; costs one memcpy."""
+        back = 1 - self.front
+        buf = self.buffers[back]
+        if buf is None or buf.shape != frame.shape:
+            buf = self.buffers[back] = np.empty_like(frame)
+        np.copyto(buf, frame)
+        with self.lock:
+            self.front = back
+            self.tracked = tracked
+            self.zones = zones
+            self.version += 1
+            self.published.notify_all()
+            return self.version
+
+    def wanted(self) -> bool:
+        """Whether the pipeline should publish this frame; always true unless demand_only."""
+        return not self.demand_only or time.monotonic() - self.last_request < self.viewer_idle_sec
+
+    def _request(self) -> None:
+        now = time.monotonic()
+        idle = now - self.last_request >= self.viewer_idle_sec
+        self.last_request = now
+        if self.demand_only and idle:
+            # the newest published frame may be from the last viewer's visit; wait for the pipeline to notice us
+            with self.published:
+                target = self.version + 1
+                self.published.wait_for(lambda: self.version >= target, self.wake_timeout)
+
+    def _annotated_frame(self) -> Tuple[int, Optional[np.ndarray]]:
+        # caller holds encode_lock; the full-size render is shared by every scale of a version
+        if self.annotated[0] == self.version:
+            return self.annotated
+        with self.lock:
+            frame = self.buffers[self.front]
+            if frame is None:
+                return self.version, None
+            # copy under the lock so the pipeline cannot swap this buffer back in mid-read
+            if self.scene is None or self.scene.shape != frame.shape:
+                self.scene = np.empty_like(frame)
+            scene = self.scene
+            np.copyto(scene, frame)
+            tracked = self.tracked
+            zones = self.zones
+            version = self.version
+        self.annotated = (version, self.annotator.render(scene, tracked, zones, copy=False))
+        return self.annotated
+
+    def get_jpeg(self, scale: float = 1.0) -> Tuple[int, Optional[bytes]]:
+        """(version, jpeg bytes) for the latest frame, encoding at most once per version and scale."""
+        self._request()
+        encoded = self.encoded.get(scale)
+        if encoded is not None and encoded[0] == self.version:
+            return encoded
+        with self.encode_lock:
+            encoded = self.encoded.get(scale)
+            if encoded is not None and encoded[0] == self.version:
+                return encoded
+            start = time.perf_counter()
+            version, image = self._annotated_frame()
+            if image is None:
+                return version, None
+            if scale != 1.0:
+                h, w = image.shape[:2]
+                size = (max(1, int(w * scale)), max(1, int(h * scale)))
+                image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+            ok, buffer = cv2.imencode(".jpg", image, self.encode_params)
+            encoded = self.encoded[scale] = (version, buffer.tobytes() if ok else None)
+            if self.metrics is not None:
+                self.metrics.observe("encode", time.perf_counter() - start)
+            return encoded
+
+    def get_base64(self) -> Optional[str]:
+        version, jpeg = self.get_jpeg()
+        if jpeg is None:
+            return None
+        cached = self.encoded_b64
+        if cached[0] != version:
+            cached = self.encoded_b64 = (version, base64.b64encode(jpeg).decode("utf-8"))
+        return cached[1]
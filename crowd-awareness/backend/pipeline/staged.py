@@ -0,0 +1,575 @@
+"""
+process-based pipeline: one OS process per stage (decode -> detect -> track/zones -> annotate/encode)
+frames never cross process boundaries; they live in multiprocessing.shared_memory ring slots and only
+slot indices, small detection arrays and state deltas are sent through queues
+the API process only mirrors the published state, so request handlers never compete with inference for the GIL
+"""
+import base64
+import multiprocessing as mp
+import queue
+import threading
+import time
+import traceback
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+import supervision as sv
+
+from .alerts import AlertEngine
+from .backends import create_detector
+from .annotate import FrameAnnotator
+from .counting import LineCounter
+from .history import OccupancyHistory, make_history
+from .journal import EventJournal
+from .metrics import PipelineMetrics
+from .motion import MotionGate
+from .movement import MovementAnalyzer
+from .state_store import StateStore
+from .snapshot import VIEWER_IDLE_SEC
+from .stats import SectionStatistics, SectionSummary, SuggestedActions
+from .tiling import RoiDetector
+from .track_table import TRACK_TTL_SEC
+from .tracker import PersonTracker
+from .video_source import VideoSource, is_live_source
+from .zones import ZoneManager
+
+RingSpec = Tuple[str, Tuple[int, int, int], int]
+
+
+class SharedFrameRing:
+    """Fixed number of HxWx3 uint8 frame slots backed by one shared memory block."""
+
+    def __init__(self, shape: Tuple[int, int, int], slots: int, name: Optional[str] = None) -> None:
+        self.shape = tuple(shape)
+        self.slots = slots
+        size = int(np.prod(self.shape)) * slots
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.frames = np.ndarray((slots, *self.shape), dtype=np.uint8, buffer=self.shm.buf)
+
+    @classmethod
+    def attach(cls, spec: RingSpec) -> "SharedFrameRing":
+        name, shape, slots = spec
+        return cls(shape, slots, name=name)
+
+    def spec(self) -> RingSpec:
+        return self.shm.name, self.shape, self.slots
+
+    def slot(self, index: int) -> np.ndarray:
+        return self.frames[index]
+
+    def close(self) -> None:
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def decode_stage(source, ring_spec: RingSpec, free_q, out_q, decoder: str, decode_width: Optional[int], stop) -> None:
+    ring = SharedFrameRing.attach(ring_spec)
+    # with the ffmpeg decoder, frames are read from the pipe straight into shared memory
+    video = VideoSource(source, decoder=decoder, decode_width=decode_width)
+    live = is_live_source(source)
+    h, w, _ = ring.shape
+    index = 0
+    try:
+        video.open()
+        while not stop.is_set():
+            try:
+                slot = free_q.get(block=not live, timeout=None if live else 0.5)
+            except queue.Empty:
+                if live:
+                    # every slot is still in flight: drop this frame at the source
+                    if video.cap is not None:
+                        video.cap.grab()
+                continue
+            target = ring.slot(slot)
+            read_start = time.perf_counter()
+            ok, frame = video.read_into(target) if video.cap is not None else (False, None)
+            if ok and frame is not None and frame is not target:
+                # the capture handed back its own buffer; the slot must hold the frame either way
+                if frame.shape == target.shape:
+                    np.copyto(target, frame)
+                else:
+                    cv2.resize(frame, (w, h), dst=target)
+            if not ok or frame is None:
+                free_q.put(slot)
+                video.restart()
+                continue
+            out_q.put((slot, index, time.time(), time.perf_counter() - read_start))
+            index += 1
+    except Exception:
+        traceback.print_exc()
+        stop.set()
+    finally:
+        out_q.put(None)
+        video.release()
+        ring.close()
+
+
+def detect_stage(detector_factory: Callable[[], Any], ring_spec: RingSpec, in_q, out_q, motion_gate, roi, stop) -> None:
+    ring = SharedFrameRing.attach(ring_spec)
+    h, w, _ = ring.shape
+    zone_manager = ZoneManager()
+    zone_manager.init_zones(w, h)
+    motion: Optional[MotionGate] = None
+    if motion_gate:
+        motion = MotionGate(**motion_gate) if isinstance(motion_gate, dict) else MotionGate()
+        motion.set_zones(zone_manager.label_map)
+    try:
+        detector = detector_factory()
+        if roi:
+            detector = RoiDetector(detector, zone_manager, **(roi if isinstance(roi, dict) else {}))
+        d = sv.Detections.empty()
+        while not stop.is_set():
+            msg = in_q.get()
+            if msg is None:
+                break
+            slot, index, ts, decode_sec = msg
+            frame = ring.slot(slot)
+            detect_sec = None
+            # static frames resend the previous detections; detect_sec None tells the track stage it was reused
+            if motion is None or motion.should_detect(frame):
+                start = time.perf_counter()
+                d = detector.detect_people(frame)
+                detect_sec = time.perf_counter() - start
+            out_q.put((slot, index, ts, (decode_sec, detect_sec), d.xyxy.astype(np.float32), d.confidence, d.class_id))
+    except Exception:
+        traceback.print_exc()
+        stop.set()
+    finally:
+        out_q.put(None)
+        ring.close()
+
+
+def track_stage(
+    frame_shape, in_q, out_q, state_q, crowd_threshold: int, spike_threshold: int, track_ttl_sec: float, stop
+) -> None:
+    h, w, _ = frame_shape
+    state = StateStore(track_ttl_sec)
+    tracker = PersonTracker()
+    zone_manager = ZoneManager()
+    zones = zone_manager.init_zones(w, h)
+    state.init_sections(zones.keys())
+    movement = MovementAnalyzer(state, zone_manager)
+    movement.reset_for_new_zones(zone_manager)
+    stats = SectionStatistics(state)
+    alerts = AlertEngine(state, crowd_threshold=crowd_threshold, spike_threshold=spike_threshold)
+    # the line is counted here on every frame; the annotate stage only draws the totals it is sent
+    counter = LineCounter()
+    last_sent: Dict[str, Any] = {}
+    # decode/detect timings ride along with each frame; the whole set is shipped to the parent about once a second
+    metrics = PipelineMetrics()
+    last_metrics = 0.0
+    try:
+        while not stop.is_set():
+            msg = in_q.get()
+            if msg is None:
+                break
+            slot, index, ts, (decode_sec, detect_sec), xyxy, confidence, class_id = msg
+            metrics.observe("decode", decode_sec)
+            if detect_sec is None:
+                metrics.inc("detections_reused")
+            else:
+                metrics.observe("detect", detect_sec)
+            metrics.start()
+            detections = sv.Detections(xyxy=xyxy, confidence=confidence, class_id=class_id)
+            tracked = tracker.track(detections)
+            metrics.lap("track")
+
+            now = time.time()
+            movement.update_section_stats(tracked, now)
+            metrics.lap("movement")
+            # every frame here carries real (or motion-reused) detections, never tracker.predict() boxes,
+            # so crossings forwarded to the parent and the journal always come from a detection
+            counter.trigger(tracked, h, w)
+            metrics.lap("count")
+            current_total = len(tracked)
+            prev_total = state.last_total
+            state.update_counts(current_total)
+            alerts.build_alerts(current_total, prev_total, now)
+            metrics.lap("alerts")
+
+            state.publish()
+            summary = stats.build_section_summary(now)
+            published = {
+                "building": {
+                    "total_entries": state.total_entries,
+                    "total_exits": state.total_exits,
+                    "current_inside": state.current_inside,
+                    "last_update_ts": state.last_update_ts,
+                },
+                "alerts": list(state.alerts),
+                "sections": summary.model_dump(),
+                "actions": stats.build_suggested_actions(summary).model_dump(),
+                # line totals also go to the annotate stage with each frame, but only for drawing
+                "line": counter.counts(),
+            }
+            # only keys whose value changed since the last message cross the process boundary
+            delta = {k: v for k, v in published.items() if last_sent.get(k) != v}
+            if delta:
+                state_q.put(("state", delta))
+                last_sent.update(delta)
+            metrics.lap("publish")
+            metrics.frame_age.observe(time.time() - ts)
+            metrics.inc("frames_processed")
+            if now - last_metrics >= 1.0:
+                metrics.counters["tracks_evicted"] = state.tracks.evicted
+                state_q.put(("metrics", metrics))
+                last_metrics = now
+
+            tids = tracked.tracker_id if tracked.tracker_id is not None else np.empty((0,), dtype=int)
+            out_q.put((
+                slot, index, tracked.xyxy.astype(np.float32), tids, tracked.confidence,
+                counter.in_count, counter.out_count,
+            ))
+    except Exception:
+        metrics.inc("exceptions")
+        state_q.put(("metrics", metrics))
+        traceback.print_exc()
+        stop.set()
+    finally:
+        out_q.put(None)
+
+
+def annotate_stage(ring_spec: RingSpec, in_q, free_q, state_q, snapshot_interval: float, viewer_ts, stop) -> None:
+    """viewer_ts: shared last snapshot request time, or None to render regardless of viewers."""
+    ring = SharedFrameRing.attach(ring_spec)
+    h, w, _ = ring.shape
+    zones = ZoneManager().init_zones(w, h)
+    annotator = FrameAnnotator()
+    annotator.ensure_line(h, w)
+    last_encode = 0.0
+    try:
+        while not stop.is_set():
+            msg = in_q.get()
+            if msg is None:
+                break
+            slot, index, xyxy, tids, confidence, line_in, line_out = msg
+            try:
+                now = time.time()
+                watched = viewer_ts is None or now - viewer_ts.value < VIEWER_IDLE_SEC
+                if watched and now - last_encode >= snapshot_interval:
+                    tracked = sv.Detections(xyxy=xyxy, confidence=confidence, tracker_id=tids)
+                    annotator.counter.set_counts(line_in, line_out)
+                    annotated = annotator.render(ring.slot(slot), tracked, zones)
+                    ok, buffer = cv2.imencode(".jpg", annotated)
+                    if ok:
+                        state_q.put(("snapshot", buffer.tobytes()))
+                    last_encode = now
+            finally:
+                free_q.put(slot)
+    except Exception:
+        traceback.print_exc()
+        stop.set()
+    finally:
+        ring.close()
+
+
+def _probe_frame_shape(source, decoder: str = "opencv", decode_width: Optional[int] = None) -> Optional[Tuple[int, int, int]]:
+    video = VideoSource(source, decoder=decoder, decode_width=decode_width)
+    try:
+        if not video.open():
+            return None
+        ok, frame = video.read()
+        return frame.shape if ok and frame is not None else None
+    finally:
+        video.release()
+
+
+def default_detector_factory(backend: str = "torch"):
+    return create_detector(backend)
+
+
+class ProcessPipelineController:
+    """
+    Same public getters as PipelineController, but every stage runs in its own process.
+    Cameras in this mode cannot share a detector; each one loads the model in its detect stage.
+    """
+
+    def __init__(
+        self,
+        source: Any,
+        camera_id: str = "main",
+        detector_factory: Callable[[], Any] = default_detector_factory,
+        slots: int = 4,
+        snapshot_interval: float = 0.5,
+        crowd_threshold: int = 40,
+        spike_threshold: int = 5,
+        journal: Optional[EventJournal] = None,
+        motion_gate: Union[bool, Dict[str, Any]] = False,
+        roi: Union[bool, Dict[str, Any]] = False,
+        decoder: str = "opencv",
+        decode_width: Optional[int] = None,
+        headless: bool = False,
+        track_ttl_sec: float = TRACK_TTL_SEC,
+    ) -> None:
+        self.source = source
+        self.camera_id = camera_id
+        self.detector_factory = detector_factory
+        self.slots = max(2, slots)
+        self.snapshot_interval = snapshot_interval
+        self.crowd_threshold = crowd_threshold
+        self.spike_threshold = spike_threshold
+        self.motion_gate = motion_gate
+        self.roi = roi
+        self.decoder = decoder
+        self.decode_width = decode_width
+        self.headless = headless
+        self.track_ttl_sec = track_ttl_sec
+
+        self.state = StateStore()
+        if journal is not None:
+            self.state.attach_journal(journal, camera_id)
+        # the track stage counts from zero; the parent turns its running totals into individual events
+        self.worker_entries = 0
+        self.worker_exits = 0
+        self.last_alert_ts = 0.0
+        self.sections: Dict[str, Any] = {"busiest_section": None, "sections": []}
+        self.actions: Dict[str, Any] = {"actions": []}
+        self.line: Dict[str, int] = {"in": 0, "out": 0}
+        # (version, jpeg bytes) from the annotate stage; base64 is derived on demand
+        self.snapshot: Tuple[int, Optional[bytes]] = (0, None)
+        self.snapshot_b64: Tuple[int, Optional[str]] = (-1, None)
+        # scale -> (version, jpeg bytes), downscaled here from the stage's full-size jpeg once per version
+        self.snapshot_scaled: Dict[float, Tuple[int, Optional[bytes]]] = {}
+        self.scale_lock = threading.Lock()
+        self.snapshot_cond = threading.Condition()
+        # latest copy shipped by the track stage
+        self.metrics = PipelineMetrics()
+        # parent-side history, sized once the worker reports its section names
+        self.history: Optional[OccupancyHistory] = None
+
+        self.ctx = mp.get_context("spawn")
+        # last snapshot request (wall time), read by the annotate stage of a headless camera
+        self.viewer_ts = self.ctx.Value("d", 0.0, lock=False) if headless else None
+        self.ring: Optional[SharedFrameRing] = None
+        self.processes = []
+        self.stop_event = None
+        self.state_q = None
+        self.queues: Tuple[Any, ...] = ()
+        self.listener: Optional[threading.Thread] = None
+        self.thread_started = False
+
+    def start(self) -> None:
+        if self.thread_started:
+            return
+        self.thread_started = True
+        shape = _probe_frame_shape(self.source, self.decoder, self.decode_width)
+        if shape is None:
+            return
+
+        ctx = self.ctx
+        self.ring = SharedFrameRing(shape, self.slots)
+        spec = self.ring.spec()
+        self.stop_event = ctx.Event()
+        free_q = ctx.Queue()
+        for i in range(self.slots):
+            free_q.put(i)
+        detect_q = ctx.Queue(self.slots)
+        track_q = ctx.Queue(self.slots)
+        annotate_q = ctx.Queue(self.slots)
+        self.state_q = ctx.Queue(64)
+
+        # the parent must keep every queue alive until the children have attached to them
+        self.queues = (free_q, detect_q, track_q, annotate_q)
+        stop = self.stop_event
+        self.processes = [
+            ctx.Process(
+                target=decode_stage,
+                args=(self.source, spec, free_q, detect_q, self.decoder, self.decode_width, stop),
+                daemon=True,
+            ),
+            ctx.Process(
+                target=detect_stage,
+                args=(self.detector_factory, spec, detect_q, track_q, self.motion_gate, self.roi, stop),
+                daemon=True,
+            ),
+            ctx.Process(
+                target=track_stage,
+                args=(
+                    shape, track_q, annotate_q, self.state_q,
+                    self.crowd_threshold, self.spike_threshold, self.track_ttl_sec, stop,
+                ),
+                daemon=True,
+            ),
+            ctx.Process(
+                target=annotate_stage,
+                args=(spec, annotate_q, free_q, self.state_q, self.snapshot_interval, self.viewer_ts, stop),
+                daemon=True,
+            ),
+        ]
+        for p in self.processes:
+            p.start()
+        self.state.mark_running(True)
+        self.listener = threading.Thread(target=self._listen, daemon=True)
+        self.listener.start()
+
+    def _listen(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                kind, payload = self.state_q.get(timeout=0.5)
+            except queue.Empty:
+                if not all(p.is_alive() for p in self.processes):
+                    break
+                continue
+            if kind == "snapshot":
+                with self.snapshot_cond:
+                    self.snapshot = (self.snapshot[0] + 1, payload)
+                    self.snapshot_cond.notify_all()
+            elif kind == "state":
+                self._apply(payload)
+            elif kind == "metrics":
+                self.metrics = payload
+        self.state.mark_running(False)
+
+    def _apply(self, delta: Dict[str, Any]) -> None:
+        building = delta.get("building")
+        if building is not None:
+            ts = building["last_update_ts"]
+            for _ in range(building["total_entries"] - self.worker_entries):
+                self.state.increment_entry(ts)
+            for _ in range(building["total_exits"] - self.worker_exits):
+                self.state.increment_exit(ts)
+            self.worker_entries = building["total_entries"]
+            self.worker_exits = building["total_exits"]
+            self.state.current_inside = building["current_inside"]
+            self.state.last_update_ts = ts
+        if "alerts" in delta:
+            new_alerts = [a for a in delta["alerts"] if a["ts"] > self.last_alert_ts]
+            if new_alerts:
+                self.last_alert_ts = new_alerts[-1]["ts"]
+                self.state.add_alerts(new_alerts)
+        if "sections" in delta:
+            self.sections = delta["sections"]
+            if self.history is None:
+                self.history = make_history([s["name"] for s in self.sections["sections"]])
+        if "actions" in delta:
+            self.actions = delta["actions"]
+        if "line" in delta:
+            self.line = delta["line"]
+        # sections and actions live outside the store, so their changes must move the version too
+        self.state.publish(force="sections" in delta or "actions" in delta)
+        if self.history is not None and self.state.last_update_ts:
+            counts = [s["current_count"] for s in self.sections["sections"]] + [self.state.current_inside]
+            self.history.record(self.state.last_update_ts, counts)
+
+    def stop(self) -> None:
+        if self.stop_event is not None:
+            self.stop_event.set()
+        for p in self.processes:
+            p.join(2.0)
+            if p.is_alive():
+                p.terminate()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+        self.state.mark_running(False)
+
+    def get_building_status(self):
+        snap = self.state.snapshot()
+        return {
+            "total_entries": snap.total_entries,
+            "total_exits": snap.total_exits,
+            "current_inside": snap.current_inside,
+            # per-frame heartbeat: the snapshot (and its version) only moves when the content changes,
+            # so a healthy static scene would otherwise look stalled
+            "last_update_ts": self.state.last_update_ts,
+        }
+
+    def get_alerts(self):
+        return list(self.state.snapshot().alerts)
+
+    def _request_snapshot(self) -> None:
+        if self.viewer_ts is None:
+            return
+        now = time.time()
+        idle = now - self.viewer_ts.value >= VIEWER_IDLE_SEC
+        self.viewer_ts.value = now
+        if idle:
+            # the annotate stage was idle; give it one snapshot interval to render a current frame
+            with self.snapshot_cond:
+                version = self.snapshot[0]
+                self.snapshot_cond.wait_for(lambda: self.snapshot[0] != version, self.snapshot_interval + 1.0)
+
+    def get_snapshot(self):
+        self._request_snapshot()
+        version, jpeg = self.snapshot
+        if jpeg is None:
+            return {"image": None}
+        if self.snapshot_b64[0] != version:
+            self.snapshot_b64 = (version, base64.b64encode(jpeg).decode("utf-8"))
+        return {"image": self.snapshot_b64[1]}
+
+    def get_snapshot_jpeg(self, scale: float = 1.0):
+        self._request_snapshot()
+        version, jpeg = self.snapshot
+        if jpeg is None or scale == 1.0:
+            return version, jpeg
+        cached = self.snapshot_scaled.get(scale)
+        if cached is not None and cached[0] == version:
+            return cached
+        with self.scale_lock:
+            cached = self.snapshot_scaled.get(scale)
+            if cached is not None and cached[0] == version:
+                return cached
+            # the annotate stage encodes at full size only; every viewer at this scale shares one re-encode
+            image = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                return version, None
+            h, w = image.shape[:2]
+            size = (max(1, int(w * scale)), max(1, int(h * scale)))
+            ok, buffer = cv2.imencode(".jpg", cv2.resize(image, size, interpolation=cv2.INTER_AREA))
+            cached = self.snapshot_scaled[scale] = (version, buffer.tobytes() if ok else None)
+            return cached
+
+    def get_sections(self):
+        return SectionSummary(**self.sections)
+
+    def get_suggested_actions(self):
+        return SuggestedActions(**self.actions)
+
+    def get_history(self, series: str, start: float, end: float, resolution: str = "1m"):
+        if self.history is None:
+            return {"series": series, "resolution": resolution, "ts": []}
+        return self.history.query(series, start, end, resolution)
+
+    def get_metrics(self) -> PipelineMetrics:
+        return self.metrics
+
+    def get_state_version(self) -> int:
+        return self.state.snapshot().version
+
+    def get_live_payload(self):
+        return {
+            "building_status": self.get_building_status(),
+            "alerts": self.get_alerts(),
+            "sections": self.sections,
+            "suggested_actions": self.actions,
+        }
+
+    def get_processing_status(self):
+        counters = self.metrics.counters
+        frames = counters["frames_processed"]
+        return {
+            "is_processing": self.is_running(),
+            "mode": "process",
+            "headless": self.headless,
+            "line": self.line,
+            "tracks": {"evicted": counters["tracks_evicted"], "ttl_sec": self.track_ttl_sec},
+            "motion": {
+                "enabled": bool(self.motion_gate),
+                "frames": frames,
+                "skipped": counters["detections_reused"],
+                "skip_ratio": round(counters["detections_reused"] / frames, 3) if frames else 0.0,
+            },
+            "stages": {
+                name: p.is_alive()
+                for name, p in zip(("decode", "detect", "track", "annotate"), self.processes)
+            },
+        }
+
+    def is_running(self) -> bool:
+        return self.state.pipeline_running
@@ -2,13 +2,59 @@
 simple state container for pipeline counters, sections, alerts, and snapshot
 tracks entries/exits, current_inside, alerts history, section stats, and last image
 mutations go through explicit methods to avoid accidental global state drift
+with a journal attached, counters and recent alerts are reloaded from disk and every crossing/alert
+is enqueued for the journal's background writer
+each section keeps a DwellSketch fed by the track table whenever a track leaves it, so snapshots carry
+the rolling mean and p50/p90 visit duration without scanning any per-visit history
+the pipeline thread mutates the store and calls publish() once per frame; readers only ever
+touch the published StateSnapshot, which is frozen and swapped in with a single reference
+assignment, so they always see one consistent frame without taking a lock
+the version only moves when something besides the timestamp changed, so version-keyed caches and
+dashboard ETags stay valid while the scene is static
 """
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import time
 
+from .history import OccupancyHistory, make_history
+from .dwell import DwellSketch
+from .journal import EventJournal
+from .section_window import SectionEntryWindow
+from .track_table import TRACK_TTL_SEC, TrackTable
+
+
+@dataclass(frozen=True)
+class SectionView:
+    name: str
+    current_count: int
+    peak: int
+    recent_entries: int
+    # finished visits in the section window and their durations in seconds
+    visits: int = 0
+    mean_dwell_sec: float = 0.0
+    p50_dwell_sec: float = 0.0
+    p90_dwell_sec: float = 0.0
+
+
+@dataclass(frozen=True)
+class StateSnapshot:
+    version: int
+    total_entries: int
+    total_exits: int
+    current_inside: int
+    last_update_ts: float
+    # alert dicts are never mutated after AlertEngine creates them, so sharing them is safe
+    alerts: Tuple[Dict[str, Any], ...]
+    sections: Tuple[SectionView, ...]
+
+
+EMPTY_SNAPSHOT = StateSnapshot(
+    version=0, total_entries=0, total_exits=0, current_inside=0, last_update_ts=0.0, alerts=(), sections=()
+)
+
 
 class StateStore:
-    def __init__(self) -> None:
+    def __init__(self, track_ttl_sec: float = TRACK_TTL_SEC) -> None:
         self.total_entries: int = 0
         self.total_exits: int = 0
         self.current_inside: int = 0
@@ -17,10 +63,24 @@ class StateStore:
         self.last_image: Optional[str] = None
         self.pipeline_running: bool = False
         self.sections: Dict[str, Dict[str, Any]] = {}
-        self.section_history: List[Any] = []
-        self.track_last_zone: Dict[int, Optional[str]] = {}
+        self.section_history: Optional[OccupancyHistory] = None
+        # per-track last zone / first and last seen / centroid, evicted after track_ttl_sec unseen
+        self.tracks = TrackTable(track_ttl_sec, on_leave=self.record_dwell)
         self.last_total: int = 0
         self.last_alert_ts_by_type: Dict[str, float] = {}
+        # bumped by publish() only when the published content changed; readers use it to detect changes
+        # (last_update_ts, by contrast, advances every processed frame and serves as the heartbeat)
+        self.version: int = 0
+        self._snapshot: StateSnapshot = EMPTY_SNAPSHOT
+        self.journal: Optional[EventJournal] = None
+        self.camera_id: str = "main"
+
+    def attach_journal(self, journal: EventJournal, camera_id: str) -> None:
+        self.journal = journal
+        self.camera_id = camera_id
+        self.total_entries, self.total_exits = journal.load_counters(camera_id)
+        self.alerts = journal.recent_alerts(camera_id)
+        self.publish()
 
     def mark_running(self, flag: bool) -> None:
         self.pipeline_running = flag
@@ -30,22 +90,90 @@ class StateStore:
 
     def set_sections(self, sections: Dict[str, Dict[str, Any]]) -> None:
         self.sections = sections
-        self.track_last_zone = {}
+        self.tracks.clear()
+
+    def init_sections(self, names: Iterable[str]) -> None:
+        names = list(names)
+        self.set_sections({
+            name: {"current_count": 0, "peak": 0, "enter_events": SectionEntryWindow(), "dwell": DwellSketch()}
+            for name in names
+        })
+        self.section_history = make_history(names)
+
+    def record_dwell(self, name: str, dwell_sec: float, now: float) -> None:
+        s = self.sections.get(name)
+        if s is not None and "dwell" in s:
+            s["dwell"].add(dwell_sec, now)
 
     def update_counts(self, current_total: int) -> None:
         self.current_inside = current_total
         self.last_total = current_total
         self.last_update_ts = time.time()
 
-    def increment_entry(self) -> None:
+    def increment_entry(self, ts: Optional[float] = None) -> None:
         self.total_entries += 1
+        if self.journal is not None:
+            self.journal.record_crossing(self.camera_id, "entry", time.time() if ts is None else ts)
 
-    def increment_exit(self) -> None:
+    def increment_exit(self, ts: Optional[float] = None) -> None:
         self.total_exits += 1
+        if self.journal is not None:
+            self.journal.record_crossing(self.camera_id, "exit", time.time() if ts is None else ts)
 
     def add_alerts(self, new_alerts: List[Dict[str, Any]], max_keep: int = 3) -> None:
         if new_alerts:
             self.alerts = (self.alerts + new_alerts)[-max_keep:]
+            if self.journal is not None:
+                for alert in new_alerts:
+                    self.journal.record_alert(self.camera_id, alert)
+
+    def publish(self, force: bool = False) -> StateSnapshot:
+        """Freeze the current state into a new snapshot if it changed; force for state kept outside the store."""
+        prev = self._snapshot
+        alerts = tuple(self.alerts)
+        sections = tuple(self._section_view(name, s) for name, s in self.sections.items())
+        if (
+            force
+            or not prev.version
+            or prev.total_entries != self.total_entries
+            or prev.total_exits != self.total_exits
+            or prev.current_inside != self.current_inside
+            or prev.alerts != alerts
+            or prev.sections != sections
+        ):
+            self.version += 1
+            self._snapshot = StateSnapshot(
+                version=self.version,
+                total_entries=self.total_entries,
+                total_exits=self.total_exits,
+                current_inside=self.current_inside,
+                last_update_ts=self.last_update_ts,
+                alerts=alerts,
+                sections=sections,
+            )
+        snapshot = self._snapshot
+        if self.section_history is not None and self.last_update_ts:
+            counts = [v.current_count for v in sections] + [self.current_inside]
+            self.section_history.record(self.last_update_ts, counts)
+        return snapshot
+
+    @staticmethod
+    def _section_view(name: str, s: Dict[str, Any]) -> SectionView:
+        dwell = s.get("dwell")
+        summary = dwell.summary() if dwell is not None else {}
+        return SectionView(
+            name=name,
+            current_count=s.get("current_count", 0),
+            peak=s.get("peak", 0),
+            recent_entries=len(s.get("enter_events") or ()),
+            visits=summary.get("visits", 0),
+            mean_dwell_sec=summary.get("mean_sec", 0.0),
+            p50_dwell_sec=summary.get("p50_sec", 0.0),
+            p90_dwell_sec=summary.get("p90_sec", 0.0),
+        )
+
+    def snapshot(self) -> StateSnapshot:
+        return self._snapshot
 
     def sections_snapshot(self) -> Dict[str, Dict[str, Any]]:
         return self.sections
@@ -1,16 +1,26 @@
 """
 section statistics and summaries
-preserves original logic for avg wait approximation and busiest section
+wait times are the durations of visits that finished in the section window, read from the per-section
+dwell sketch in the published snapshot: rolling mean plus approximate p50/p90, in minutes
+busiest section logic is unchanged
 """
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 
+from .section_window import SECTION_WAIT_WINDOW_SEC
+
+
+STABLE_ACTION = "الوضع مستقر، لا توجد إجراءات عاجلة حاليًا."
+
 
 class SectionStatus(BaseModel):
     name: str
     current_count: int
     avg_wait_min: float
     peak_occupancy: int
+    p50_wait_min: float = 0.0
+    p90_wait_min: float = 0.0
+    completed_visits: int = 0
 
 
 class SectionSummary(BaseModel):
@@ -25,31 +35,29 @@ class SuggestedActions(BaseModel):
 class SectionStatistics:
     def __init__(self, state_store) -> None:
         self.state = state_store
-        self.SECTION_WAIT_WINDOW_SEC = 5 * 60
+        self.SECTION_WAIT_WINDOW_SEC = SECTION_WAIT_WINDOW_SEC
 
-        def build_section_summary(self, now: float) -> SectionSummary:
-        sections_state = self.state.sections
+    def build_section_summary(self, now: float, snapshot=None) -> SectionSummary:
+        if snapshot is None:
+            snapshot = self.state.snapshot()
         section_status_list: List[SectionStatus] = []
         busiest = None
         busiest_count = -1
 
-        for name, s in sections_state.items():
-            events = s.get("enter_events", [])
-            if not events:
-                avg_wait = 0.0
-            else:
-                avg_wait = self.SECTION_WAIT_WINDOW_SEC / 120.0  # ~2.5 min
-
+        for s in snapshot.sections:
             section_status_list.append(SectionStatus(
-                name=name,
-                current_count=s.get("current_count", 0),
-                avg_wait_min=round(avg_wait, 1),
-                peak_occupancy=s.get("peak", 0)
+                name=s.name,
+                current_count=s.current_count,
+                avg_wait_min=round(s.mean_dwell_sec / 60.0, 1),
+                peak_occupancy=s.peak,
+                p50_wait_min=round(s.p50_dwell_sec / 60.0, 1),
+                p90_wait_min=round(s.p90_dwell_sec / 60.0, 1),
+                completed_visits=s.visits,
             ))
 
-            if s.get("current_count", 0) > busiest_count:
-                busiest_count = s["current_count"]
-                busiest = name
+            if s.current_count > busiest_count:
+                busiest_count = s.current_count
+                busiest = s.name
 
         return SectionSummary(
             busiest_section=busiest,
@@ -68,6 +76,6 @@ class SectionStatistics:
             if s.name == "Exit" and s.current_count >= 5:
                 actions.append("حركة الخروج عالية؛ تأكد من انسيابية الممرات وعدم وجود عوائق.")
         if not actions:
-            actions.append("الوضع مستقر، لا توجد إجراءات عاجلة حاليًا.")
+            actions.append(STABLE_ACTION)
         return SuggestedActions(actions=actions)
 
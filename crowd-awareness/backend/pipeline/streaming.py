@@ -0,0 +1,67 @@
+"""
+mjpeg fan-out: one producer task per stream pulls at most max_fps encoded frames from a
+snapshot source and hands the same bytes to every connected viewer
+viewers only ever see the newest frame, so a slow client skips frames instead of queueing them
+a failing snapshot source is logged and retried on the next tick; the producer only stops with its last viewer
+"""
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Optional, Tuple
+
+from anyio import to_thread
+
+BOUNDARY = "frame"
+
+logger = logging.getLogger(__name__)
+
+
+class MjpegBroadcaster:
+    def __init__(self, source: Callable[[], Tuple[int, Optional[bytes]]], max_fps: float = 5.0) -> None:
+        self.source = source
+        self.interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.frame: Tuple[int, Optional[bytes]] = (-1, None)
+        self.viewers = 0
+        self.cond: Optional[asyncio.Condition] = None
+        self.task: Optional[asyncio.Task] = None
+        self.errors = 0
+
+    @property
+    def media_type(self) -> str:
+        return f"multipart/x-mixed-replace; boundary={BOUNDARY}"
+
+    async def _produce(self) -> None:
+        try:
+            while self.viewers > 0:
+                try:
+                    version, jpeg = await to_thread.run_sync(self.source)
+                except Exception:
+                    self.errors += 1
+                    logger.exception("mjpeg snapshot source failed")
+                    version, jpeg = self.frame[0], None
+                if jpeg is not None and version != self.frame[0]:
+                    self.frame = (version, jpeg)
+                    async with self.cond:
+                        self.cond.notify_all()
+                await asyncio.sleep(self.interval)
+        finally:
+            self.task = None
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        if self.cond is None:
+            self.cond = asyncio.Condition()
+        self.viewers += 1
+        if self.task is None:
+            self.task = asyncio.create_task(self._produce())
+        last = -1
+        try:
+            while True:
+                async with self.cond:
+                    await self.cond.wait_for(lambda: self.frame[0] != last)
+                last, jpeg = self.frame
+                yield (
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+                    + jpeg
+                    + b"\r\n"
+                )
+        finally:
+            self.viewers -= 1
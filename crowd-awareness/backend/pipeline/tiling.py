@@ -0,0 +1,175 @@
+"""
+region-of-interest and tiled inference for high-resolution cameras
+RoiDetector wraps any detector (YOLO, ONNX, a batcher client) and only sends it the bounding box of the
+configured zones instead of the whole frame; walls and ceilings outside every zone are never resized or inferred
+tiled mode additionally cuts that ROI into overlapping tile_size squares, runs them as one batch and merges
+the boxes back with NMS on intersection-over-smaller, so a person split by a tile seam is reported once
+tiles are taken at source resolution, so small far-away people keep their pixels; raise tile_size to trade
+recall for fewer tiles (a 4K ROI at tile_size 1280 is 4x2 tiles, each downscaled 2x by the detector)
+"""
+import math
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+import supervision as sv
+
+from .zones import ZoneManager
+
+Box = Tuple[int, int, int, int]
+
+
+def zones_roi(zone_manager: ZoneManager, frame_shape: Tuple[int, int], margin: float = 0.05) -> Optional[Box]:
+    """Union of the zone polygons' bounding boxes, grown by `margin` of the frame size and clipped."""
+    if not zone_manager.zones:
+        return None
+    points = np.concatenate([z.polygon.reshape(-1, 2) for z in zone_manager.zones.values()])
+    h, w = frame_shape
+    mx, my = int(w * margin), int(h * margin)
+    x0, y0 = points.min(axis=0)
+    x1, y1 = points.max(axis=0)
+    return max(0, int(x0) - mx), max(0, int(y0) - my), min(w, int(x1) + mx), min(h, int(y1) + my)
+
+
+def _axis_starts(length: int, tile: int, overlap: float) -> List[int]:
+    if length <= tile:
+        return [0]
+    step = tile * (1.0 - overlap)
+    n = math.ceil((length - tile) / step) + 1
+    # spread the tiles evenly so the last one ends exactly on the edge
+    return [round(i * (length - tile) / (n - 1)) for i in range(n)]
+
+
+def tile_grid(roi: Box, tile_size: int = 640, overlap: float = 0.2) -> List[Box]:
+    x0, y0, x1, y1 = roi
+    return [
+        (x0 + tx, y0 + ty, min(x1, x0 + tx + tile_size), min(y1, y0 + ty + tile_size))
+        for ty in _axis_starts(y1 - y0, tile_size, overlap)
+        for tx in _axis_starts(x1 - x0, tile_size, overlap)
+    ]
+
+
+def merge_detections(parts: Sequence[Tuple[sv.Detections, Tuple[int, int]]], ios_threshold: float = 0.6) -> sv.Detections:
+    """
+    Shift per-tile detections into frame coordinates and merge seam duplicates; confidence, class_id and
+    data (e.g. class_name) follow the box that is kept.
+    greedy by confidence: boxes from *other* tiles that lie mostly inside the kept box (intersection over the
+    smaller area > ios_threshold) are folded into it and the kept box grows to their union, so a person cut by a
+    seam comes back whole; boxes of the same tile were already NMSed by the detector and are left alone
+    """
+    shifted, tiles = [], []
+    for tile, (detections, (ox, oy)) in enumerate(parts):
+        if len(detections):
+            shifted.append(sv.Detections(
+                xyxy=detections.xyxy + np.array([ox, oy, ox, oy], dtype=detections.xyxy.dtype),
+                confidence=detections.confidence,
+                class_id=detections.class_id,
+                data=detections.data,
+            ))
+            tiles.append(np.full(len(detections), tile))
+    if not shifted:
+        return sv.Detections.empty()
+    merged = sv.Detections.merge(shifted)
+    if len(shifted) == 1:
+        return merged
+
+    tile_of = np.concatenate(tiles)
+    xyxy = merged.xyxy.astype(np.float64)
+    scores = merged.confidence if merged.confidence is not None else np.ones(len(merged))
+    areas = (xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1])
+    order = np.argsort(-scores, kind="stable")
+    keep: List[int] = []
+    out = merged.xyxy.copy()
+    while order.size:
+        i = order[0]
+        keep.append(int(i))
+        box, rest = xyxy[i].copy(), order[1:]
+        # repeat while the box grows: a tall person can be cut into three pieces by two seams
+        while rest.size:
+            tl = np.maximum(box[:2], xyxy[rest, :2])
+            br = np.minimum(box[2:], xyxy[rest, 2:])
+            inter = np.prod(np.clip(br - tl, 0, None), axis=1)
+            area = (box[2] - box[0]) * (box[3] - box[1])
+            # a box cut by a seam lies mostly inside the whole one, which plain IoU would not catch
+            ios = inter / np.maximum(np.minimum(area, areas[rest]), 1e-9)
+            folded = (ios > ios_threshold) & (tile_of[rest] != tile_of[i])
+            if not folded.any():
+                break
+            group = xyxy[rest[folded]]
+            box[:2] = np.minimum(box[:2], group[:, :2].min(axis=0))
+            box[2:] = np.maximum(box[2:], group[:, 2:].max(axis=0))
+            rest = rest[~folded]
+        out[i] = box
+        order = rest
+    keep_idx = np.sort(np.asarray(keep))
+    result = merged[keep_idx]
+    result.xyxy = out[keep_idx]
+    return result
+
+
+class RoiDetector:
+    def __init__(
+        self,
+        detector,
+        zone_manager: ZoneManager,
+        tiled: bool = False,
+        tile_size: int = 640,
+        overlap: float = 0.2,
+        margin: float = 0.05,
+        ios_threshold: float = 0.6,
+    ) -> None:
+        """zone_manager is read lazily, so it may be initialised after this wrapper is built."""
+        self.detector = detector
+        self.zone_manager = zone_manager
+        self.tiled = tiled
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.margin = margin
+        self.ios_threshold = ios_threshold
+        self._layout_key: Optional[Tuple[Any, ...]] = None
+        self._layout: List[Box] = []
+
+    @property
+    def max_batch_size(self) -> int:
+        return getattr(self.detector, "max_batch_size", 1)
+
+    @property
+    def max_wait_ms(self) -> float:
+        return getattr(self.detector, "max_wait_ms", 0.0)
+
+    def layout(self, frame_shape: Tuple[int, int]) -> List[Box]:
+        """Crop boxes for a frame of this size; recomputed only when the size or the zones change."""
+        key = (frame_shape, id(self.zone_manager.label_map))
+        if key != self._layout_key:
+            h, w = frame_shape
+            roi = zones_roi(self.zone_manager, frame_shape, self.margin) or (0, 0, w, h)
+            self._layout = tile_grid(roi, self.tile_size, self.overlap) if self.tiled else [roi]
+            self._layout_key = key
+        return self._layout
+
+    def _run(self, crops: List[np.ndarray], imgsz: Optional[int]) -> List[sv.Detections]:
+        if hasattr(self.detector, "detect_people_batch"):
+            return self.detector.detect_people_batch(crops, imgsz)
+        return [self.detector.detect_people(crop, imgsz=imgsz) for crop in crops]
+
+    def detect_people(self, frame: np.ndarray, imgsz: Optional[int] = None) -> sv.Detections:
+        return self.detect_people_batch([frame], imgsz)[0]
+
+    def detect_people_batch(self, frames: Sequence[np.ndarray], imgsz: Optional[int] = None) -> List[sv.Detections]:
+        """Every crop of every frame goes to the wrapped detector in one batch."""
+        crops: List[np.ndarray] = []
+        owners: List[Tuple[int, Tuple[int, int]]] = []
+        for index, frame in enumerate(frames):
+            for x0, y0, x1, y1 in self.layout(frame.shape[:2]):
+                # views, not copies; the detector's own resize/letterbox makes the contiguous copy
+                crops.append(frame[y0:y1, x0:x1])
+                owners.append((index, (x0, y0)))
+        results = self._run(crops, imgsz)
+        per_frame: List[List[Tuple[sv.Detections, Tuple[int, int]]]] = [[] for _ in frames]
+        for (index, offset), detections in zip(owners, results):
+            per_frame[index].append((detections, offset))
+        return [merge_detections(parts, self.ios_threshold) for parts in per_frame]
+
+    def close(self) -> None:
+        close = getattr(self.detector, "close", None)
+        if close is not None:
+            close()
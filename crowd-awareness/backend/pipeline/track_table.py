@@ -0,0 +1,127 @@
+"""
+per-track state for movement analysis: last zone, first/last seen and last centroid per ByteTrack id
+records are __slots__ objects in an OrderedDict kept in last-seen order, so evicting tracks that have not
+been seen for ttl_sec only ever looks at the front; ByteTrack ids are never reused, which makes a dead id
+safe to forget once it is older than the tracker's own lost-track buffer
+memory stays proportional to the tracks seen within one TTL, however long the pipeline runs
+each record also tracks the zone visit used for dwell times: a move to another zone only ends the visit
+once the track has stayed there for settle_sec, so single-frame flicker at a zone boundary neither closes
+a visit nor opens a near-zero one; a visit ends when a new zone settles or the track is evicted, and
+on_leave(zone, dwell_sec, now) gets the time between its first and last sighting in the zone
+entry/exit counting still uses the raw per-frame zone returned by update()
+"""
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+TRACK_TTL_SEC = 60.0
+ZONE_SETTLE_SEC = 1.0
+
+LeaveCallback = Callable[[str, float, float], None]
+
+
+class TrackRecord:
+    __slots__ = (
+        "zone", "first_seen", "last_seen", "cx", "cy",
+        "visit_zone", "visit_since", "visit_last", "pending_zone", "pending_since",
+    )
+
+    def __init__(self, zone: Optional[str], now: float, cx: int, cy: int) -> None:
+        self.zone = zone
+        self.visit_zone = zone
+        self.visit_since = now
+        self.visit_last = now
+        self.pending_zone: Optional[str] = None
+        self.pending_since = now
+        self.first_seen = now
+        self.last_seen = now
+        self.cx = cx
+        self.cy = cy
+
+
+class TrackTable:
+    def __init__(
+        self,
+        ttl_sec: float = TRACK_TTL_SEC,
+        on_leave: Optional[LeaveCallback] = None,
+        settle_sec: float = ZONE_SETTLE_SEC,
+    ) -> None:
+        self.ttl_sec = ttl_sec
+        self.on_leave = on_leave
+        self.settle_sec = settle_sec
+        self.records: "OrderedDict[int, TrackRecord]" = OrderedDict()
+        self.evicted = 0
+
+    def get(self, tid: int) -> Optional[TrackRecord]:
+        return self.records.get(tid)
+
+    def zone_of(self, tid: int) -> Optional[str]:
+        record = self.records.get(tid)
+        return record.zone if record is not None else None
+
+    def update(self, tid: int, zone: Optional[str], now: float, cx: int, cy: int) -> Optional[str]:
+        """Record a sighting and return the zone the track was last seen in (None for a new track)."""
+        record = self.records.get(tid)
+        if record is None:
+            self.records[tid] = TrackRecord(zone, now, cx, cy)
+            return None
+        prev = record.zone
+        record.zone = zone
+        record.last_seen = now
+        self._update_visit(record, zone, now)
+        record.cx = cx
+        record.cy = cy
+        self.records.move_to_end(tid)
+        return prev
+
+    def _update_visit(self, record: TrackRecord, zone: Optional[str], now: float) -> None:
+        if zone == record.visit_zone:
+            record.visit_last = now
+            record.pending_zone = None
+            return
+        if zone != record.pending_zone:
+            record.pending_zone = zone
+            record.pending_since = now
+        if now - record.pending_since < self.settle_sec:
+            return
+        # the new zone held long enough: the old visit ends at the last sighting inside it
+        if record.visit_zone is not None and self.on_leave is not None:
+            self.on_leave(record.visit_zone, record.visit_last - record.visit_since, now)
+        record.visit_zone = zone
+        record.visit_since = record.pending_since
+        record.visit_last = now
+        record.pending_zone = None
+
+    def evict(self, now: float) -> int:
+        """Forget tracks not seen for more than ttl_sec; returns how many were dropped."""
+        records = self.records
+        cutoff = now - self.ttl_sec
+        dropped = 0
+        while records:
+            tid, record = next(iter(records.items()))
+            if record.last_seen >= cutoff:
+                break
+            del records[tid]
+            if record.visit_zone is not None and self.on_leave is not None:
+                self.on_leave(record.visit_zone, record.visit_last - record.visit_since, now)
+            dropped += 1
+        self.evicted += dropped
+        return dropped
+
+    def clear(self) -> None:
+        """Drop every track (zones changed) without closing their visits; the eviction counter keeps running."""
+        self.records = OrderedDict()
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the table (container plus records)."""
+        per_record = sys.getsizeof(TrackRecord(None, 0.0, 0, 0))
+        return sys.getsizeof(self.records) + per_record * len(self.records)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"tracks": len(self.records), "evicted": self.evicted, "ttl_sec": self.ttl_sec}
+
+    def __contains__(self, tid: object) -> bool:
+        return tid in self.records
+
+    def __len__(self) -> int:
+        return len(self.records)
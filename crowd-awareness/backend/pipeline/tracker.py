@@ -1,14 +1,67 @@
 """
 byetrack wrapper for person tracking
 keeps tracker internal, exposes track(detections) -> tracked detections
+predict() extrapolates the last tracked boxes for frames where detection was skipped and marks them
+with data["predicted"], so the line counter can refuse them
+ByteTrack appends every removed track to removed_tracks forever; track() trims it after each update
 """
+from typing import Dict, Optional
+
+import numpy as np
 import supervision as sv
 
+PREDICTED = "predicted"
+
 
 class PersonTracker:
     def __init__(self) -> None:
         self.tracker = sv.ByteTrack()
+        self.last_tracked: Optional[sv.Detections] = None
+        self.velocity: Dict[int, np.ndarray] = {}  # xyxy change per frame, per track id
+        self.frames_since_update = 0
 
     def track(self, detections: sv.Detections) -> sv.Detections:
-        return self.tracker.update_with_detections(detections)
+        tracked = self.tracker.update_with_detections(detections)
+        self._prune_removed()
+        self._update_motion(tracked)
+        return tracked
+
+    def _prune_removed(self) -> None:
+        # removed_tracks only serves to drop just-removed tracks from lost_tracks on the next update;
+        # anything no longer lost can go, which bounds the list by the lost-track buffer
+        tracker = self.tracker
+        if tracker.removed_tracks:
+            lost = {t.track_id for t in tracker.lost_tracks}
+            tracker.removed_tracks = [t for t in tracker.removed_tracks if t.track_id in lost]
+
+    def _update_motion(self, tracked: sv.Detections) -> None:
+        gap = self.frames_since_update + 1
+        prev: Dict[int, np.ndarray] = {}
+        last = self.last_tracked
+        if last is not None and last.tracker_id is not None:
+            prev = {int(t): box for t, box in zip(last.tracker_id, last.xyxy)}
+        velocity: Dict[int, np.ndarray] = {}
+        if tracked.tracker_id is not None:
+            for tid, box in zip(tracked.tracker_id, tracked.xyxy):
+                old = prev.get(int(tid))
+                if old is not None:
+                    velocity[int(tid)] = (box - old) / gap
+        self.velocity = velocity
+        self.last_tracked = tracked
+        self.frames_since_update = 0
 
+    def predict(self) -> sv.Detections:
+        """Advance the last tracked boxes one frame at constant velocity without touching ByteTrack."""
+        self.frames_since_update += 1
+        last = self.last_tracked
+        if last is None or len(last) == 0 or last.tracker_id is None:
+            return last if last is not None else sv.Detections.empty()
+        zero = np.zeros(4, dtype=np.float32)
+        shift = np.array([self.velocity.get(int(t), zero) for t in last.tracker_id], dtype=np.float32)
+        return sv.Detections(
+            xyxy=last.xyxy + shift * self.frames_since_update,
+            confidence=last.confidence,
+            class_id=last.class_id,
+            tracker_id=last.tracker_id,
+            data={PREDICTED: np.ones(len(last), dtype=bool)},
+        )
@@ -1,10 +1,15 @@
+import threading
 import time
+from collections import deque
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 
 import cv2
+import numpy as np
 
-BASE_DIR = Path(__file__).resolve().parents[1]
+from .ffmpeg_capture import FfmpegCapture, scaled_size
+
+BASE_DIR = Path(__file__).resolve().parent
 VIDEO_PATH = BASE_DIR / "assets" / "videos" / "PeopleWalking2.mp4"
 
 def get_video_capture():
@@ -70,29 +75,275 @@ def get_video_capture():
 # Active implementation
 DEFAULT_VIDEO = VIDEO_PATH
 
+# prefetch policies: "latest" drops the oldest buffered frames so the consumer
+# always sees the newest one (live cameras), "block" never drops and makes the
+# decoder wait for a free slot instead (files, where every frame matters)
+POLICY_LATEST = "latest"
+POLICY_BLOCK = "block"
+
+# decoder backends: OpenCV's VideoCapture, or an ffmpeg subprocess that scales while decoding
+DECODER_OPENCV = "opencv"
+DECODER_FFMPEG = "ffmpeg"
+
+
+def is_live_source(source: Any) -> bool:
+    """True for camera indices and network streams, False for files."""
+    text = str(source)
+    return text.isdigit() or text.startswith(("rtsp://", "rtmp://", "http://", "https://"))
+
+
+class FramePrefetcher:
+    """
+    Decodes frames on a dedicated thread into a bounded ring of reused buffers.
+
+    The frame returned by read() stays valid until the next read() call;
+    after that its slot goes back to the decoder and will be overwritten.
+    """
+
+    def __init__(
+        self,
+        read_into: Callable[[Optional[np.ndarray]], Tuple[bool, Optional[np.ndarray]]],
+        slots: int = 4,
+        policy: str = POLICY_LATEST,
+    ) -> None:
+        if slots < 2:
+            raise ValueError("prefetch ring needs at least 2 slots")
+        if policy not in (POLICY_LATEST, POLICY_BLOCK):
+            raise ValueError(f"unknown prefetch policy: {policy}")
+        self.read_into = read_into
+        self.policy = policy
+        self.slots = slots
+        self.buffers: List[Optional[np.ndarray]] = [None] * slots
+        self.free: Deque[int] = deque(range(slots))
+        self.ready: Deque[Tuple[int, float]] = deque()
+        self.held: Optional[int] = None
+        self.cond = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+        self.stopped = False
+        self.eof = False
+        # set by the decoder thread on its way out; on_exit runs after that when stop() gave up waiting
+        self.exited = False
+        self.on_exit: Optional[Callable[[], None]] = None
+
+        self.frames_decoded = 0
+        self.frames_dropped = 0
+        self.decode_fps = 0.0
+        self.last_frame_ts = 0.0
+        self._fps_window_start = 0.0
+        self._fps_window_count = 0
+
+    def start(self) -> None:
+        if self.thread is not None:
+            return
+        self._fps_window_start = time.perf_counter()
+        self.thread = threading.Thread(target=self._decode_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 2.0, on_exit: Optional[Callable[[], None]] = None) -> bool:
+        """Stop decoding; returns False if the thread is still inside a read after timeout.
+
+        In that case on_exit (e.g. releasing the capture) runs on the decoder thread once the read returns,
+        so nothing is released under an active read.
+        """
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        thread = self.thread
+        if thread is None or thread is threading.current_thread():
+            return True
+        thread.join(timeout)
+        with self.cond:
+            if not self.exited:
+                self.on_exit = on_exit
+                return False
+        self.thread = None
+        return True
+
+    def _take_slot(self) -> Optional[int]:
+        with self.cond:
+            while not self.free and self.policy == POLICY_BLOCK and not self.stopped:
+                self.cond.wait()
+            if self.stopped:
+                return None
+            if self.free:
+                return self.free.popleft()
+            # latest policy with a full ring: overwrite the oldest unread frame
+            slot, _ = self.ready.popleft()
+            self.frames_dropped += 1
+            return slot
+
+    def _decode_loop(self) -> None:
+        try:
+            while True:
+                slot = self._take_slot()
+                if slot is None:
+                    return
+                ok, frame = self.read_into(self.buffers[slot])
+                now = time.time()
+                with self.cond:
+                    if not ok or frame is None:
+                        self.free.append(slot)
+                        self.eof = True
+                        self.cond.notify_all()
+                        return
+                    # first frame (or a resolution change) allocates; later reads reuse the buffer
+                    self.buffers[slot] = frame
+                    self.ready.append((slot, now))
+                    self.frames_decoded += 1
+                    self._tick_fps()
+                    self.cond.notify_all()
+        finally:
+            with self.cond:
+                self.exited = True
+                on_exit = self.on_exit
+            if on_exit is not None:
+                on_exit()
+
+    def _tick_fps(self) -> None:
+        self._fps_window_count += 1
+        t = time.perf_counter()
+        elapsed = t - self._fps_window_start
+        if elapsed >= 1.0:
+            self.decode_fps = self._fps_window_count / elapsed
+            self._fps_window_start = t
+            self._fps_window_count = 0
+
+    def read(self, timeout: Optional[float] = 5.0):
+        """Return (ok, frame); ok is False at end of stream or on timeout."""
+        with self.cond:
+            if self.held is not None:
+                self.free.append(self.held)
+                self.held = None
+                self.cond.notify_all()
+
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self.ready and not self.eof and not self.stopped:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+            if not self.ready:
+                return False, None
+
+            if self.policy == POLICY_LATEST:
+                while len(self.ready) > 1:
+                    stale, _ = self.ready.popleft()
+                    self.free.append(stale)
+                    self.frames_dropped += 1
+            slot, ts = self.ready.popleft()
+            self.held = slot
+            self.last_frame_ts = ts
+            self.cond.notify_all()
+            return True, self.buffers[slot]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "slots": self.slots,
+            "buffered": len(self.ready),
+            "frames_decoded": self.frames_decoded,
+            "frames_dropped": self.frames_dropped,
+            "decode_fps": round(self.decode_fps, 1),
+        }
+
 
 class VideoSource:
     """
     Wrapper around OpenCV VideoCapture with simple restart handling.
     Accepts file paths or camera indices.
+    With prefetch=True decoding moves to a FramePrefetcher thread; drop_policy
+    defaults to "latest" for live sources and "block" for files.
+    decode_width shrinks frames (aspect kept) before the pipeline sees them. decoder="ffmpeg" does that
+    inside an ffmpeg subprocess for files and network streams; camera indices, a missing ffmpeg binary or
+    a stream ffmpeg cannot open fall back to OpenCV plus cv2.resize, so frame size is the same either way.
     """
 
-    def __init__(self, source: Any = None) -> None:
+    def __init__(
+        self,
+        source: Any = None,
+        prefetch: bool = False,
+        prefetch_slots: int = 4,
+        drop_policy: Optional[str] = None,
+        decoder: str = DECODER_OPENCV,
+        decode_width: Optional[int] = None,
+    ) -> None:
+        # set before validating so release() from __del__ works on a half-built source
+        self.cap: Any = None
+        self.prefetcher: Optional[FramePrefetcher] = None
+        if decoder not in (DECODER_OPENCV, DECODER_FFMPEG):
+            raise ValueError(f"unknown video decoder: {decoder}")
         self.source = str(source) if source is not None else str(DEFAULT_VIDEO)
-        self.cap: Optional[cv2.VideoCapture] = None
+        self.decoder = decoder
+        self.decode_width = decode_width
+        # decoder actually in use after open(); differs from decoder when ffmpeg fell back
+        self.active_decoder: Optional[str] = None
+        self.prefetch = prefetch
+        self.prefetch_slots = prefetch_slots
+        if drop_policy is None:
+            drop_policy = POLICY_LATEST if is_live_source(self.source) else POLICY_BLOCK
+        self.drop_policy = drop_policy
+        # how long release/restart wait for the decoder thread before handing it the capture
+        self.stop_timeout_sec = 2.0
+        self.last_frame_ts = 0.0
 
     def open(self) -> bool:
         """Open (or reopen) the video source."""
+        self._stop_prefetch()
         if self.cap is not None:
             self.cap.release()
-        self.cap = cv2.VideoCapture(self.source)
-        return self.cap.isOpened()
+        self.cap = None
+        if self.decoder == DECODER_FFMPEG and not self.source.isdigit():
+            cap = FfmpegCapture(self.source, self.decode_width, live=is_live_source(self.source))
+            if cap.isOpened():
+                self.cap = cap
+                self.active_decoder = DECODER_FFMPEG
+            else:
+                cap.release()
+        if self.cap is None:
+            target: Any = int(self.source) if self.source.isdigit() else self.source
+            self.cap = cv2.VideoCapture(target)
+            self.active_decoder = DECODER_OPENCV
+        if not self.cap.isOpened():
+            return False
+        if self.prefetch:
+            self.prefetcher = FramePrefetcher(self.read_into, self.prefetch_slots, self.drop_policy)
+            self.prefetcher.start()
+        return True
 
     def read(self):
-        """Read a frame; returns (ok, frame)."""
+        """Read a frame; returns (ok, frame). last_frame_ts is the wall time the frame was decoded."""
+        if self.prefetcher is not None:
+            ok, frame = self.prefetcher.read()
+            self.last_frame_ts = self.prefetcher.last_frame_ts
+            return ok, frame
         if self.cap is None:
             return False, None
-        return self.cap.read()
+        ok, frame = self.read_into(None)
+        self.last_frame_ts = time.time()
+        return ok, frame
+
+    def read_into(self, image: Optional[np.ndarray] = None):
+        """Decode the next frame, at decode_width if set, into image when it has the right shape."""
+        if self.active_decoder == DECODER_FFMPEG or not self.decode_width:
+            return self.cap.read(image)
+        native = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
+        if native and self.decode_width >= native:
+            # nothing to shrink: decode straight into the caller's buffer
+            return self.cap.read(image)
+        ok, frame = self.cap.read()
+        if not ok or frame is None:
+            return ok, frame
+        h, w = frame.shape[:2]
+        size = scaled_size(w, h, self.decode_width)
+        if size == (w, h):
+            if image is not None and image.shape == frame.shape and image.dtype == frame.dtype:
+                np.copyto(image, frame)
+                return ok, image
+            return ok, frame
+        if image is None or image.shape[:2] != (size[1], size[0]) or image.shape[2:] != frame.shape[2:]:
+            image = np.empty((size[1], size[0]) + frame.shape[2:], dtype=frame.dtype)
+        cv2.resize(frame, size, dst=image, interpolation=cv2.INTER_AREA)
+        return True, image
 
     def ensure(self) -> bool:
         """Ensure the capture handle is open."""
@@ -102,14 +353,36 @@ class VideoSource:
 
     def restart(self, delay_sec: float = 1.0) -> bool:
         """Restart the capture after a short delay."""
+        self._stop_prefetch()
         if self.cap:
             self.cap.release()
             self.cap = None
         time.sleep(delay_sec)
         return self.open()
 
+    def stats(self) -> Dict[str, Any]:
+        """Decoder counters; only the prefetch flag and active decoder when prefetch is off."""
+        if self.prefetcher is None:
+            return {"prefetch": False, "decoder": self.active_decoder}
+        return {"prefetch": True, "decoder": self.active_decoder, **self.prefetcher.stats()}
+
+    def _stop_prefetch(self) -> None:
+        # the decoder thread owns cap.read(), so it must stop before the cap is released
+        if self.prefetcher is None:
+            return
+        cap = self.cap
+        if not self.prefetcher.stop(self.stop_timeout_sec, on_exit=cap.release if cap is not None else None):
+            # still blocked in a read (stalled stream): the decoder thread now owns the capture and
+            # releases it when the read returns; an ffmpeg pipe is unblocked by ending the process
+            interrupt = getattr(cap, "interrupt", None)
+            if interrupt is not None:
+                interrupt()
+            self.cap = None
+        self.prefetcher = None
+
     def release(self) -> None:
         """Release resources."""
+        self._stop_prefetch()
         if self.cap:
             self.cap.release()
             self.cap = None
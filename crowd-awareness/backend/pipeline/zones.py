@@ -1,20 +1,32 @@
 """
 zone management: defines polygons and assigns sections
 keeps same geometry/behavior as original code
+init_zones also rasterizes every zone into a frame-sized label map so assigning
+all centroids to zones is a single numpy fancy-index instead of a polygon test per pair
+overlap precedence: where zones overlap, the zone defined first wins
 """
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+import cv2
 import numpy as np
 import supervision as sv
 
+NO_ZONE = 0
+
 
 class ZoneManager:
     def __init__(self) -> None:
         self.zones: Dict[str, sv.PolygonZone] = {}
+        self.zone_names: List[str] = []
+        # label_map[y, x] == i + 1 when pixel lies in zone_names[i], NO_ZONE otherwise
+        self.label_map: Optional[np.ndarray] = None
 
     def init_zones(self, frame_width: int, frame_height: int) -> Dict[str, sv.PolygonZone]:
         w, h = frame_width, frame_height
         zones: Dict[str, sv.PolygonZone] = {}
 
+        def make_zone(polygon):
+            return sv.PolygonZone(polygon=polygon, frame_resolution_wh=(w, h))
+
         def rect_to_polygon(x1, y1, x2, y2):
             return np.array([
                 [x1, y1],
@@ -25,26 +37,54 @@ class ZoneManager:
 
         desk_height = int(h * 0.25)
         desk_width = int(w / 3)
-        zones["Desk 1"] = sv.PolygonZone(polygon=rect_to_polygon(0, 0, desk_width, desk_height))
-        zones["Desk 2"] = sv.PolygonZone(polygon=rect_to_polygon(desk_width, 0, 2 * desk_width, desk_height))
-        zones["Desk 3"] = sv.PolygonZone(polygon=rect_to_polygon(2 * desk_width, 0, w, desk_height))
+        zones["Desk 1"] = make_zone(rect_to_polygon(0, 0, desk_width, desk_height))
+        zones["Desk 2"] = make_zone(rect_to_polygon(desk_width, 0, 2 * desk_width, desk_height))
+        zones["Desk 3"] = make_zone(rect_to_polygon(2 * desk_width, 0, w, desk_height))
 
         waiting_top = int(h * 0.35)
         waiting_bottom = int(h * 0.65)
-        zones["Waiting Area"] = sv.PolygonZone(polygon=rect_to_polygon(0, waiting_top, w, waiting_bottom))
+        zones["Waiting Area"] = make_zone(rect_to_polygon(0, waiting_top, w, waiting_bottom))
 
         door_top = int(h * 0.7)
         door_bottom = h
-        zones["Entrance"] = sv.PolygonZone(polygon=rect_to_polygon(int(w * 0.5), door_top, w, door_bottom))
-        zones["Exit"] = sv.PolygonZone(polygon=rect_to_polygon(0, door_top, int(w * 0.5), door_bottom))
+        zones["Entrance"] = make_zone(rect_to_polygon(int(w * 0.5), door_top, w, door_bottom))
+        zones["Exit"] = make_zone(rect_to_polygon(0, door_top, int(w * 0.5), door_bottom))
 
         self.zones = zones
+        self.rasterize(w, h)
         return zones
 
-    def point_zone(self, point, zones: Dict[str, sv.PolygonZone]) -> Optional[str]:
-        for section_name, zone in zones.items():
-            polygon = zone.polygon.astype(np.int32)
-            if sv.geometry.point_in_polygon(point, polygon):
-                return section_name
-        return None
+    def rasterize(self, frame_width: int, frame_height: int) -> np.ndarray:
+        """Paint all zones into a label map; painted in reverse so earlier zones end on top."""
+        self.zone_names = list(self.zones.keys())
+        dtype = np.uint8 if len(self.zone_names) < 255 else np.uint16
+        label_map = np.zeros((frame_height, frame_width), dtype=dtype)
+        for index in range(len(self.zone_names) - 1, -1, -1):
+            polygon = self.zones[self.zone_names[index]].polygon.astype(np.int32)
+            cv2.fillPoly(label_map, [polygon], color=index + 1)
+        self.label_map = label_map
+        return label_map
+
+    def lookup(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Zone labels for integer pixel coordinates; points outside the frame get NO_ZONE."""
+        labels = np.full(len(xs), NO_ZONE, dtype=np.int64)
+        if self.label_map is None or len(xs) == 0:
+            return labels
+        h, w = self.label_map.shape
+        inside = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+        labels[inside] = self.label_map[ys[inside], xs[inside]]
+        return labels
+
+    def label_name(self, label: int) -> Optional[str]:
+        return self.zone_names[label - 1] if label != NO_ZONE else None
+
+    def point_zone(self, point, zones: Optional[Dict[str, sv.PolygonZone]] = None) -> Optional[str]:
+        if zones is not None and zones is not self.zones:
+            for section_name, zone in zones.items():
+                polygon = zone.polygon.astype(np.int32)
+                if cv2.pointPolygonTest(polygon, (float(point[0]), float(point[1])), False) >= 0:
+                    return section_name
+            return None
+        label = self.lookup(np.array([int(point[0])]), np.array([int(point[1])]))[0]
+        return self.label_name(int(label))
 
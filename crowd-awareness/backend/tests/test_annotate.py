@@ -0,0 +1,73 @@
+"""Unit tests for the cached overlay layers of the frame annotator."""
+
+import cv2
+import numpy as np
+import supervision as sv
+
+from pipeline.annotate import FrameAnnotator, OverlayLayer
+from pipeline.zones import ZoneManager
+
+
+def reference_render(frame, tracked, zones, in_count, out_count):
+    """The per-frame supervision drawing the annotator used before overlays were cached."""
+    h, w, _ = frame.shape
+    scene = frame.copy()
+    scene = sv.BoxAnnotator().annotate(scene=scene, detections=tracked)
+    line = sv.LineZone(start=sv.Point(0, int(h * 0.5)), end=sv.Point(w, int(h * 0.5)))
+    line.in_count, line.out_count = in_count, out_count
+    scene = sv.LineZoneAnnotator(thickness=2, text_scale=0.6, text_thickness=1).annotate(frame=scene, line_counter=line)
+    for name, zone in zones.items():
+        annotator = sv.PolygonZoneAnnotator(zone=zone, color=sv.Color.RED, thickness=2, text_thickness=1, text_scale=0.5)
+        scene = annotator.annotate(scene=scene, label=name)
+    return scene
+
+
+def scene(seed=0):
+    rng = np.random.default_rng(seed)
+    return cv2.GaussianBlur(rng.integers(0, 256, (360, 640, 3), dtype=np.uint8), (9, 9), 0)
+
+
+def test_render_matches_per_frame_drawing():
+    """Test that compositing cached layers looks the same as redrawing every annotator."""
+    zones = ZoneManager().init_zones(640, 360)
+    tracked = sv.Detections(
+        xyxy=np.array([[300, 150, 340, 230], [50, 100, 90, 200]], dtype=np.float32),
+        confidence=np.array([0.9, 0.8], dtype=np.float32),
+        class_id=np.array([0, 0]),
+        tracker_id=np.array([1, 2]),
+    )
+    annotator = FrameAnnotator()
+    annotator.ensure_line(360, 640)
+    annotator.line_zone.in_count, annotator.line_zone.out_count = 3, 12
+
+    frame = scene()
+    expected = reference_render(frame, tracked, zones, 3, 12)
+    actual = annotator.render(frame, tracked, zones)
+    diff = np.abs(actual.astype(np.int16) - expected)
+    # only anti-aliased edges of the line may round differently
+    assert diff.max() <= 2
+    assert (diff > 0).mean() < 0.001
+    assert np.array_equal(frame, scene())
+
+
+def test_render_reuses_output_buffer_and_layers():
+    """Test that repeated renders allocate neither a new output frame nor new overlay layers."""
+    zones = ZoneManager().init_zones(640, 360)
+    annotator = FrameAnnotator()
+    first = annotator.render(scene(1), sv.Detections.empty(), zones)
+    layer = annotator.zone_layer
+    second = annotator.render(scene(2), sv.Detections.empty(), zones)
+    assert second is first and annotator.zone_layer is layer
+
+    annotator.render(np.zeros((240, 320, 3), dtype=np.uint8), sv.Detections.empty(), ZoneManager().init_zones(320, 240))
+    assert annotator.zone_layer is not layer
+
+
+def test_overlay_layer_recovers_alpha():
+    """Test that opaque strokes are copied and anti-aliased ones blended against the background."""
+    layer = OverlayLayer((40, 40, 3), lambda c: cv2.circle(c, (20, 20), 10, (0, 0, 255), -1, cv2.LINE_AA))
+    grey = np.full((40, 40, 3), 100, dtype=np.uint8)
+    expected = cv2.circle(grey.copy(), (20, 20), 10, (0, 0, 255), -1, cv2.LINE_AA)
+    layer.composite(grey)
+    assert len(layer.opaque_index) > 0 and len(layer.blend_index) > 0
+    assert np.abs(grey.astype(np.int16) - expected).max() <= 2
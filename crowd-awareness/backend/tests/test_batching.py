@@ -0,0 +1,137 @@
+"""Unit tests for the shared inference batcher."""
+
+import threading
+import time
+
+import numpy as np
+import supervision as sv
+
+from pipeline.batching import InferenceBatcher
+
+
+class RecordingDetector:
+    """Returns one box per frame whose x1 encodes the frame's marker value."""
+
+    max_batch_size = 4
+    max_wait_ms = 50.0
+
+    def __init__(self) -> None:
+        self.batches = []
+
+    def detect_people_batch(self, frames):
+        self.batches.append([int(f[0, 0]) for f in frames])
+        return [
+            sv.Detections(
+                xyxy=np.array([[f[0, 0], 0, f[0, 0] + 1, 1]], dtype=np.float32),
+                confidence=np.array([0.9], dtype=np.float32),
+                class_id=np.array([0]),
+            )
+            for f in frames
+        ]
+
+
+def frame(value):
+    return np.full((2, 2), value, dtype=np.uint8)
+
+
+def test_batcher_uses_detector_limits():
+    """Test that batch size and wait time default to the detector settings."""
+    batcher = InferenceBatcher(RecordingDetector())
+    assert batcher.max_batch_size == 4
+    assert batcher.max_wait_sec == 0.05
+
+
+def test_results_are_routed_back_to_each_caller():
+    """Test that every caller gets the detections for its own frame."""
+    detector = RecordingDetector()
+    batcher = InferenceBatcher(detector)
+    batcher.start()
+
+    results = {}
+
+    def worker(cam):
+        results[cam] = batcher.detect(cam, frame(cam))
+
+    threads = [threading.Thread(target=worker, args=(cam,)) for cam in range(1, 4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5.0)
+    batcher.stop()
+
+    for cam, detections in results.items():
+        assert int(detections.xyxy[0, 0]) == cam
+    assert sum(len(b) for b in detector.batches) == 3
+    assert batcher.stats()["frames_run"] == 3
+
+
+def test_round_robin_across_sources():
+    """Test that a source with a backlog cannot fill the whole batch."""
+    detector = RecordingDetector()
+    batcher = InferenceBatcher(detector, max_batch_size=4, max_wait_ms=0)
+    futures = [batcher.submit("busy", frame(10 + i)) for i in range(6)]
+    futures.append(batcher.submit("quiet", frame(99)))
+    batcher.start()
+    for f in futures:
+        f.result(timeout=5.0)
+    batcher.stop()
+
+    assert 99 in detector.batches[0]
+    assert len(detector.batches[0]) == 4
+
+
+def test_detector_errors_propagate_to_callers():
+    """Test that an inference failure is raised in the submitting thread."""
+
+    class Broken(RecordingDetector):
+        def detect_people_batch(self, frames):
+            raise RuntimeError("model crashed")
+
+    batcher = InferenceBatcher(Broken())
+    batcher.start()
+    future = batcher.submit("cam", frame(1))
+    try:
+        future.result(timeout=5.0)
+        raised = False
+    except RuntimeError:
+        raised = True
+    batcher.stop()
+    assert raised
+
+
+def test_stopped_and_idle_sources_are_not_waited_for():
+    """Test that a batch stops waiting for a closed client or a source that went quiet."""
+    detector = RecordingDetector()
+    detector.max_wait_ms = 1000.0
+    batcher = InferenceBatcher(detector, source_idle_sec=0.2)
+    batcher.start()
+    gone = batcher.client("gone")
+    gone.detect_people(frame(1))
+    gone.close()
+    assert "gone" not in batcher.known_sources
+
+    batcher.detect("quiet", frame(2))
+    time.sleep(0.3)
+    start = time.monotonic()
+    batcher.detect("live", frame(3))
+    assert time.monotonic() - start < 0.5
+    assert "quiet" not in batcher.known_sources
+    batcher.stop()
+
+
+def test_leading_source_rotates_when_batch_is_smaller_than_sources():
+    """Test that with more ready sources than batch slots every source gets to go first."""
+    detector = RecordingDetector()
+    detector.max_batch_size = 2
+    batcher = InferenceBatcher(detector)
+    futures = []
+    for cam in (1, 2, 3):
+        futures += batcher.submit_many(cam, [frame(cam * 10 + k) for k in range(4)])
+    batcher.start()
+    for future in futures:
+        future.result(5.0)
+    batcher.stop()
+    leaders = [batch[0] // 10 for batch in detector.batches]
+    assert set(leaders[:3]) == {1, 2, 3}
+    served = [value // 10 for batch in detector.batches[:3] for value in batch]
+    assert sorted(served) == [1, 1, 2, 2, 3, 3]
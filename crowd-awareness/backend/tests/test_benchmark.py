@@ -0,0 +1,44 @@
+"""Unit tests for the benchmark harness and its replay detector."""
+
+import numpy as np
+import supervision as sv
+
+from benchmarks.bench_pipeline import DEFAULT_VIDEO, STAGES, bench_components, compare
+from benchmarks.replay import ReplayDetector, save_boxes, synthetic_boxes
+
+
+def test_replay_detector_round_trips_recorded_boxes(tmp_path):
+    """Test that saved boxes come back frame by frame and loop at the end."""
+    frames = [
+        sv.Detections(xyxy=np.array([[0, 0, 10, 10]], dtype=np.float32), confidence=np.array([0.9])),
+        sv.Detections.empty(),
+        sv.Detections(xyxy=np.array([[1, 1, 5, 5], [2, 2, 8, 8]], dtype=np.float32), confidence=np.array([0.5, 0.6])),
+    ]
+    path = tmp_path / "boxes.npz"
+    save_boxes(path, frames)
+    replay = ReplayDetector.load(path)
+    assert [len(replay.detect_people()) for _ in range(4)] == [1, 0, 2, 1]
+
+
+def test_synthetic_boxes_are_deterministic():
+    """Test that the seeded walk produces identical boxes on every run."""
+    a, b = synthetic_boxes(5, 640, 360), synthetic_boxes(5, 640, 360)
+    for _ in range(5):
+        assert np.array_equal(a.detect_people().xyxy, b.detect_people().xyxy)
+
+
+def test_component_bench_reports_every_stage():
+    """Test that a short run yields percentiles for each stage."""
+    result = bench_components(DEFAULT_VIDEO, synthetic_boxes(8, 1280, 720), frames=8, warmup=2)
+    assert set(result["stages"]) == set(STAGES)
+    assert all(s["n"] == 8 and s["p50"] <= s["p99"] for s in result["stages"].values())
+    assert result["fps"] > 0
+
+
+def test_compare_flags_only_real_regressions():
+    """Test that slowdowns beyond tolerance and the noise floor are reported."""
+    baseline = {"components": {"fps": 100.0, "stages": {"track": {"p95": 2.0}, "alerts": {"p95": 0.01}}}}
+    results = {"components": {"fps": 95.0, "stages": {"track": {"p95": 3.0}, "alerts": {"p95": 0.05}}}}
+    assert compare(results, baseline) == ["track p95 3.0ms > baseline 2.0ms"]
+    results["components"]["fps"] = 50.0
+    assert len(compare(results, baseline)) == 2
@@ -0,0 +1,160 @@
+"""Unit tests for the line counting stage and headless (demand-only) snapshots."""
+
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import supervision as sv
+
+from pipeline.annotate import FrameAnnotator
+from pipeline.controller import PipelineController
+from pipeline.counting import LineCounter
+from pipeline.snapshot import SnapshotCache
+
+VIDEO = Path(__file__).resolve().parents[1] / "pipeline" / "assets" / "videos" / "PeopleWalking2.mp4"
+
+
+class StubDetector:
+    def detect_people(self, frame):
+        return sv.Detections.empty()
+
+
+def person(y, tid=1):
+    return sv.Detections(
+        xyxy=np.array([[100, y, 140, y + 80]], dtype=np.float32),
+        class_id=np.array([0]),
+        tracker_id=np.array([tid]),
+    )
+
+
+def test_line_counter_counts_without_an_annotator():
+    """Test that crossings are counted by the counter alone and drawn from the same object."""
+    counter = LineCounter()
+    for y in (100, 200, 300, 400):
+        counter.trigger(person(y), 720, 1280)
+    assert counter.counts()["in"] + counter.counts()["out"] == 1
+
+    annotator = FrameAnnotator(counter)
+    assert annotator.line_zone is counter.line_zone
+
+
+def test_demand_only_cache_publishes_while_watched():
+    """Test that a headless cache wants frames only after a request, and that request waits for one."""
+    cache = SnapshotCache(FrameAnnotator(), demand_only=True, viewer_idle_sec=5.0, wake_timeout=2.0)
+    frame = np.zeros((72, 128, 3), dtype=np.uint8)
+    zones = {}
+    assert not cache.wanted()
+
+    def pipeline():
+        while not cache.wanted():
+            time.sleep(0.01)
+        cache.publish(frame, sv.Detections.empty(), zones)
+
+    worker = threading.Thread(target=pipeline)
+    worker.start()
+    version, jpeg = cache.get_jpeg()
+    worker.join(2.0)
+    assert version == 1 and jpeg is not None
+    assert cache.wanted()
+
+
+def test_headless_controller_counts_without_publishing_frames():
+    """Test that a headless camera keeps processing frames but never copies one until asked."""
+    controller = PipelineController(str(VIDEO), prefetch=False, detector=StubDetector(), headless=True)
+    controller.start()
+    try:
+        deadline = time.time() + 10
+        while controller.metrics.counters["frames_processed"] < 10 and time.time() < deadline:
+            time.sleep(0.05)
+        assert controller.metrics.counters["frames_processed"] >= 10
+        assert controller.snapshots.version == 0
+        assert controller.metrics.stages["count"].count >= 10
+
+        version, jpeg = controller.get_snapshot_jpeg()
+        assert version > 0 and jpeg is not None
+    finally:
+        controller.stop()
+    assert controller.get_processing_status()["headless"] is True
+
+
+class WalkerDetector:
+    """One person walking down at 20 px per frame until frame stop_at, where the box top is stop_top."""
+
+    def __init__(self, stop_top: float, stop_at: int) -> None:
+        self.stop_top = stop_top
+        self.stop_at = stop_at
+        self.frame = 0
+
+    def detect_people(self, frame):
+        top = self.stop_top - 20 * max(0, self.stop_at - self.frame)
+        return sv.Detections(
+            xyxy=np.array([[600, top, 660, top + 300]], dtype=np.float32),
+            confidence=np.array([0.9], dtype=np.float32),
+            class_id=np.array([0]),
+        )
+
+
+def run_schedule(detect_every, stop_top, stop_at, frames=40):
+    detector = WalkerDetector(stop_top, stop_at)
+    controller = PipelineController(str(VIDEO), prefetch=False, detector=detector, motion_gate=False)
+    controller.scheduler.detect_every = detect_every
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    for index in range(frames):
+        detector.frame = index
+        controller.metrics.start()
+        controller._track_frame(frame, float(index), 720, 1280)
+    return controller.counter.counts()
+
+
+def test_skipped_frames_count_the_same_as_every_frame():
+    """Test that extrapolated boxes overshooting the line are not counted, while real crossings still are."""
+    # stops 30 px short of the line (y=360); extrapolating 5 skipped frames at 20 px would carry it over
+    assert run_schedule(1, 330, 23) == {"in": 0, "out": 0}
+    assert run_schedule(6, 330, 23) == run_schedule(1, 330, 23)
+    # walks straight through the line and beyond
+    crossed = run_schedule(1, 700, 60, frames=70)
+    assert crossed["in"] + crossed["out"] == 1
+    assert run_schedule(6, 700, 60, frames=70) == crossed
+
+
+def test_line_counter_ignores_predicted_tracks():
+    """Test that boxes extrapolated by the tracker never register a crossing."""
+    counter = LineCounter()
+    counter.trigger(person(100), 720, 1280)
+    predicted = person(400)
+    predicted.data["predicted"] = np.array([True])
+    counter.trigger(predicted, 720, 1280)
+    assert counter.counts() == {"in": 0, "out": 0}
+    counter.trigger(person(400), 720, 1280)
+    assert counter.counts()["in"] + counter.counts()["out"] == 1
+
+
+def test_building_status_heartbeat_advances_on_a_static_scene():
+    """Test that last_update_ts keeps moving while an empty scene leaves the state version alone."""
+    controller = PipelineController(str(VIDEO), prefetch=False, detector=StubDetector(), headless=True)
+    controller.start()
+    try:
+        deadline = time.time() + 10
+        while controller.metrics.counters["frames_processed"] < 5 and time.time() < deadline:
+            time.sleep(0.05)
+        version = controller.get_state_version()
+        first = controller.get_building_status()["last_update_ts"]
+        time.sleep(0.3)
+        assert controller.get_building_status()["last_update_ts"] > first
+        assert controller.get_state_version() == version
+    finally:
+        controller.stop()
+
+
+def test_motion_gate_is_off_by_default_and_only_timed_when_it_runs():
+    """Test that a default controller detects every frame and records no motion stage."""
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    for gate, laps in ((None, 0), (True, 3)):
+        kwargs = {} if gate is None else {"motion_gate": gate}
+        controller = PipelineController(str(VIDEO), prefetch=False, detector=StubDetector(), **kwargs)
+        assert (controller.motion is not None) == bool(gate)
+        for index in range(3):
+            controller.metrics.start()
+            controller._track_frame(frame, float(index), 720, 1280)
+        assert controller.metrics.stages["motion"].count == laps
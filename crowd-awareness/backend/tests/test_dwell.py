@@ -0,0 +1,86 @@
+"""Unit tests for the per-section dwell sketch and the wait times built from it."""
+
+import numpy as np
+import supervision as sv
+
+from pipeline.dwell import DwellSketch
+from pipeline.movement import MovementAnalyzer
+from pipeline.state_store import StateStore
+from pipeline.stats import SectionStatistics
+from pipeline.track_table import TrackTable
+from pipeline.zones import ZoneManager
+
+
+def test_sketch_mean_is_exact_and_quantiles_close():
+    """Test the rolling mean against numpy and p50/p90 within the bin resolution."""
+    rng = np.random.default_rng(0)
+    durations = rng.lognormal(mean=4.5, sigma=0.8, size=20000)
+    sketch = DwellSketch(window_sec=300)
+    for i, d in enumerate(durations):
+        sketch.add(float(d), 1000.0 + i * 0.001)
+    summary = sketch.summary()
+    assert summary["visits"] == len(durations)
+    assert abs(summary["mean_sec"] - durations.mean()) < 1e-6 * durations.mean()
+    for key, q in (("p50_sec", 50), ("p90_sec", 90)):
+        exact = np.percentile(durations, q)
+        assert abs(summary[key] - exact) / exact < 0.06
+
+
+def test_sketch_forgets_visits_outside_the_window():
+    """Test that slots rotate out after the window and the totals return to zero."""
+    sketch = DwellSketch(window_sec=100, n_slots=10)
+    sketch.add(30.0, 5.0)
+    sketch.add(600.0, 55.0)
+    assert sketch.summary()["visits"] == 2
+    sketch.expire(105.0)
+    assert sketch.summary() == {"visits": 1, "mean_sec": 600.0, "p50_sec": sketch.quantile(0.5), "p90_sec": sketch.quantile(0.9)}
+    sketch.expire(10_000.0)
+    assert sketch.summary() == {"visits": 0, "mean_sec": 0.0, "p50_sec": 0.0, "p90_sec": 0.0}
+    assert sketch.total_sum == 0.0
+
+
+def test_track_table_reports_visits_on_zone_change_and_eviction():
+    """Test that a visit lasts from the first to the last sighting in the zone."""
+    visits = []
+    table = TrackTable(ttl_sec=10, on_leave=lambda zone, sec, now: visits.append((zone, sec)))
+    table.update(1, "Entrance", 0.0, 0, 0)
+    table.update(1, "Entrance", 4.0, 0, 0)
+    table.update(1, None, 5.0, 0, 0)
+    table.update(1, "Desk 1", 7.0, 0, 0)
+    table.update(1, "Desk 1", 90.0, 0, 0)
+    table.evict(101.0)
+    assert visits == [("Entrance", 4.0), ("Desk 1", 83.0)]
+
+
+def test_sections_report_real_wait_times():
+    """Test that /sections wait times follow the simulated time people spend in a zone."""
+    state = StateStore(track_ttl_sec=5)
+    zones = ZoneManager()
+    zones.init_zones(1280, 720)
+    state.init_sections(zones.zones)
+    movement = MovementAnalyzer(state, zones)
+    box = np.array([[600, 340, 640, 380]], dtype=np.float32)
+    # one person every 20 s, each staying 60 s (about 3 present at once)
+    for second in range(240):
+        ids = [p for p in range(second // 20 - 2, second // 20 + 1) if p >= 0 and p * 20 <= second < p * 20 + 60]
+        detections = sv.Detections(xyxy=np.repeat(box, len(ids), axis=0), tracker_id=np.array(ids, dtype=int))
+        movement.update_section_stats(detections, float(second))
+    state.publish()
+    section = next(s for s in SectionStatistics(state).build_section_summary(240.0).sections if s.name == "Waiting Area")
+    assert section.completed_visits == 9
+    assert section.avg_wait_min == round(59.0 / 60.0, 1)
+    assert abs(section.p50_wait_min - 1.0) <= 0.1 and abs(section.p90_wait_min - 1.0) <= 0.1
+
+
+def test_boundary_jitter_does_not_split_visits():
+    """Test that single-frame flicker into a neighbouring zone neither closes a visit nor adds a short one."""
+    visits = []
+    table = TrackTable(ttl_sec=5, on_leave=lambda zone, sec, now: visits.append((zone, sec)))
+    for tid in range(20):
+        start = tid * 100.0
+        for frame in range(600):  # 60 s at 10 fps, every 7th frame flickers across the boundary
+            zone = ("Desk 1", None)[frame % 2] if frame % 7 == 3 else "Waiting Area"
+            table.update(tid, zone, start + frame / 10.0, 0, 0)
+        table.evict(start + 70.0)
+    assert len(visits) == 20
+    assert all(zone == "Waiting Area" and abs(sec - 59.9) < 1e-6 for zone, sec in visits)
@@ -0,0 +1,78 @@
+"""Unit tests for the occupancy history ring buffers."""
+
+import pytest
+
+from pipeline.history import TOTAL_SERIES, OccupancyHistory, make_history
+from pipeline.state_store import StateStore
+
+
+def test_seconds_average_frames_and_roll_up_to_minutes():
+    """Test that per-second means feed 1m and 15m min/max/mean rows."""
+    history = OccupancyHistory(["A"])
+    for second in range(0, 901):
+        # two frames per second with counts n and n + 2, so the second's mean is n + 1
+        n = second % 60
+        history.record(second + 0.1, [n])
+        history.record(second + 0.6, [n + 2])
+
+    seconds = history.query("A", 0, 2, "1s")
+    assert seconds["ts"] == [0, 1, 2]
+    assert seconds["values"] == [1.0, 2.0, 3.0]
+
+    minutes = history.query("A", 0, 899, "1m")
+    assert len(minutes["ts"]) == 15
+    assert minutes["min"][0] == 1.0
+    assert minutes["max"][0] == 60.0
+    assert minutes["mean"][0] == pytest.approx(30.5)
+
+    quarters = history.query("A", 0, 899, "15m")
+    assert quarters["ts"] == [0]
+    assert quarters["min"] == [1.0]
+    assert quarters["max"] == [60.0]
+
+
+def test_range_query_only_returns_requested_buckets():
+    """Test that start/end bound the returned timestamps."""
+    history = OccupancyHistory(["A"])
+    for second in range(1000, 1100):
+        history.record(second, [second])
+    result = history.query("A", 1010, 1014, "1s")
+    assert result["ts"] == [1010, 1011, 1012, 1013, 1014]
+    assert result["values"] == [1010.0, 1011.0, 1012.0, 1013.0, 1014.0]
+
+
+def test_ring_wraps_and_memory_stays_fixed():
+    """Test that old buckets are overwritten without the buffers growing."""
+    history = OccupancyHistory(["A"], seconds_capacity=10, minutes_capacity=4, quarters_capacity=2)
+    size = history.nbytes()
+    for second in range(3600):
+        history.record(second, [1])
+    assert history.nbytes() == size
+    assert history.query("A", 0, 3600, "1s")["ts"] == list(range(3589, 3599))
+    assert len(history.query("A", 0, 3600, "1m")["ts"]) == 4
+
+
+def test_unknown_series_and_resolution_raise():
+    """Test that bad query arguments are reported rather than ignored."""
+    history = make_history(["A"])
+    assert history.series_names == ["A", TOTAL_SERIES]
+    with pytest.raises(KeyError):
+        history.query("missing", 0, 10, "1m")
+    with pytest.raises(ValueError):
+        history.query("A", 0, 10, "5m")
+
+
+def test_state_store_publish_records_sections_and_total():
+    """Test that every published snapshot lands in the history."""
+    state = StateStore()
+    state.init_sections(["Desk 1", "Exit"])
+    for second in range(3):
+        state.sections["Desk 1"]["current_count"] = second
+        state.update_counts(10 + second)
+        state.last_update_ts = 100.0 + second
+        state.publish()
+    state.last_update_ts = 103.0
+    state.publish()
+
+    assert state.section_history.query("Desk 1", 100, 102, "1s")["values"] == [0.0, 1.0, 2.0]
+    assert state.section_history.query(TOTAL_SERIES, 100, 102, "1s")["values"] == [10.0, 11.0, 12.0]
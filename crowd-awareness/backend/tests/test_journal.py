@@ -0,0 +1,113 @@
+"""Unit tests for the SQLite event journal."""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from pipeline.journal import EventJournal
+from pipeline.state_store import StateStore
+
+DAY = 86400
+
+
+def test_crossings_and_alerts_roll_up_by_hour_and_day(tmp_path):
+    """Test that batched events land in the counters and both rollup tables."""
+    journal = EventJournal(tmp_path / "events.db", batch_size=3)
+    for i in range(10):
+        journal.record_crossing("lobby", "entry", DAY + i * 1800)
+    journal.record_crossing("lobby", "exit", DAY + 60)
+    journal.record_crossing("hall", "entry", 2 * DAY + 60)
+    journal.record_alert("lobby", {"type": "t", "level": "info", "message": "m", "ts": DAY + 5.0})
+    assert journal.flush()
+
+    assert journal.load_counters("lobby") == (10, 1)
+    assert journal.load_counters("hall") == (1, 0)
+    assert journal.load_counters("unknown") == (0, 0)
+
+    hours = journal.report(DAY, DAY + 3 * 3600, "hour", camera="lobby")["buckets"]
+    assert hours[0] == {"ts": DAY, "entries": 2, "exits": 1, "alerts": 1}
+    assert [b["entries"] for b in hours] == [2, 2, 2, 2]
+
+    days = journal.report(0, 3 * DAY, "day")["buckets"]
+    assert days == [
+        {"ts": DAY, "entries": 10, "exits": 1, "alerts": 1},
+        {"ts": 2 * DAY, "entries": 1, "exits": 0, "alerts": 0},
+    ]
+    with pytest.raises(ValueError):
+        journal.report(0, DAY, "week")
+    journal.close()
+
+
+def test_database_uses_wal(tmp_path):
+    """Test that the journal switches the database into WAL mode."""
+    path = tmp_path / "events.db"
+    EventJournal(path).close()
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+
+def test_state_store_reloads_counters_and_alerts_after_restart(tmp_path):
+    """Test that a new StateStore on the same journal resumes where the last one stopped."""
+    path = tmp_path / "events.db"
+    journal = EventJournal(path)
+    state = StateStore()
+    state.attach_journal(journal, "main")
+    for _ in range(3):
+        state.increment_entry(100.0)
+    state.increment_exit(101.0)
+    alerts = [{"type": f"t{i}", "level": "info", "message": f"m{i}", "ts": 100.0 + i} for i in range(5)]
+    state.add_alerts(alerts)
+    journal.close()
+
+    restarted = StateStore()
+    restarted.attach_journal(EventJournal(path), "main")
+    snap = restarted.snapshot()
+    assert (snap.total_entries, snap.total_exits) == (3, 1)
+    assert [a["type"] for a in snap.alerts] == ["t2", "t3", "t4"]
+    restarted.journal.close()
+
+
+def test_failed_batches_are_retried_then_committed(tmp_path, caplog):
+    """Test that a transient write error is logged and the batch lands on a later attempt."""
+    journal = EventJournal(tmp_path / "events.db", retry_delay_sec=0.01)
+    write = journal._write
+    failures = []
+
+    def flaky(batch):
+        if len(failures) < 2:
+            failures.append(1)
+            raise sqlite3.OperationalError("database is locked")
+        write(batch)
+
+    journal._write = flaky
+    journal.record_crossing("lobby", "entry", 10.0)
+    assert journal.flush()
+    assert journal.load_counters("lobby") == (1, 0)
+    assert journal.stats()["failed"] == 0 and journal.writer.is_alive()
+    assert "database is locked" in caplog.text
+    journal.close()
+
+
+def test_pending_queue_is_bounded_and_drops_oldest(tmp_path):
+    """Test that a stuck writer drops the oldest events, counts them, and gives up on failing batches."""
+    journal = EventJournal(tmp_path / "events.db", batch_size=1, max_pending=3, max_retries=1, retry_delay_sec=0.01)
+    release = threading.Event()
+
+    def stuck(batch):
+        release.wait(5.0)
+        raise sqlite3.OperationalError("disk I/O error")
+
+    journal._write = stuck
+    for i in range(10):
+        journal.record_crossing("lobby", "entry", float(i))
+    time.sleep(0.05)
+    assert len(journal.pending) <= 3
+    release.set()
+    assert journal.flush()
+    stats = journal.stats()
+    assert stats["dropped"] >= 6 and stats["dropped"] + stats["failed"] == 10
+    assert stats["writer_alive"]
+    journal.close()
@@ -0,0 +1,127 @@
+"""Unit tests for the push-based live update hub."""
+
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from pipeline.live import LiveUpdateHub
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+def parse(message):
+    assert message.startswith("event: update\ndata: ")
+    return json.loads(message.split("data: ", 1)[1])
+
+
+def test_first_message_is_full_then_only_changed_keys():
+    """Test that subscribers get full state once and deltas afterwards."""
+    store = {"version": 1, "payload": {"a": 1, "b": {"x": 1}}}
+    hub = LiveUpdateHub(lambda: store["version"], lambda: dict(store["payload"]), poll_interval=0.01)
+
+    async def scenario():
+        stream = hub.subscribe(min_interval=0.0)
+        first = parse(await stream.__anext__())
+        store["payload"] = {"a": 1, "b": {"x": 2}}
+        store["version"] = 2
+        second = parse(await stream.__anext__())
+        await stream.aclose()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == {"version": 1, "a": 1, "b": {"x": 1}}
+    assert second == {"version": 2, "b": {"x": 2}}
+    assert hub.subscribers == 0
+
+
+def test_rate_limit_coalesces_versions_and_builds_once_per_version():
+    """Test that fast state changes collapse and the payload is shared by all clients."""
+    store = {"version": 0}
+    builds = []
+
+    def payload():
+        builds.append(store["version"])
+        return {"count": store["version"]}
+
+    hub = LiveUpdateHub(lambda: store["version"], payload, poll_interval=0.005)
+
+    async def pump():
+        for _ in range(40):
+            store["version"] += 1
+            await asyncio.sleep(0.005)
+
+    async def client():
+        stream = hub.subscribe(min_interval=0.1)
+        received = []
+        for _ in range(3):
+            received.append(parse(await stream.__anext__()))
+        await stream.aclose()
+        return received
+
+    async def scenario():
+        pumping = asyncio.create_task(pump())
+        results = await asyncio.gather(*(client() for _ in range(5)))
+        await pumping
+        return results
+
+    results = asyncio.run(scenario())
+    for received in results:
+        versions = [m["version"] for m in received]
+        assert versions == sorted(versions)
+        assert versions[-1] - versions[0] > 2  # intermediate versions were skipped
+    assert len(builds) == len(set(builds))
+
+
+def test_dashboard_is_built_once_per_version():
+    """Test that repeated reads of one version reuse the serialized body."""
+    from pipeline.dashboard import BOOT_ID, DashboardCache
+
+    store = {"version": 3}
+    builds = []
+
+    def build():
+        builds.append(store["version"])
+        return {"building_status": {"current_inside": store["version"]}}
+
+    cache = DashboardCache(lambda: store["version"], build)
+    version, body = cache.get_json()
+    assert cache.get_json() == (version, body)
+    assert cache.get_payload()["building_status"]["current_inside"] == 3
+    assert json.loads(body) == {"version": 3, "building_status": {"current_inside": 3}}
+    assert builds == [3]
+
+    store["version"] = 4
+    assert cache.get_json()[0] == 4
+    assert builds == [3, 4]
+    assert DashboardCache.etag(4) == f'"dashboard-{BOOT_ID}-4"'
+
+
+def test_etag_changes_across_process_restarts():
+    """Test that a restarted process tags the same state version differently."""
+    script = "from pipeline.dashboard import DashboardCache; print(DashboardCache.etag(1))"
+    tags = {subprocess.check_output([sys.executable, "-c", script], cwd=BACKEND, text=True) for _ in range(2)}
+    assert len(tags) == 2
+
+
+def test_watcher_keeps_polling_after_payload_errors():
+    """Test that an exception while building the payload does not end the subscription."""
+    store = {"version": 1, "fail": 2}
+
+    def payload():
+        if store["fail"]:
+            store["fail"] -= 1
+            raise RuntimeError("state read failed")
+        return {"a": store["version"]}
+
+    hub = LiveUpdateHub(lambda: store["version"], payload, poll_interval=0.005)
+
+    async def scenario():
+        stream = hub.subscribe(min_interval=0.0)
+        message = parse(await asyncio.wait_for(stream.__anext__(), 5.0))
+        await stream.aclose()
+        return message
+
+    assert asyncio.run(scenario()) == {"version": 1, "a": 1}
+    assert hub.errors == 2
@@ -0,0 +1,67 @@
+"""Unit tests for pipeline latency histograms and the Prometheus exposition."""
+
+import time
+from pathlib import Path
+
+import supervision as sv
+
+from pipeline.controller import PipelineController
+from pipeline.metrics import Histogram, PipelineMetrics, render_prometheus
+
+VIDEO = Path(__file__).resolve().parents[1] / "pipeline" / "assets" / "videos" / "PeopleWalking2.mp4"
+
+
+class StubDetector:
+    def detect_people(self, frame):
+        return sv.Detections.empty()
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test that bucket counts accumulate and +Inf equals the observation count."""
+    hist = Histogram((0.01, 0.1, 1.0))
+    for value in (0.005, 0.01, 0.05, 0.5, 3.0):
+        hist.observe(value)
+    assert hist.cumulative() == [("0.01", 2), ("0.1", 3), ("1.0", 4), ("+Inf", 5)]
+    assert hist.count == 5
+
+
+def test_render_prometheus_exposes_stages_and_counters():
+    """Test that the text output carries labelled histograms and counters."""
+    metrics = PipelineMetrics()
+    metrics.start()
+    metrics.lap("decode")
+    metrics.inc("frames_processed", 3)
+    text = render_prometheus({"lobby": metrics})
+    assert "# TYPE crowd_stage_seconds histogram" in text
+    assert 'crowd_stage_seconds_count{camera="lobby",stage="decode"} 1' in text
+    assert 'crowd_stage_seconds_bucket{camera="lobby",stage="detect",le="+Inf"} 0' in text
+    assert 'crowd_frames_processed_total{camera="lobby"} 3' in text
+    assert text.endswith("\n")
+
+
+def test_recording_overhead_is_microseconds():
+    """Test that one lap costs far less than 1% of a 30 ms frame budget."""
+    metrics = PipelineMetrics()
+    n = 20000
+    start = time.perf_counter()
+    for _ in range(n):
+        metrics.lap("track")
+    per_lap = (time.perf_counter() - start) / n
+    # seven laps per frame must stay under 300 us (1% of 30 ms)
+    assert per_lap * 7 < 0.0003
+
+
+def test_controller_times_every_stage():
+    """Test that running the pipeline on the bundled clip fills the stage histograms."""
+    controller = PipelineController(str(VIDEO), prefetch=False, detector=StubDetector(), max_skip=1)
+    controller.start()
+    deadline = time.time() + 10
+    while controller.metrics.counters["frames_processed"] < 20 and time.time() < deadline:
+        time.sleep(0.05)
+    controller.get_snapshot_jpeg()
+    controller.stop()
+    metrics = controller.get_metrics()
+    assert metrics.counters["frames_processed"] >= 20
+    for stage in ("decode", "detect", "track", "movement", "count", "alerts", "publish", "encode"):
+        assert metrics.stages[stage].count > 0, stage
+    assert metrics.frame_age.count > 0
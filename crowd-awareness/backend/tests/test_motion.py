@@ -0,0 +1,56 @@
+"""Unit tests for the motion gate."""
+
+import numpy as np
+
+from pipeline.motion import MotionGate
+from pipeline.zones import ZoneManager
+
+
+def frame(value=0):
+    return np.full((720, 1280, 3), value, dtype=np.uint8)
+
+
+def test_static_frames_are_skipped_until_refresh():
+    """Test that an unchanged scene reuses detections and is refreshed on schedule."""
+    gate = MotionGate(refresh_sec=2.0)
+    assert gate.should_detect(frame(), now=0.0)
+    assert not any(gate.should_detect(frame(), now=t / 10) for t in range(1, 20))
+    assert gate.should_detect(frame(), now=2.0)
+    stats = gate.stats()
+    assert stats["skipped"] == 19 and stats["forced_refresh"] == 1
+    assert stats["skip_ratio"] == round(19 / 21, 3)
+
+
+def test_small_motion_inside_a_zone_triggers_detection():
+    """Test that a person-sized change in one zone counts even though the frame barely changed."""
+    zones = ZoneManager()
+    zones.init_zones(1280, 720)
+    gate = MotionGate()
+    gate.set_zones(zones.label_map)
+    gate.should_detect(frame(), now=0.0)
+
+    moved = frame()
+    # a 24x80 figure inside the Entrance zone (bottom right): ~0.2% of the frame
+    moved[560:640, 1000:1024] = 200
+    assert gate.last_score == 0.0
+    assert gate.should_detect(moved, now=0.1)
+    assert gate.last_score < gate.frame_threshold
+    assert gate.last_zone_score >= gate.zone_threshold
+
+
+def test_sensor_noise_is_ignored():
+    """Test that low-amplitude noise stays under the pixel threshold."""
+    gate = MotionGate()
+    gate.should_detect(frame(100), now=0.0)
+    noisy = (frame(100).astype(np.int16) + np.random.default_rng(0).integers(-5, 6, (720, 1280, 3))).astype(np.uint8)
+    assert not gate.should_detect(noisy, now=0.1)
+
+
+def test_gradual_drift_accumulates_against_the_reference():
+    """Test that slow change is compared to the last detected frame, not the previous one."""
+    gate = MotionGate(frame_threshold=0.5, refresh_sec=100.0)
+    gate.should_detect(frame(0), now=0.0)
+    results = [gate.should_detect(frame(v), now=v / 100) for v in range(4, 40, 4)]
+    # each step is 4 grey levels, below the 15 level pixel threshold; the fourth step crosses it
+    assert results[:3] == [False, False, False]
+    assert results[3] is True
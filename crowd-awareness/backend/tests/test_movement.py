@@ -0,0 +1,119 @@
+"""Unit tests for zone lookup and movement counting."""
+
+import cv2
+import numpy as np
+import supervision as sv
+
+from pipeline.movement import MovementAnalyzer
+from pipeline.section_window import SectionEntryWindow
+from pipeline.state_store import StateStore
+from pipeline.zones import NO_ZONE, ZoneManager
+
+W, H = 1280, 720
+
+
+def make_analyzer():
+    state = StateStore()
+    zones = ZoneManager()
+    zones.init_zones(W, H)
+    state.init_sections(zones.zones)
+    movement = MovementAnalyzer(state, zones)
+    movement.reset_for_new_zones(zones)
+    return state, zones, movement
+
+
+def people(centres, ids):
+    xyxy = np.array([[x - 10, y - 10, x + 10, y + 10] for x, y in centres], dtype=np.float32)
+    return sv.Detections(
+        xyxy=xyxy,
+        confidence=np.ones(len(ids), dtype=np.float32),
+        class_id=np.zeros(len(ids), dtype=int),
+        tracker_id=np.array(ids),
+    )
+
+
+def test_label_map_matches_polygon_test():
+    """Test that the raster agrees with a per-polygon point test."""
+    zones = ZoneManager()
+    zones.init_zones(W, H)
+    rng = np.random.default_rng(0)
+    xs = rng.integers(0, W, 2000)
+    ys = rng.integers(0, H, 2000)
+    labels = zones.lookup(xs, ys)
+    for x, y, label in zip(xs, ys, labels):
+        expected = NO_ZONE
+        for i, zone in enumerate(zones.zones.values()):
+            if cv2.pointPolygonTest(zone.polygon.astype(np.int32), (float(x), float(y)), False) >= 0:
+                expected = i + 1
+                break
+        assert label == expected
+
+
+def test_overlapping_zones_prefer_first_defined():
+    """Test the documented precedence rule for overlapping zones."""
+    zones = ZoneManager()
+    square = np.array([[0, 0], [100, 0], [100, 100], [0, 100]], dtype=np.int32)
+    zones.zones = {
+        "A": sv.PolygonZone(polygon=square, frame_resolution_wh=(200, 200)),
+        "B": sv.PolygonZone(polygon=square + 50, frame_resolution_wh=(200, 200)),
+    }
+    zones.rasterize(200, 200)
+    assert zones.point_zone((75, 75)) == "A"
+    assert zones.point_zone((125, 125)) == "B"
+    assert zones.point_zone((190, 10)) is None
+    assert zones.point_zone((-5, 10)) is None
+
+
+def test_section_counts_and_entries():
+    """Test per-section counts, peaks and entrance/exit transitions."""
+    state, zones, movement = make_analyzer()
+    entrance = (int(W * 0.75), int(H * 0.85))
+    waiting = (W // 2, H // 2)
+
+    movement.update_section_stats(people([waiting, waiting], [1, 2]), now=0.0)
+    assert state.sections["Waiting Area"]["current_count"] == 2
+    assert state.total_entries == 0
+
+    movement.update_section_stats(people([entrance, waiting], [1, 2]), now=1.0)
+    movement.update_section_stats(people([entrance, waiting], [1, 2]), now=2.0)
+    assert state.total_entries == 1
+    assert state.sections["Waiting Area"]["current_count"] == 1
+    assert state.sections["Waiting Area"]["peak"] == 2
+    assert state.sections["Entrance"]["current_count"] == 1
+
+
+def reference_window(events, tid, now, window):
+    """The original list-based semantics, used as the oracle."""
+    if tid not in [t for _, t in events]:
+        events.append((now, tid))
+    return [(ts, t) for ts, t in events if now - ts <= window]
+
+
+def test_entry_window_matches_list_semantics():
+    """Test that the indexed window behaves exactly like the old list scan."""
+    rng = np.random.default_rng(1)
+    window = SectionEntryWindow(window_sec=30)
+    events = []
+    now = 0.0
+    for _ in range(5000):
+        now += float(rng.uniform(0, 0.5))
+        tid = int(rng.integers(0, 200))
+        events = reference_window(events, tid, now, 30)
+        window.add(tid, now)
+        window.expire(now)
+        assert list(window) == events
+        assert (tid in window) == any(t == tid for _, t in events)
+
+
+def test_entry_window_memory_is_bounded_at_high_churn():
+    """Test that memory tracks the window size, not the number of visitors seen."""
+    window = SectionEntryWindow(window_sec=60)
+    sizes = []
+    for step in range(200_000):
+        now = step * 0.01  # 100 new track ids per second, never repeated
+        window.add(step, now)
+        window.expire(now)
+        if step % 20_000 == 19_999:
+            sizes.append(window.nbytes())
+    assert len(window) == 6001
+    assert max(sizes[2:]) <= 1.1 * min(sizes[2:])
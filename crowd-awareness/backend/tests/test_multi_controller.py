@@ -0,0 +1,67 @@
+"""Unit tests for building-wide aggregation across cameras."""
+
+import numpy as np
+import supervision as sv
+
+from pipeline.multi_controller import MultiCameraController
+from pipeline.stats import STABLE_ACTION
+
+
+class StubDetector:
+    max_batch_size = 4
+    max_wait_ms = 5.0
+
+    def detect_people_batch(self, frames):
+        return [sv.Detections.empty() for _ in frames]
+
+
+def make_sections(counts):
+    return {name: {"current_count": c, "peak": c, "enter_events": []} for name, c in counts.items()}
+
+
+def test_cameras_share_one_detector():
+    """Test that every camera is wired to the same batcher."""
+    controller = MultiCameraController(
+        [{"id": "lobby", "source": "a.mp4"}, {"id": "hall", "source": "b.mp4"}],
+        detector=StubDetector(),
+    )
+    clients = [c.detector for c in controller.cameras.values()]
+    assert {client.batcher for client in clients} == {controller.batcher}
+    assert controller.camera_ids() == ["lobby", "hall"]
+
+
+def test_building_status_and_sections_aggregate():
+    """Test that counters are summed and section names carry the camera id."""
+    controller = MultiCameraController(
+        [{"id": "lobby", "source": "a.mp4"}, {"id": "hall", "source": "b.mp4"}],
+        detector=StubDetector(),
+    )
+    lobby, hall = controller.camera("lobby"), controller.camera("hall")
+    lobby.state.total_entries, hall.state.total_entries = 3, 4
+    lobby.state.update_counts(2)
+    hall.state.update_counts(6)
+    lobby.state.set_sections(make_sections({"Desk 1": 2}))
+    hall.state.set_sections(make_sections({"Desk 1": 6}))
+    lobby.state.publish()
+    hall.state.publish()
+
+    status = controller.get_building_status()
+    assert status["total_entries"] == 7
+    assert status["current_inside"] == 8
+
+    summary = controller.get_sections()
+    assert [s.name for s in summary.sections] == ["lobby / Desk 1", "hall / Desk 1"]
+    assert summary.busiest_section == "hall / Desk 1"
+
+    actions = controller.get_suggested_actions().actions
+    assert len(actions) == 1 and actions[0].startswith("hall / ")
+
+
+def test_single_camera_keeps_original_names():
+    """Test that a one-camera deployment reports unchanged payloads."""
+    controller = MultiCameraController([{"id": "main", "source": "a.mp4"}], detector=StubDetector())
+    controller.camera("main").state.set_sections(make_sections({"Entrance": 1}))
+    controller.camera("main").state.publish()
+
+    assert controller.get_sections().sections[0].name == "Entrance"
+    assert controller.get_suggested_actions().actions == [STABLE_ACTION]
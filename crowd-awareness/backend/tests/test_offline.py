@@ -0,0 +1,134 @@
+"""Unit tests for offline segment analysis and stitching."""
+
+import cv2
+import numpy as np
+import pytest
+import supervision as sv
+
+from pipeline import offline
+from pipeline.offline import SegmentResult, analyze_file, plan_segments, stitch, write_table
+
+W, H, FPS, FRAMES = 320, 240, 10, 60
+
+
+class BlobDetector:
+    """Finds the white squares drawn by make_video; deterministic stand-in for YOLO."""
+
+    def detect_people(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        n, _, stats, _ = cv2.connectedComponentsWithStats((gray > 128).astype(np.uint8))
+        boxes = [[x, y, x + w, y + h] for x, y, w, h, area in stats[1:] if area > 50]
+        if not boxes:
+            return sv.Detections.empty()
+        xyxy = np.array(boxes, dtype=np.float32)
+        return sv.Detections(xyxy=xyxy, confidence=np.full(len(xyxy), 0.9, dtype=np.float32),
+                             class_id=np.zeros(len(xyxy), dtype=int))
+
+
+def blob_detector():
+    return BlobDetector()
+
+
+def make_video(path):
+    # three people walking down into the Entrance (right) and Exit (left) zones at different times
+    walkers = [(240, 0, 4), (60, 10, 4), (200, 25, 5)]
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), FPS, (W, H))
+    for i in range(FRAMES):
+        frame = np.zeros((H, W, 3), dtype=np.uint8)
+        for x, start, speed in walkers:
+            if i >= start:
+                y = min(H - 20, (i - start) * speed)
+                cv2.rectangle(frame, (x, y), (x + 16, y + 16), (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def test_plan_segments_cover_every_frame_once():
+    """Test that segments tile the file without gaps or overlap."""
+    assert plan_segments(10, 4) == [(0, 4), (4, 8), (8, 10)]
+
+
+def test_parallel_segments_match_single_pass(tmp_path):
+    """Test that stitched multi-process output equals one uninterrupted pass."""
+    video = tmp_path / "clip.mp4"
+    make_video(video)
+    single = analyze_file(str(video), blob_detector, workers=1, segment_sec=100.0)
+    split = analyze_file(str(video), blob_detector, workers=2, segment_sec=2.0, overlap_sec=1.5)
+
+    assert split["summary"]["segments"] == 3
+    for key in ("frame", "pts", "inside", "total_entries", "total_exits", "zone:Entrance", "zone:Exit"):
+        assert np.array_equal(single["frames"][key], split["frames"][key]), key
+    assert single["summary"]["total_entries"] == 2
+    assert single["summary"]["total_exits"] == 1
+    assert split["summary"]["unique_tracks"] == single["summary"]["unique_tracks"] == 3
+    # timestamps come from the container, one frame every 1/FPS seconds
+    assert np.allclose(np.diff(split["frames"]["pts"]), 1.0 / FPS)
+    assert list(split["seconds"]["second"]) == list(range(FRAMES // FPS))
+
+
+class LandingCapture:
+    """cv2.VideoCapture whose seeks land `drift` frames past the requested one, like a keyframe snap."""
+
+    drift = 0
+    opener = cv2.VideoCapture
+
+    def __init__(self, path):
+        self.cap = LandingCapture.opener(path)
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES and value:
+            value += self.drift
+        return self.cap.set(prop, value)
+
+    def __getattr__(self, name):
+        return getattr(self.cap, name)
+
+
+@pytest.mark.parametrize("drift", [3, 20])
+def test_inexact_seeks_still_match_single_pass(tmp_path, monkeypatch, drift):
+    """Test that a seek landing inside the warm-up or past the segment start loses and mislabels no frame."""
+    video = tmp_path / "clip.mp4"
+    make_video(video)
+    single = analyze_file(str(video), blob_detector, workers=1, segment_sec=100.0)
+    monkeypatch.setattr(LandingCapture, "drift", drift)
+    monkeypatch.setattr(offline.cv2, "VideoCapture", LandingCapture)
+    split = analyze_file(str(video), blob_detector, workers=1, segment_sec=2.0, overlap_sec=1.5)
+    for key in ("frame", "inside", "total_entries", "total_exits", "zone:Entrance", "zone:Exit"):
+        assert np.array_equal(single["frames"][key], split["frames"][key]), key
+    assert split["summary"]["unique_tracks"] == single["summary"]["unique_tracks"]
+
+
+def segment(start, last, box):
+    ids, boxes = np.array([1]), np.array([box], dtype=np.float64)
+    frames = np.arange(start, last + 1)
+    return SegmentResult(
+        start=start,
+        zone_names=[],
+        frame=frames,
+        pts=frames / FPS,
+        inside=np.ones(len(frames), dtype=np.int32),
+        zone_counts=np.empty((len(frames), 0), dtype=np.int32),
+        entries=np.zeros(len(frames), dtype=np.int32),
+        exits=np.zeros(len(frames), dtype=np.int32),
+        track_rows=np.stack([frames, np.ones(len(frames), dtype=np.int64), np.zeros(len(frames), dtype=np.int64)], axis=1),
+        boundary_in=(ids, boxes),
+        boundary_out=(ids, boxes),
+    )
+
+
+def test_stitch_carries_ids_only_across_contiguous_segments():
+    """Test that a segment which stopped early does not hand its ids to the next one."""
+    box = [10, 10, 30, 30]
+    joined = stitch([segment(0, 9, box), segment(10, 19, box)])
+    assert np.unique(joined["tracks"]["track_id"]).tolist() == [1]
+    gapped = stitch([segment(0, 6, box), segment(10, 19, box)])
+    assert np.unique(gapped["tracks"]["track_id"]).tolist() == [1, 2]
+
+
+def test_write_table_formats(tmp_path):
+    """Test that npz and csv outputs carry every column."""
+    columns = {"frame": np.arange(3), "zone:Exit": np.array([0, 1, 2])}
+    npz = np.load(write_table(tmp_path / "out.frames", columns, "npz"))
+    assert list(npz["zone:Exit"]) == [0, 1, 2]
+    csv = write_table(tmp_path / "out.frames", columns, "csv").read_text().splitlines()
+    assert csv[0] == "frame,zone:Exit" and csv[-1] == "2,2"
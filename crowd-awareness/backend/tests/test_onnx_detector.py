@@ -0,0 +1,91 @@
+"""Unit tests for the ONNX backend's pre/post-processing and backend selection."""
+
+import numpy as np
+import pytest
+import supervision as sv
+
+from benchmarks.detector_accuracy import accuracy_delta
+from pipeline.backends import create_detector
+from pipeline.onnx_detector import letterbox, nms, postprocess, replacing, to_tensor
+
+
+def head_output(rows, classes=80):
+    """Fake YOLOv8 output (1, 4 + classes, anchors) from (cx, cy, w, h, class, score) rows."""
+    out = np.zeros((1, 4 + classes, len(rows)), dtype=np.float32)
+    for a, (cx, cy, w, h, cls, score) in enumerate(rows):
+        out[0, :4, a] = (cx, cy, w, h)
+        out[0, 4 + cls, a] = score
+    return out
+
+
+def test_letterbox_matches_ultralytics_rect_shape():
+    """Test that 720p becomes 640x384 with symmetric grey padding, like the PyTorch predictor."""
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    image, gain, pad = letterbox(frame, 640)
+    assert image.shape == (384, 640, 3)
+    assert gain == 0.5 and pad == (0, 12)
+    assert image[0, 0, 0] == 114
+    assert to_tensor(image).shape == (1, 3, 384, 640)
+
+
+def test_postprocess_keeps_people_and_maps_back_to_frame():
+    """Test class filtering, NMS and un-letterboxing of boxes."""
+    output = head_output([
+        (100, 112, 40, 80, 0, 0.9),   # person
+        (102, 112, 40, 80, 0, 0.8),   # duplicate of the first, suppressed
+        (300, 200, 40, 40, 2, 0.95),  # car
+        (500, 200, 40, 80, 0, 0.1),   # below conf
+    ])
+    detections = postprocess(output, gain=0.5, pad=(0, 12), frame_shape=(720, 1280))
+    assert len(detections) == 1
+    assert np.allclose(detections.xyxy[0], [160, 120, 240, 280])
+    assert detections.confidence.dtype == np.float32
+    assert detections.class_id.tolist() == [0]
+    assert detections.data["class_name"].tolist() == ["person"]
+
+
+def test_postprocess_empty_returns_empty_detections():
+    """Test that a frame with no people yields sv.Detections.empty()."""
+    detections = postprocess(head_output([(10, 10, 5, 5, 1, 0.9)]), 1.0, (0, 0), (64, 64))
+    assert len(detections) == 0
+    assert detections.data["class_name"].shape == (0,)
+
+
+def test_model_files_appear_only_when_complete(tmp_path):
+    """Test that a cached model is replaced in one rename and a failed write leaves no file behind."""
+    target = tmp_path / "yolov8n.onnx"
+    with pytest.raises(RuntimeError):
+        with replacing(target) as tmp:
+            tmp.write_bytes(b"half")
+            raise RuntimeError("export failed")
+    assert list(tmp_path.iterdir()) == []
+
+    with replacing(target) as tmp:
+        tmp.write_bytes(b"model")
+        assert not target.exists()
+    assert target.read_bytes() == b"model"
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_nms_suppresses_overlaps_only():
+    """Test greedy NMS keeps the best box of each overlapping group."""
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60]], dtype=np.float32)
+    scores = np.array([0.5, 0.9, 0.7], dtype=np.float32)
+    assert nms(boxes, scores, 0.5).tolist() == [1, 2]
+
+
+def test_unknown_backend_is_rejected():
+    """Test that a typo in DETECTOR_BACKEND fails loudly."""
+    with pytest.raises(ValueError):
+        create_detector("tensorrt")
+
+
+def test_accuracy_delta_compares_to_reference():
+    """Test recall/precision against reference boxes."""
+    ref = [sv.Detections(xyxy=np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=np.float32),
+                         confidence=np.array([0.9, 0.8], dtype=np.float32))]
+    cand = [sv.Detections(xyxy=np.array([[0, 0, 10, 11]], dtype=np.float32),
+                          confidence=np.array([0.85], dtype=np.float32))]
+    delta = accuracy_delta(ref, cand)
+    assert delta["recall"] == 0.5 and delta["precision"] == 1.0
+    assert delta["mean_conf_drift"] == pytest.approx(0.05, abs=1e-4)
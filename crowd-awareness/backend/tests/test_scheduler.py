@@ -0,0 +1,64 @@
+"""Unit tests for adaptive frame skipping and tracker extrapolation."""
+
+import numpy as np
+import supervision as sv
+
+from pipeline.scheduler import AdaptiveScheduler
+from pipeline.tracker import PersonTracker
+
+
+def run_frames(scheduler, frames, detect_sec, other_sec=0.001):
+    detected = 0
+    for _ in range(frames):
+        if scheduler.should_detect():
+            detected += 1
+            scheduler.record(detect_sec + other_sec, detect_sec)
+        else:
+            scheduler.record(other_sec, None)
+    return detected
+
+
+def test_fast_detector_runs_every_frame():
+    """Test that k stays at 1 when detection fits the budget."""
+    scheduler = AdaptiveScheduler(target_fps=10, adjust_every_sec=0.0)
+    detected = run_frames(scheduler, 50, detect_sec=0.02)
+    assert scheduler.detect_every == 1
+    assert detected == 50
+
+
+def test_slow_detector_raises_skip_interval():
+    """Test that k grows until the amortised cost fits the target rate."""
+    scheduler = AdaptiveScheduler(target_fps=10, max_skip=8, adjust_every_sec=0.0)
+    run_frames(scheduler, 50, detect_sec=0.25)
+    # 0.001 + 0.25 / k <= 0.1  ->  k = 3
+    assert scheduler.detect_every == 3
+    detected = run_frames(scheduler, 30, detect_sec=0.25)
+    assert detected == 10
+
+
+def test_imgsz_steps_down_when_skipping_is_not_enough():
+    """Test that imgsz is reduced once k is at its ceiling."""
+    scheduler = AdaptiveScheduler(target_fps=10, max_skip=2, adapt_imgsz=True, adjust_every_sec=0.0)
+    run_frames(scheduler, 20, detect_sec=1.0)
+    assert scheduler.detect_every == 2
+    assert scheduler.imgsz < 640
+
+
+def test_predict_extrapolates_without_new_ids():
+    """Test that skipped frames move tracked boxes but keep their ids."""
+    tracker = PersonTracker()
+    for step in range(5):
+        x = 100 + 10 * step
+        detections = sv.Detections(
+            xyxy=np.array([[x, 100, x + 50, 200]], dtype=np.float32),
+            confidence=np.array([0.9], dtype=np.float32),
+            class_id=np.array([0]),
+        )
+        tracked = tracker.track(detections)
+    assert len(tracked) == 1
+
+    predicted = tracker.predict()
+    assert predicted.tracker_id.tolist() == tracked.tracker_id.tolist()
+    assert predicted.xyxy[0, 0] > tracked.xyxy[0, 0]
+    again = tracker.predict()
+    assert again.xyxy[0, 0] > predicted.xyxy[0, 0]
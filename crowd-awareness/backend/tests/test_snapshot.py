@@ -0,0 +1,127 @@
+"""Unit tests for the lazy, versioned snapshot cache."""
+
+import threading
+
+import cv2
+import numpy as np
+import supervision as sv
+
+from pipeline.annotate import FrameAnnotator
+from pipeline.snapshot import SnapshotCache
+from pipeline.zones import ZoneManager
+
+
+class CountingAnnotator(FrameAnnotator):
+    def __init__(self) -> None:
+        super().__init__()
+        self.renders = 0
+
+    def render(self, frame, tracked, zones, copy=True):
+        self.renders += 1
+        return super().render(frame, tracked, zones, copy=copy)
+
+
+def make_cache():
+    annotator = CountingAnnotator()
+    zones = ZoneManager().init_zones(320, 240)
+    return SnapshotCache(annotator), annotator, zones
+
+
+def test_publish_does_not_encode():
+    """Test that frames are only encoded when a snapshot is requested."""
+    cache, annotator, zones = make_cache()
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    for _ in range(10):
+        cache.publish(frame, sv.Detections.empty(), zones)
+    assert annotator.renders == 0
+    assert cache.version == 10
+
+    version, jpeg = cache.get_jpeg()
+    assert version == 10
+    assert cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR).shape == (240, 320, 3)
+    assert annotator.renders == 1
+
+    _, small = cache.get_jpeg(scale=0.5)
+    assert cv2.imdecode(np.frombuffer(small, np.uint8), cv2.IMREAD_COLOR).shape == (120, 160, 3)
+    assert annotator.renders == 1  # other scales reuse the same render
+
+
+def test_concurrent_readers_share_one_encode():
+    """Test that many readers of the same version trigger a single encode."""
+    cache, annotator, zones = make_cache()
+    cache.publish(np.zeros((240, 320, 3), dtype=np.uint8), sv.Detections.empty(), zones)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_jpeg())) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert annotator.renders == 1
+    assert len({jpeg for _, jpeg in results}) == 1
+    assert cache.get_base64() is not None
+
+
+def test_published_frame_is_decoupled_from_caller_buffer():
+    """Test that reusing the decoder buffer after publish does not alter the snapshot."""
+    cache, _, zones = make_cache()
+    frame = np.full((240, 320, 3), 200, dtype=np.uint8)
+    cache.publish(frame, sv.Detections.empty(), zones)
+    frame[:] = 0
+    _, jpeg = cache.get_jpeg()
+    decoded = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+    assert decoded[120, 10].mean() > 150
+
+
+def test_mjpeg_viewers_share_one_producer():
+    """Test that several viewers receive the same frames from one source."""
+    import asyncio
+
+    from pipeline.streaming import MjpegBroadcaster
+
+    calls = []
+
+    def source():
+        calls.append(1)
+        return len(calls), b"jpeg-%d" % len(calls)
+
+    async def scenario():
+        broadcaster = MjpegBroadcaster(source, max_fps=50)
+        viewers = [broadcaster.stream() for _ in range(5)]
+        chunks = await asyncio.gather(*(v.__anext__() for v in viewers))
+        for v in viewers:
+            await v.aclose()
+        return broadcaster, chunks
+
+    broadcaster, chunks = asyncio.run(scenario())
+    assert len(set(chunks)) == 1
+    assert chunks[0].startswith(b"--frame\r\nContent-Type: image/jpeg")
+    assert len(calls) <= 2
+    assert broadcaster.viewers == 0
+
+
+def test_mjpeg_producer_survives_source_errors():
+    """Test that a failing snapshot source does not strand viewers."""
+    import asyncio
+
+    from pipeline.streaming import MjpegBroadcaster
+
+    calls = []
+
+    def source():
+        calls.append(1)
+        if len(calls) <= 2:
+            raise RuntimeError("camera hiccup")
+        return len(calls), b"jpeg"
+
+    async def scenario():
+        broadcaster = MjpegBroadcaster(source, max_fps=100)
+        viewer = broadcaster.stream()
+        chunk = await asyncio.wait_for(viewer.__anext__(), 5.0)
+        await viewer.aclose()
+        return broadcaster, chunk
+
+    broadcaster, chunk = asyncio.run(scenario())
+    assert chunk.endswith(b"jpeg\r\n")
+    assert broadcaster.errors == 2
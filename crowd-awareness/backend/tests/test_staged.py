@@ -0,0 +1,68 @@
+"""Tests for the process-based staged pipeline."""
+
+import time
+
+import cv2
+import numpy as np
+import supervision as sv
+
+from pipeline.staged import ProcessPipelineController, SharedFrameRing
+from pipeline.video_source import DEFAULT_VIDEO
+
+
+class EmptyDetector:
+    def detect_people(self, frame):
+        return sv.Detections.empty()
+
+
+def test_shared_ring_is_visible_through_attached_handle():
+    """Test that a second handle on the ring sees writes without copying."""
+    ring = SharedFrameRing((4, 6, 3), slots=3)
+    other = SharedFrameRing.attach(ring.spec())
+    try:
+        ring.slot(1)[:] = 7
+        assert np.all(other.slot(1) == 7)
+        assert np.all(other.slot(0) == 0)
+    finally:
+        other.close()
+        ring.close()
+
+
+def test_process_pipeline_publishes_state_and_snapshots():
+    """Test that the four stages run and their output reaches the API process."""
+    controller = ProcessPipelineController(
+        str(DEFAULT_VIDEO), detector_factory=EmptyDetector, snapshot_interval=0.0
+    )
+    controller.start()
+    try:
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            if controller.get_snapshot()["image"] and controller.get_building_status()["last_update_ts"]:
+                break
+            time.sleep(0.1)
+        assert controller.is_running()
+        assert controller.get_snapshot()["image"]
+        assert controller.get_building_status()["current_inside"] == 0
+        assert [s.name for s in controller.get_sections().sections][0] == "Desk 1"
+    finally:
+        controller.stop()
+    assert not controller.is_running()
+
+
+def test_snapshot_jpeg_honours_scale():
+    """Test that process mode downscales the stage's full-size jpeg once per version and scale."""
+    controller = ProcessPipelineController(str(DEFAULT_VIDEO), detector_factory=EmptyDetector)
+    controller.snapshot = (3, cv2.imencode(".jpg", np.full((360, 640, 3), 90, dtype=np.uint8))[1].tobytes())
+    version, jpeg = controller.get_snapshot_jpeg(0.5)
+    assert version == 3
+    assert cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR).shape == (180, 320, 3)
+    assert controller.get_snapshot_jpeg(0.5)[1] is jpeg
+    assert controller.get_snapshot_jpeg()[1] is controller.snapshot[1]
+
+
+def test_line_counts_reach_the_parent():
+    """Test that process mode reports line crossings in its status like thread mode does."""
+    controller = ProcessPipelineController(str(DEFAULT_VIDEO), detector_factory=EmptyDetector, headless=True)
+    assert controller.get_processing_status()["line"] == {"in": 0, "out": 0}
+    controller._apply({"line": {"in": 3, "out": 1}})
+    assert controller.get_processing_status()["line"] == {"in": 3, "out": 1}
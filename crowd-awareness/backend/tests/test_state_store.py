@@ -0,0 +1,78 @@
+"""Unit tests for published state snapshots."""
+
+import dataclasses
+import threading
+
+import pytest
+
+from pipeline.state_store import StateStore
+
+
+def test_snapshot_is_frozen_and_detached():
+    """Test that a published snapshot never changes after later mutations."""
+    state = StateStore()
+    state.init_sections(["Desk 1", "Exit"])
+    state.sections["Desk 1"]["current_count"] = 2
+    state.increment_entry()
+    state.add_alerts([{"type": "t", "level": "info", "message": "m", "ts": 1.0}])
+    snap = state.publish()
+
+    state.sections["Desk 1"]["current_count"] = 9
+    state.increment_entry()
+    state.add_alerts([{"type": "t2", "level": "info", "message": "m2", "ts": 2.0}])
+
+    assert state.snapshot() is snap
+    assert snap.version == 1
+    assert snap.total_entries == 1
+    assert snap.sections[0].current_count == 2
+    assert len(snap.alerts) == 1
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snap.total_entries = 5
+
+
+def test_readers_always_see_consistent_snapshots():
+    """Test that concurrent readers never observe a half-updated frame."""
+    state = StateStore()
+    state.init_sections(["A", "B"])
+    stop = threading.Event()
+    torn = []
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            n += 1
+            state.sections["A"]["current_count"] = n
+            state.sections["B"]["current_count"] = n
+            state.update_counts(2 * n)
+            state.publish()
+
+    def reader():
+        for _ in range(20000):
+            snap = state.snapshot()
+            counts = [s.current_count for s in snap.sections]
+            if counts and (counts[0] != counts[1] or snap.current_inside != 2 * counts[0]):
+                torn.append(snap)
+
+    w = threading.Thread(target=writer)
+    w.start()
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for r in readers:
+        r.start()
+    for r in readers:
+        r.join()
+    stop.set()
+    w.join()
+    assert not torn
+
+
+def test_version_only_moves_when_content_changes():
+    """Test that republishing an unchanged state keeps the version (and so the dashboard ETag)."""
+    state = StateStore()
+    state.init_sections(["A"])
+    state.update_counts(2)
+    first = state.publish()
+    state.update_counts(2)  # new timestamp, same content
+    assert state.publish() is first
+    state.sections["A"]["current_count"] = 1
+    assert state.publish().version == first.version + 1
+    assert state.publish(force=True).version == first.version + 2
@@ -0,0 +1,141 @@
+"""Unit tests for zone ROI cropping and tiled inference."""
+
+import cv2
+import numpy as np
+import supervision as sv
+
+from pipeline.batching import InferenceBatcher
+from pipeline.tiling import RoiDetector, merge_detections, tile_grid, zones_roi
+from pipeline.zones import ZoneManager
+
+
+class BlobDetector:
+    """Reports every bright blob of the input as a person and remembers the input shapes."""
+
+    max_batch_size = 16
+    max_wait_ms = 5.0
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    def _detect(self, frame):
+        mask = (frame[:, :, 0] > 127).astype(np.uint8)
+        count, _, boxes, _ = cv2.connectedComponentsWithStats(mask)
+        xyxy = np.array([[x, y, x + w, y + h] for x, y, w, h, _ in boxes[1:]], dtype=np.float32).reshape(-1, 4)
+        return sv.Detections(
+            xyxy=xyxy,
+            confidence=np.linspace(0.9, 0.5, len(xyxy)).astype(np.float32),
+            class_id=np.zeros(len(xyxy), dtype=int),
+        )
+
+    def detect_people_batch(self, frames, imgsz=None):
+        self.calls.append([f.shape[:2] for f in frames])
+        return [self._detect(f) for f in frames]
+
+
+def zone_manager(w, h, rects):
+    zones = ZoneManager()
+    zones.zones = {
+        f"z{i}": sv.PolygonZone(
+            polygon=np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.int32),
+            frame_resolution_wh=(w, h),
+        )
+        for i, (x0, y0, x1, y1) in enumerate(rects)
+    }
+    zones.rasterize(w, h)
+    return zones
+
+
+def test_roi_is_padded_union_of_zone_boxes():
+    """Test that the ROI covers every zone plus the margin and is clipped to the frame."""
+    zones = zone_manager(1000, 500, [(100, 100, 300, 200), (600, 150, 990, 400)])
+    assert zones_roi(zones, (500, 1000), margin=0.02) == (80, 90, 1000, 410)
+    assert zones_roi(ZoneManager(), (500, 1000)) is None
+
+
+def test_tile_grid_covers_4k_with_overlap():
+    """Test that tiles stay within the ROI, are at most tile_size and overlap by at least the requested share."""
+    tiles = tile_grid((0, 0, 3840, 2160), tile_size=640, overlap=0.2)
+    assert len(tiles) == 8 * 4
+    assert all(x1 - x0 == 640 and y1 - y0 == 640 for x0, y0, x1, y1 in tiles)
+    xs = sorted({t[0] for t in tiles})
+    assert xs[0] == 0 and xs[-1] == 3840 - 640
+    assert all(b - a <= 640 * 0.8 for a, b in zip(xs, xs[1:]))
+    assert tile_grid((10, 20, 500, 300), 640) == [(10, 20, 500, 300)]
+
+
+def test_roi_mode_crops_and_maps_boxes_back():
+    """Test that only the ROI reaches the detector and boxes come back in frame coordinates."""
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    frame[300:380, 500:530] = 255
+    frame[20:60, 20:40] = 255  # outside every zone: never seen by the detector
+    inner = BlobDetector()
+    detector = RoiDetector(inner, zone_manager(1280, 720, [(400, 200, 900, 600)]), margin=0.0)
+    detections = detector.detect_people(frame)
+    assert inner.calls == [[(400, 500)]]
+    assert detections.xyxy.tolist() == [[500, 300, 530, 380]]
+
+
+def test_tiled_mode_merges_person_cut_by_a_seam():
+    """Test that a person lying across overlapping tiles is reported once, with its full box."""
+    frame = np.zeros((1200, 1800, 3), dtype=np.uint8)
+    frame[100:140, 1000:1020] = 255   # far-away person, inside a single tile
+    frame[500:700, 560:620] = 255     # straddles the first vertical seam
+    inner = BlobDetector()
+    zones = zone_manager(1800, 1200, [(0, 0, 1800, 1200)])
+    detector = RoiDetector(inner, zones, tiled=True, tile_size=640, overlap=0.2, margin=0.0)
+    detections = detector.detect_people(frame)
+    assert len(inner.calls) == 1 and len(inner.calls[0]) == len(detector.layout((1200, 1800))) > 1
+    assert sorted(detections.xyxy.tolist()) == [[560, 500, 620, 700], [1000, 100, 1020, 140]]
+
+
+def test_merge_keeps_neighbours_apart():
+    """Test that two people side by side from different tiles are not merged."""
+    a = sv.Detections(xyxy=np.array([[0, 0, 10, 30]], dtype=np.float32), confidence=np.array([0.9], dtype=np.float32))
+    b = sv.Detections(xyxy=np.array([[0, 0, 10, 30]], dtype=np.float32), confidence=np.array([0.8], dtype=np.float32))
+    assert len(merge_detections([(a, (0, 0)), (b, (12, 0))])) == 2
+    assert len(merge_detections([(a, (0, 0)), (b, (1, 0))])) == 1
+
+
+def test_tiles_share_one_batch_through_the_batcher():
+    """Test that a camera's tiles reach the shared detector as a single batch."""
+    inner = BlobDetector()
+    batcher = InferenceBatcher(inner)
+    zones = zone_manager(1800, 1200, [(0, 0, 1800, 1200)])
+    detector = RoiDetector(batcher.client("cam1"), zones, tiled=True, margin=0.0)
+    try:
+        detector.detect_people(np.zeros((1200, 1800, 3), dtype=np.uint8))
+    finally:
+        batcher.stop()
+    assert [len(c) for c in inner.calls] == [len(detector.layout((1200, 1800)))]
+
+
+def test_merge_carries_detection_data():
+    """Test that per-box data such as class_name survives the shift and the seam merge."""
+    def person(x, score):
+        return sv.Detections(
+            xyxy=np.array([[x, 0, x + 10, 30]], dtype=np.float32),
+            confidence=np.array([score], dtype=np.float32),
+            class_id=np.array([0]),
+            data={"class_name": np.array(["person"])},
+        )
+
+    merged = merge_detections([(person(0, 0.9), (0, 0)), (person(0, 0.8), (1, 0)), (person(0, 0.7), (40, 0))])
+    assert len(merged) == 2
+    assert merged.data["class_name"].tolist() == ["person", "person"]
+
+
+def test_single_frame_detector_gets_imgsz_by_keyword():
+    """Test that a detector without detect_people_batch is called per crop with imgsz as a keyword."""
+    class SingleDetector:
+        def __init__(self) -> None:
+            self.sizes = []
+
+        def detect_people(self, frame, *, imgsz=None):
+            self.sizes.append(imgsz)
+            return sv.Detections.empty()
+
+    inner = SingleDetector()
+    detector = RoiDetector(inner, zone_manager(1800, 1200, [(0, 0, 1800, 1200)]), tiled=True, margin=0.0)
+    detector.detect_people(np.zeros((1200, 1800, 3), dtype=np.uint8), imgsz=480)
+    assert inner.sizes == [480] * len(detector.layout((1200, 1800)))
@@ -0,0 +1,87 @@
+"""Unit and soak tests for the TTL-evicting track table and the tracker's removed-track pruning."""
+
+import numpy as np
+import supervision as sv
+
+from pipeline.movement import MovementAnalyzer
+from pipeline.state_store import StateStore
+from pipeline.track_table import TrackTable
+from pipeline.tracker import PersonTracker
+from pipeline.zones import ZoneManager
+
+DAY = 86400.0
+
+
+def test_update_returns_previous_zone_and_keeps_first_seen():
+    """Test the record fields a sighting updates."""
+    table = TrackTable(ttl_sec=10)
+    assert table.update(7, "Entrance", 100.0, 5, 6) is None
+    assert table.update(7, "Waiting Area", 103.0, 50, 60) == "Entrance"
+    record = table.get(7)
+    assert (record.zone, record.first_seen, record.last_seen, record.cx, record.cy) == ("Waiting Area", 100.0, 103.0, 50, 60)
+
+
+def test_tracks_unseen_for_ttl_are_evicted():
+    """Test that only tracks older than the TTL go, and that evictions are counted."""
+    table = TrackTable(ttl_sec=10)
+    table.update(1, None, 0.0, 0, 0)
+    table.update(2, None, 5.0, 0, 0)
+    table.update(1, None, 8.0, 0, 0)  # seen again: moves behind track 2
+    assert table.evict(15.5) == 1
+    assert 2 not in table and 1 in table
+    assert table.evict(18.0) == 0
+    assert table.evict(18.1) == 1
+    assert table.stats() == {"tracks": 0, "evicted": 2, "ttl_sec": 10}
+
+
+def test_track_table_memory_is_flat_over_30_days():
+    """Test a 30-day soak: 1 new id every 10 s, each seen for a minute, memory stays flat."""
+    table = TrackTable(ttl_sec=60)
+    sizes = []
+    active = []
+    step_sec = 10.0
+    steps = int(30 * DAY / step_sec)
+    for step in range(steps):
+        now = step * step_sec
+        active = [tid for tid in active if tid > step - 6] + [step]
+        for tid in active:
+            table.update(tid, "Waiting Area", now, 0, 0)
+        table.evict(now)
+        if step % int(DAY / step_sec) == 0:
+            sizes.append(table.nbytes())
+    assert len(table) <= 13
+    assert table.evicted == steps - len(table)
+    assert max(sizes[1:]) == min(sizes[1:])
+
+
+def test_movement_state_stays_bounded_with_synthetic_ids():
+    """Test that an hour of never-repeating track ids leaves only the TTL window in the store."""
+    state = StateStore(track_ttl_sec=30)
+    zones = ZoneManager()
+    zones.init_zones(1280, 720)
+    state.init_sections(zones.zones)
+    movement = MovementAnalyzer(state, zones)
+    for second in range(3600):
+        ids = np.arange(second * 3, second * 3 + 3)
+        xyxy = np.tile(np.array([[600, 340, 640, 380]], dtype=np.float32), (3, 1))
+        movement.update_section_stats(sv.Detections(xyxy=xyxy, tracker_id=ids), float(second))
+    assert len(state.tracks) <= 31 * 3
+    assert state.tracks.evicted == 3600 * 3 - len(state.tracks)
+
+
+def test_tracker_does_not_accumulate_removed_tracks():
+    """Test that ByteTrack's removed-track list stays bounded as people come and go."""
+    tracker = PersonTracker()
+    rng = np.random.default_rng(0)
+    for frame in range(1500):
+        # a new person every 10 frames, each visible for 20 frames at a distinct spot
+        visible = [p for p in range(frame // 10 - 1, frame // 10 + 1) if p >= 0]
+        xy = np.array([[(p * 97) % 1200, (p * 53) % 640] for p in visible], dtype=np.float32)
+        xyxy = np.concatenate([xy, xy + 60], axis=1) + rng.normal(0, 0.5, (len(visible), 4)).astype(np.float32)
+        tracker.track(sv.Detections(
+            xyxy=xyxy,
+            confidence=np.full(len(visible), 0.9, dtype=np.float32),
+            class_id=np.zeros(len(visible), dtype=int),
+        ))
+    assert len(tracker.tracker.removed_tracks) <= len(tracker.tracker.lost_tracks)
+    assert len(tracker.tracker.lost_tracks) < 20
@@ -0,0 +1,255 @@
+"""Unit tests for the video source and frame prefetcher."""
+
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from pipeline import ffmpeg_capture
+from pipeline.ffmpeg_capture import FfmpegCapture, build_command, ffmpeg_available, scaled_size
+from pipeline.video_source import (
+    DECODER_FFMPEG,
+    DECODER_OPENCV,
+    DEFAULT_VIDEO,
+    POLICY_BLOCK,
+    POLICY_LATEST,
+    FramePrefetcher,
+    VideoSource,
+    is_live_source,
+)
+
+
+class FakeCapture:
+    """Produces numbered 4x4 frames and writes into the buffer it is given."""
+
+    def __init__(self, total: int, delay: float = 0.0) -> None:
+        self.total = total
+        self.delay = delay
+        self.index = 0
+        self.allocations = 0
+
+    def read(self, image=None):
+        if self.index >= self.total:
+            return False, None
+        if self.delay:
+            time.sleep(self.delay)
+        if image is None:
+            image = np.empty((4, 4, 3), dtype=np.uint8)
+            self.allocations += 1
+        image.fill(self.index % 256)
+        self.index += 1
+        return True, image
+
+
+def test_live_source_detection():
+    """Test that camera indices and streams are treated as live."""
+    assert is_live_source(0)
+    assert is_live_source("rtsp://cam/1")
+    assert not is_live_source("/videos/lobby.mp4")
+
+
+def test_block_policy_delivers_every_frame():
+    """Test that the no-drop policy hands over every frame in order."""
+    cap = FakeCapture(total=50)
+    prefetcher = FramePrefetcher(cap.read, slots=3, policy=POLICY_BLOCK)
+    prefetcher.start()
+
+    seen = []
+    while True:
+        ok, frame = prefetcher.read(timeout=2.0)
+        if not ok:
+            break
+        seen.append(int(frame[0, 0, 0]))
+        time.sleep(0.001)
+    prefetcher.stop()
+
+    assert seen == list(range(50))
+    assert prefetcher.frames_dropped == 0
+    assert cap.allocations <= 3  # ring buffers are reused after the first fill
+
+
+def test_latest_policy_drops_stale_frames():
+    """Test that a slow consumer only sees the newest frame."""
+    cap = FakeCapture(total=200)
+    prefetcher = FramePrefetcher(cap.read, slots=3, policy=POLICY_LATEST)
+    prefetcher.start()
+
+    seen = []
+    while True:
+        ok, frame = prefetcher.read(timeout=2.0)
+        if not ok:
+            break
+        seen.append(int(frame[0, 0, 0]))
+        time.sleep(0.01)
+    prefetcher.stop()
+
+    assert seen == sorted(seen)
+    assert len(seen) < 200
+    assert prefetcher.frames_dropped == 200 - len(seen)
+    assert prefetcher.stats()["frames_decoded"] == 200
+
+
+def test_held_frame_is_not_overwritten():
+    """Test that the frame returned by read() stays intact until the next read."""
+    cap = FakeCapture(total=100)
+    prefetcher = FramePrefetcher(cap.read, slots=2, policy=POLICY_LATEST)
+    prefetcher.start()
+
+    ok, frame = prefetcher.read()
+    value = int(frame[0, 0, 0])
+    time.sleep(0.05)  # decoder keeps running meanwhile
+    assert ok and int(frame[0, 0, 0]) == value
+    assert np.all(frame == value)
+    prefetcher.stop()
+
+
+def test_stop_unblocks_waiting_decoder():
+    """Test that stop() returns even when the decoder waits for a free slot."""
+    cap = FakeCapture(total=100)
+    prefetcher = FramePrefetcher(cap.read, slots=2, policy=POLICY_BLOCK)
+    prefetcher.start()
+    time.sleep(0.05)
+
+    stopper = threading.Thread(target=prefetcher.stop)
+    stopper.start()
+    stopper.join(2.0)
+    assert not stopper.is_alive()
+
+
+def test_video_source_prefetch_on_bundled_video():
+    """Test prefetching the bundled video end to end."""
+    video = VideoSource(DEFAULT_VIDEO, prefetch=True, prefetch_slots=3)
+    assert video.drop_policy == POLICY_BLOCK
+    assert video.open()
+
+    frames = 0
+    while frames < 20:
+        ok, frame = video.read()
+        assert ok and frame.ndim == 3
+        frames += 1
+    stats = video.stats()
+    video.release()
+
+    assert stats["prefetch"] is True
+    assert stats["frames_dropped"] == 0
+    assert stats["frames_decoded"] >= 20
+
+
+def test_scaled_size_keeps_aspect_and_never_upscales():
+    """Test the decode size used by both decoders."""
+    assert scaled_size(3840, 2160, 960) == (960, 540)
+    assert scaled_size(1280, 720, 641) == (641, 360)
+    assert scaled_size(1280, 720, 1920) == (1280, 720)
+    assert scaled_size(1280, 720, None) == (1280, 720)
+
+
+def test_ffmpeg_command_scales_to_raw_bgr():
+    """Test that RTSP feeds go over TCP without input buffering and frames come out as raw bgr24."""
+    cmd = build_command("rtsp://cam/1", (960, 540), live=True, binary="ffmpeg")
+    assert cmd[cmd.index("-rtsp_transport") + 1] == "tcp"
+    assert "nobuffer" in cmd
+    assert cmd[cmd.index("-vf") + 1] == "scale=960:540:flags=area"
+    assert cmd[-5:] == ["-pix_fmt", "bgr24", "-f", "rawvideo", "pipe:1"]
+    assert "-rtsp_transport" not in build_command("/videos/a.mp4", (960, 540), live=False)
+
+
+def test_ffmpeg_decoder_falls_back_to_opencv(monkeypatch):
+    """Test that a missing ffmpeg binary still yields frames at decode_width through OpenCV."""
+    monkeypatch.setattr(ffmpeg_capture, "FFMPEG_BINARY", "ffmpeg-not-installed")
+    video = VideoSource(DEFAULT_VIDEO, decoder=DECODER_FFMPEG, decode_width=640)
+    assert video.open()
+    ok, frame = video.read()
+    ok2, reused = video.read_into(frame)
+    video.release()
+    assert video.active_decoder == DECODER_OPENCV
+    assert ok and frame.shape == (360, 640, 3)
+    assert ok2 and reused is frame
+
+
+def test_unknown_decoder_is_rejected():
+    """Test that a typo in a camera's decoder setting fails loudly and the half-built source releases cleanly."""
+    with pytest.raises(ValueError):
+        VideoSource(DEFAULT_VIDEO, decoder="gstreamer")
+    source = VideoSource.__new__(VideoSource)
+    with pytest.raises(ValueError):
+        source.__init__(DEFAULT_VIDEO, decoder="gstreamer")
+    source.release()
+
+
+def test_read_into_fills_caller_buffer_without_resize():
+    """Test that a decode_width at or above the native width still writes into the caller's buffer."""
+    video = VideoSource(DEFAULT_VIDEO, decode_width=10000)
+    try:
+        assert video.open()
+        target = np.zeros((720, 1280, 3), dtype=np.uint8)
+        ok, frame = video.read_into(target)
+        assert ok and frame is target and target.any()
+    finally:
+        video.release()
+
+
+@pytest.mark.skipif(not ffmpeg_available(), reason="ffmpeg binary not installed")
+def test_ffmpeg_capture_reads_bundled_video_into_reused_buffer():
+    """Test that ffmpeg decodes the bundled video at the requested size, close to OpenCV plus resize."""
+    cap = FfmpegCapture(str(DEFAULT_VIDEO), decode_width=640)
+    reference = cv2.VideoCapture(str(DEFAULT_VIDEO))
+    try:
+        assert cap.isOpened()
+        assert (cap.get(cv2.CAP_PROP_FRAME_WIDTH), cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) == (640, 360)
+        buffer = None
+        for _ in range(5):
+            ok, frame = cap.read(buffer)
+            assert ok and (buffer is None or frame is buffer)
+            buffer = frame
+            _, full = reference.read()
+        expected = cv2.resize(full, (640, 360), interpolation=cv2.INTER_AREA)
+        assert np.abs(frame.astype(np.int16) - expected).mean() < 4
+        assert cap.get(cv2.CAP_PROP_POS_MSEC) == pytest.approx(reference.get(cv2.CAP_PROP_POS_MSEC), abs=1)
+    finally:
+        cap.release()
+        reference.release()
+
+
+class StalledCapture:
+    """A capture whose read blocks until unblocked, like a stalled RTSP stream."""
+
+    def __init__(self) -> None:
+        self.unblock = threading.Event()
+        self.reading = threading.Event()
+        self.released_during_read = False
+        self.released = 0
+
+    def isOpened(self):
+        return True
+
+    def read(self, image=None):
+        self.reading.set()
+        self.unblock.wait(5.0)
+        self.reading.clear()
+        return False, None
+
+    def get(self, prop):
+        return 0.0
+
+    def release(self):
+        self.released_during_read = self.reading.is_set()
+        self.released += 1
+
+
+def test_release_never_closes_the_capture_under_a_blocked_read():
+    """Test that a decoder stuck in read() gets to release the capture itself once the read returns."""
+    video = VideoSource(DEFAULT_VIDEO, prefetch=True)
+    cap = video.cap = StalledCapture()
+    video.prefetcher = FramePrefetcher(video.read_into, 2, POLICY_BLOCK)
+    video.prefetcher.start()
+    assert cap.reading.wait(2.0)
+    video.stop_timeout_sec = 0.05
+    video.release()
+    assert video.cap is None and cap.released == 0
+    cap.unblock.set()
+    deadline = time.time() + 2
+    while not cap.released and time.time() < deadline:
+        time.sleep(0.01)
+    assert cap.released == 1 and not cap.released_during_read
@@ -1,68 +1,85 @@
 // Change this when deploying
 const API_BASE = "http://localhost:8000";
 
+// latest known dashboard state; /events pushes only the keys that changed
+const state = {
+  building_status: null,
+  alerts: [],
+  sections: { sections: [] },
+  suggested_actions: { actions: [] }
+};
+
 async function fetchJSON(path) {
   const res = await fetch(`${API_BASE}${path}`);
   return res.json();
 }
 
-async function refresh() {
-  try {
-    const [
-      status,
-      alerts,
-      snapshot,
-      sections,
-      actions
-    ] = await Promise.all([
-      fetchJSON("/building-status"),
-      fetchJSON("/alerts"),
-      fetchJSON("/snapshot"),
-      fetchJSON("/sections"),
-      fetchJSON("/suggested-actions")
-    ]);
-
+function render() {
+  const status = state.building_status;
+  if (status) {
     document.getElementById("entries").textContent = status.total_entries;
     document.getElementById("exits").textContent = status.total_exits;
     document.getElementById("inside").textContent = status.current_inside;
+  }
 
-    if (snapshot.image_base64) {
-      document.getElementById("liveImage").src =
-        "data:image/jpeg;base64," + snapshot.image_base64;
-    }
-
-    const table = document.getElementById("sectionsTable");
-    table.innerHTML = "";
-    sections.sections.forEach(s => {
-      const row = document.createElement("tr");
-      row.innerHTML = `
-        <td>${s.name}</td>
-        <td>${s.current}</td>
-        <td>${s.peak}</td>
-      `;
-      table.appendChild(row);
-    });
+  const table = document.getElementById("sectionsTable");
+  table.innerHTML = "";
+  state.sections.sections.forEach(s => {
+    const row = document.createElement("tr");
+    row.innerHTML = `
+      <td>${s.name}</td>
+      <td>${s.current_count}</td>
+      <td>${s.peak_occupancy}</td>
+    `;
+    table.appendChild(row);
+  });
 
-    const alertsList = document.getElementById("alertsList");
-    alertsList.innerHTML = "";
-    alerts.forEach(a => {
-      const li = document.createElement("li");
-      li.textContent = a.message;
-      alertsList.appendChild(li);
-    });
+  const alertsList = document.getElementById("alertsList");
+  alertsList.innerHTML = "";
+  state.alerts.forEach(a => {
+    const li = document.createElement("li");
+    li.textContent = a.message;
+    alertsList.appendChild(li);
+  });
 
-    const actionsList = document.getElementById("actionsList");
-    actionsList.innerHTML = "";
-    actions.forEach(a => {
-      const li = document.createElement("li");
-      li.textContent = a;
-      actionsList.appendChild(li);
-    });
+  const actionsList = document.getElementById("actionsList");
+  actionsList.innerHTML = "";
+  state.suggested_actions.actions.forEach(a => {
+    const li = document.createElement("li");
+    li.textContent = a;
+    actionsList.appendChild(li);
+  });
+}
 
+async function refresh() {
+  try {
+    const dashboard = await fetchJSON("/dashboard");
+    delete dashboard.version;
+    Object.assign(state, dashboard);
+    render();
   } catch (err) {
     console.error("Refresh failed", err);
   }
 }
 
-setInterval(refresh, 1000);
-refresh();
\ No newline at end of file
+function subscribe() {
+  const events = new EventSource(`${API_BASE}/events`);
+  events.addEventListener("update", e => {
+    const delta = JSON.parse(e.data);
+    delete delta.version;
+    Object.assign(state, delta);
+    render();
+  });
+  // EventSource reconnects by itself; the server resends full state on reconnect
+  events.onerror = err => console.error("Live updates interrupted", err);
+}
+
+// the live view is a single MJPEG stream shared with every other viewer
+document.getElementById("liveImage").src = `${API_BASE}/stream.mjpeg`;
+
+if (window.EventSource) {
+  subscribe();
+} else {
+  setInterval(refresh, 1000);
+  refresh();
+}